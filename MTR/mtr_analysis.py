@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Routenwechsel und Auffälligkeiten in der MTR-Historie (mtr_index.npz).
+
+Statt den Pfad nach reuna.cl wie in mtr_routenanalyse.txt von Hand zu
+vergleichen:
+
+- jeder Lauf bekommt einen Fingerabdruck seiner Hop-Folge ("???" zählt
+  als Platzhalter, fehlende Antworten am Ende werden abgeschnitten),
+- zwei aufeinanderfolgende Läufe, deren Hops sich an einer Stelle mit
+  Antwort unterscheiden, ergeben einen Routenwechsel,
+- pro (Hop, IP) laufen exponentiell gewichteter Mittelwert und Varianz
+  von Avg, Wrst und StDev mit; ein Wert mehr als `z` Standardabweichungen
+  und mindestens `min_delta` ms über dieser Basis wird gemeldet. Ein
+  neuer Router an einem Hop beginnt so automatisch eine neue Basis.
+
+Der Zustand (Basen, letzter Lauf, gefundene Ereignisse) liegt in
+mtr_analysis_state.json. Ein neuer Tag kostet nur die neuen Zeilen: pro
+Hop werden die Zeilen nach dem zuletzt verarbeiteten Lauf per
+hop_offsets/searchsorted aus dem Index geholt. Kommen später Läufe vor
+dem letzten verarbeiteten dazu (z.B. eine nachgereichte ältere Datei),
+wird der Zustand verworfen und alles neu ausgewertet, weil Basen und
+Routenwechsel von der Reihenfolge der Läufe abhängen.
+
+Bei einem Einbruch im Durchsatz (pscheduler) zeigt `--at`, welcher Pfad
+zu der Zeit aktiv war und ob er sich in der Nähe geändert hat.
+
+Usage: python3 mtr_analysis.py [--update [Dateien...]] [--rebuild] [--at "2024-11-09 14:00" [--window 12]]
+"""
+
+import os
+import json
+import zlib
+import argparse
+import datetime
+
+import numpy as np
+
+import mtr_ingest
+
+DEFAULT_STATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mtr_analysis_state.json")
+
+METRICS = ("avg", "wrst", "stdev")
+# Gewicht einer neuen Messung wie bei einem gleitenden Mittel über SPAN Läufe
+SPAN = 20
+# Erst ab so vielen Läufen eines (Hop, IP) wird verglichen
+WARMUP = 3
+Z_THRESHOLD = 3.0
+# Mindestsprung in ms, damit Rauschen auf sehr ruhigen Hops nicht auffällt
+MIN_DELTA = {"avg": 5.0, "wrst": 20.0, "stdev": 5.0}
+
+NO_REPLY = "???"
+
+
+def fingerprint(ips):
+    """
+    Kurzer Schlüssel einer Hop-Folge (ohne fehlende Antworten am Ende).
+    """
+    return f"{zlib.crc32('|'.join(trim(ips)).encode()):08x}"
+
+
+def trim(ips):
+    ips = list(ips)
+    while ips and ips[-1] == NO_REPLY:
+        ips.pop()
+    return ips
+
+
+def _same_hop(a, b):
+    return a == b or NO_REPLY in (a, b)
+
+
+def route_diff(old, new):
+    """
+    [(hop, alt, neu)] der Hops, die sich unterscheiden; "???" passt zu
+    allem. Die Folgen werden erst aneinander ausgerichtet (längste
+    gemeinsame Teilfolge), ein eingeschobener Hop ergibt so nur eine Zeile
+    statt aller folgenden. Zwischen zwei gemeinsamen Hops werden die
+    übrigen der Reihe nach gepaart, Hops ohne Partner haben "-"; die
+    Hop-Nummer ist die der neuen Route (bei entfallenen die der alten).
+    """
+    old, new = trim(old), trim(new)
+    # lcs[i][j]: Länge der gemeinsamen Teilfolge von old[i:] und new[j:]
+    lcs = [[0] * (len(new) + 1) for _ in range(len(old) + 1)]
+    for i in range(len(old) - 1, -1, -1):
+        for j in range(len(new) - 1, -1, -1):
+            if _same_hop(old[i], new[j]):
+                lcs[i][j] = lcs[i + 1][j + 1] + 1
+            else:
+                lcs[i][j] = max(lcs[i + 1][j], lcs[i][j + 1])
+
+    diff = []
+    gap_old, gap_new = [], []
+
+    def flush():
+        for k in range(max(len(gap_old), len(gap_new))):
+            i = gap_old[k] if k < len(gap_old) else None
+            j = gap_new[k] if k < len(gap_new) else None
+            a = "-" if i is None else old[i]
+            b = "-" if j is None else new[j]
+            if not _same_hop(a, b):
+                diff.append((j + 1 if j is not None else i + 1, a, b))
+        gap_old.clear()
+        gap_new.clear()
+
+    i = j = 0
+    while i < len(old) or j < len(new):
+        if i < len(old) and j < len(new) and _same_hop(old[i], new[j]) and lcs[i][j] == lcs[i + 1][j + 1] + 1:
+            flush()
+            i += 1
+            j += 1
+        elif j == len(new) or (i < len(old) and lcs[i + 1][j] >= lcs[i][j + 1]):
+            gap_old.append(i)
+            i += 1
+        else:
+            gap_new.append(j)
+            j += 1
+    flush()
+    return diff
+
+
+def empty_state():
+    return {"last_time": None, "last_route": None, "baselines": {}, "routes": {}, "changes": [], "anomalies": []}
+
+
+def load_state(path=DEFAULT_STATE):
+    if not os.path.exists(path):
+        return empty_state()
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path=DEFAULT_STATE):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, path)
+
+
+def new_rows(index, after=None):
+    """
+    Zeilen aller Hops mit start_time > `after`, nach (start_time, hop)
+    sortiert. Pro Hop ein searchsorted im Index, kein Durchlauf über alles.
+    """
+    parts = [mtr_ingest.hop_series(index, hop, None if after is None else after + 1)
+             for hop in range(len(index["hop_offsets"]) - 1)]
+    rows = {name: np.concatenate([part[name] for part in parts]) if parts else index[name][:0]
+            for name in mtr_ingest.COLUMNS}
+    order = np.lexsort((rows["hop"], rows["start_time"]))
+    return {name: values[order] for name, values in rows.items()}
+
+
+def late_runs(index, state):
+    """
+    Anzahl der Läufe im Index bis state["last_time"], die noch nicht
+    verarbeitet wurden (die Summe der "runs" aller Routen zählt die
+    verarbeiteten Läufe).
+    """
+    if state["last_time"] is None:
+        return 0
+    times = np.unique(index["start_time"])
+    done = sum(route["runs"] for route in state["routes"].values())
+    return max(int(np.count_nonzero(times <= state["last_time"])) - done, 0)
+
+
+def update_baseline(baseline, value, alpha):
+    """
+    Exponentiell gewichteter Mittelwert und Varianz (West 1979), in place.
+    Gibt den z-Wert von `value` gegenüber der Basis vor dem Update zurück
+    (None während der Einlaufphase).
+    """
+    count, mean, var = baseline
+    z = None
+    if count >= WARMUP:
+        z = (value - mean) / np.sqrt(var) if var > 0 else (np.inf if value > mean else 0.0)
+    if count == 0:
+        mean, var = value, 0.0
+    else:
+        diff = value - mean
+        incr = alpha * diff
+        mean += incr
+        var = (1 - alpha) * (var + diff * incr)
+    baseline[:] = [count + 1, mean, var]
+    return z
+
+
+def analyze(index, state, span=SPAN, z_threshold=Z_THRESHOLD, min_delta=MIN_DELTA):
+    """
+    Verarbeitet alle Läufe nach state["last_time"]. Gibt die neu
+    gefundenen (Routenwechsel, Auffälligkeiten) zurück; der Zustand wird
+    fortgeschrieben. Gibt es ältere, noch nicht verarbeitete Läufe
+    (late_runs), wird der Zustand zurückgesetzt und alles neu ausgewertet.
+    """
+    alpha = 2.0 / (span + 1)
+    if late_runs(index, state):
+        state.clear()
+        state.update(empty_state())
+    rows = new_rows(index, state["last_time"])
+    changes, anomalies = [], []
+    if not len(rows["hop"]):
+        return changes, anomalies
+
+    # Läufe sind zusammenhängend, weil nach start_time sortiert
+    times, starts = np.unique(rows["start_time"], return_index=True)
+    ends = np.append(starts[1:], len(rows["hop"]))
+    for start_time, lo, hi in zip(times.tolist(), starts, ends):
+        hops = rows["hop"][lo:hi]
+        ips = [NO_REPLY] * int(hops.max())
+        for hop, ip in zip(hops, rows["ip"][lo:hi]):
+            ips[hop - 1] = str(ip)
+
+        key = fingerprint(ips)
+        route = state["routes"].setdefault(key, {"hops": trim(ips), "first": start_time, "last": start_time,
+                                                 "runs": 0})
+        route["last"] = start_time
+        route["runs"] += 1
+        if state["last_route"] is not None:
+            diff = route_diff(state["routes"][state["last_route"]]["hops"], ips)
+            if diff:
+                changes.append({"time": start_time, "from": state["last_route"], "to": key, "hops": diff})
+        state["last_route"] = key
+
+        for i in range(lo, hi):
+            ip = str(rows["ip"][i])
+            if ip == NO_REPLY:
+                continue
+            hop = int(rows["hop"][i])
+            for metric in METRICS:
+                value = float(rows[metric][i])
+                if np.isnan(value):
+                    continue
+                baseline = state["baselines"].setdefault(f"{hop}|{ip}|{metric}", [0, 0.0, 0.0])
+                mean = baseline[1]
+                z = update_baseline(baseline, value, alpha)
+                if z is not None and z > z_threshold and value - mean >= min_delta[metric]:
+                    anomalies.append({"time": start_time, "hop": hop, "ip": ip, "metric": metric,
+                                      "value": value, "baseline": mean, "z": min(float(z), 1e9)})
+        state["last_time"] = start_time
+
+    state["changes"] += changes
+    state["anomalies"] += anomalies
+    return changes, anomalies
+
+
+def route_at(state, when):
+    """
+    Fingerabdruck der Route des letzten Laufs bis `when` (Unix-Zeit), aus
+    den Routenwechseln rekonstruiert.
+    """
+    current = None
+    first = min(state["routes"].items(), key=lambda item: item[1]["first"], default=(None, None))[0]
+    for change in state["changes"]:
+        if change["time"] > when:
+            break
+        current = change["to"]
+    return current or first
+
+
+def _time(value):
+    return datetime.datetime.fromtimestamp(int(value)).strftime("%Y-%m-%d %H:%M")
+
+
+def print_change(change):
+    print(f"{_time(change['time'])}  Routenwechsel {change['from']} -> {change['to']}")
+    for hop, old, new in change["hops"]:
+        print(f"    Hop {hop:2d}: {old} -> {new}")
+
+
+def print_anomaly(anomaly):
+    print(f"{_time(anomaly['time'])}  Hop {anomaly['hop']:2d} {anomaly['ip']:<40} {anomaly['metric']:<5} "
+          f"{anomaly['value']:8.2f} ms (Basis {anomaly['baseline']:.2f}, z={anomaly['z']:.1f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Routenwechsel und Ausreißer pro Hop in der MTR-Historie.")
+    parser.add_argument("--index", default=mtr_ingest.DEFAULT_INDEX, help="Index von mtr_ingest.py")
+    parser.add_argument("--state", default=DEFAULT_STATE, help=f"Zustandsdatei (Standard: {DEFAULT_STATE})")
+    parser.add_argument("--update", nargs="*", default=None,
+                        help="vorher den Index aus diesen Dateien aktualisieren (ohne Angabe: MTR-Verzeichnis)")
+    parser.add_argument("--rebuild", action="store_true", help="Zustand verwerfen und alle Läufe neu auswerten")
+    parser.add_argument("--at", default=None, help='Route zu dieser Zeit zeigen, z.B. "2024-11-09 14:00"')
+    parser.add_argument("--window", type=float, default=12.0,
+                        help="mit --at: Routenwechsel und Auffälligkeiten in +- so vielen Stunden (Standard: 12)")
+    parser.add_argument("--span", type=int, default=SPAN, help=f"Läufe im gleitenden Mittel (Standard: {SPAN})")
+    parser.add_argument("-z", type=float, default=Z_THRESHOLD, help=f"Schwelle in Standardabweichungen (Standard: {Z_THRESHOLD})")
+    args = parser.parse_args()
+
+    if args.update is not None:
+        mtr_ingest.update(args.update or [os.path.dirname(os.path.abspath(__file__))], args.index)
+    index = mtr_ingest.load_index(args.index)
+    state = empty_state() if args.rebuild else load_state(args.state)
+    late = late_runs(index, state)
+    if late:
+        print(f"{late} Läufe vor dem letzten ausgewerteten Lauf nachgetragen, werte alle Läufe neu aus")
+
+    changes, anomalies = analyze(index, state, args.span, args.z)
+    save_state(state, args.state)
+    print(f"{len(changes)} neue Routenwechsel, {len(anomalies)} neue Auffälligkeiten, "
+          f"{len(state['routes'])} verschiedene Routen")
+    for change in changes:
+        print_change(change)
+    for anomaly in anomalies:
+        print_anomaly(anomaly)
+
+    if args.at:
+        when = datetime.datetime.fromisoformat(args.at).timestamp()
+        key = route_at(state, when)
+        if key is None:
+            print("Keine MTR-Läufe vorhanden.")
+            return
+        print(f"\nRoute um {args.at}: {key} ({state['routes'][key]['runs']} Läufe)")
+        for hop, ip in enumerate(state["routes"][key]["hops"], 1):
+            print(f"    {hop:2d}. {ip}")
+        window = args.window * 3600
+        near = [change for change in state["changes"] if abs(change["time"] - when) <= window]
+        print(f"Routenwechsel in +-{args.window:g} h: {len(near)}")
+        for change in near:
+            print_change(change)
+        for anomaly in state["anomalies"]:
+            if abs(anomaly["time"] - when) <= window:
+                print_anomaly(anomaly)
+
+
+if __name__ == "__main__":
+    main()
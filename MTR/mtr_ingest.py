@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Einlesen aller MTR-Ergebnisse in eine gemeinsame Tabelle pro Hop.
+
+Gelesen werden alle Varianten, die mtr_script.sh und mtr_to_csv.sh
+hinterlassen haben:
+
+- mtr --csv (14 Spalten, Kopfzeile "Mtr_Version,Start_Time,..." pro Lauf
+  wiederholt), z.B. mtr_resultsNov.csv, mtr_temp_*.csv,
+- die 8-Spalten-Zeilen aus dem awk in mtr_to_csv.sh (Status durch die
+  Anzahl Pings ersetzt, ohne Latenzen) und Zeilen im Format der
+  Kopfzeile "Host,Loss%,Snt,Last,Avg,Best,Wrst,StDev",
+- mtr --json (report.hubs), z.B. mtr_results_day_1.json.
+
+Jede Zeile wird ein Eintrag (start_time, hop, ip) mit Loss%, Snt, Drop
+und Last/Avg/Best/Wrst/StDev. Der Index liegt spaltenweise in einer
+.npz-Datei, sortiert nach (hop, start_time); hop_offsets[h] zeigt auf
+die erste Zeile von Hop h, so dass die Zeitreihe eines Hops ohne
+erneutes Parsen ein Slice ist.
+
+Pro Quelldatei werden Größe, mtime und die Anzahl gelesener Bytes
+gemerkt: unveränderte Dateien werden übersprungen, gewachsene CSVs (mtr
+hängt an) nur ab der alten Position gelesen.
+
+Usage: python3 mtr_ingest.py [Dateien/Verzeichnisse...] [-o mtr_index.npz] [--hop N] [--summary]
+"""
+
+import os
+import glob
+import json
+import zlib
+import argparse
+import datetime
+
+import numpy as np
+
+DEFAULT_INDEX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mtr_index.npz")
+
+# Spalten der Tabelle und ihre Typen
+COLUMNS = {
+    "start_time": np.int64,   # Unix-Zeit des Laufs (Start_Time, sonst mtime der Datei)
+    "hop": np.int32,
+    "ip": "U64",              # Host/IP wie von mtr ausgegeben, "???" ohne Antwort
+    "target": "U64",
+    "loss_pct": np.float64,
+    "sent": np.int64,
+    "drop": np.float64,       # NaN, wenn das Format keine Drop-Spalte hat
+    "last": np.float64,
+    "avg": np.float64,
+    "best": np.float64,
+    "wrst": np.float64,
+    "stdev": np.float64,
+    "source": np.int32,       # Index in sources
+}
+
+# Anzahl Bytes vor der gelesenen Position, über die eine Prüfsumme gemerkt wird
+TAIL_BYTES = 64
+
+
+def _number(value):
+    if not isinstance(value, str):
+        return float(value)
+    value = value.strip().rstrip("%")
+    return float(value) if value else np.nan
+
+
+def _row(start_time, hop, ip, target, loss, sent, drop=np.nan, latencies=(np.nan,) * 5):
+    return (int(start_time), int(hop), ip.strip(), target.strip(), _number(loss), int(_number(sent)),
+            _number(drop), *(_number(value) for value in latencies))
+
+
+def parse_csv_lines(lines, fallback_time):
+    """
+    Zeilen (str) einer MTR-CSV in Tupel in der Reihenfolge von COLUMNS
+    (ohne source). `fallback_time` ist die Startzeit für Zeilen ohne
+    Start_Time.
+    """
+    rows = []
+    hop = 0
+    for line in lines:
+        fields = line.rstrip("\r\n").split(",")
+        if not fields[0] or fields[0] in ("Mtr_Version", "Host"):
+            # Kopfzeile: ein neuer Block beginnt
+            hop = 0
+            continue
+        if fields[0].startswith("MTR.") and len(fields) >= 13:
+            # mtr --csv: Mtr_Version,Start_Time,Status,Host,Hop,Ip,Loss%,Snt,Drop,Last,Avg,Best,Wrst,StDev
+            fields += [""] * (14 - len(fields))
+            rows.append(_row(fields[1], fields[4], fields[5], fields[3], fields[6], fields[7], fields[8],
+                             fields[9:14]))
+        elif fields[0].startswith("MTR.") and len(fields) == 8:
+            # awk aus mtr_to_csv.sh: Status durch Anzahl Pings ersetzt, Latenzen abgeschnitten
+            rows.append(_row(fields[1], fields[4], fields[5], fields[3], fields[6], fields[7]))
+        elif len(fields) == 8:
+            # Host,Loss%,Snt,Last,Avg,Best,Wrst,StDev: Hop ist die Position im Block
+            hop += 1
+            rows.append(_row(fallback_time, hop, fields[0], "", fields[1], fields[2], latencies=fields[3:8]))
+    return rows
+
+
+def parse_json(path):
+    """
+    Zeilen eines mtr --json-Reports (ohne Startzeit, dafür die mtime).
+    """
+    with open(path) as f:
+        text = f.read()
+    if not text.strip():
+        return []
+    data = json.loads(text)
+    if not isinstance(data, dict) or "report" not in data:
+        # z.B. der Zustand von mtr_analysis.py im selben Verzeichnis
+        return []
+    report = data["report"]
+    start_time = int(os.path.getmtime(path))
+    target = report.get("mtr", {}).get("dst", "")
+    return [_row(start_time, hub["count"], hub["host"], target, hub["Loss%"], hub["Snt"], hub.get("Drop", np.nan),
+                 [hub.get(name, np.nan) for name in ("Last", "Avg", "Best", "Wrst", "StDev")])
+            for hub in report.get("hubs", [])]
+
+
+def _tail_crc(f, offset):
+    f.seek(max(offset - TAIL_BYTES, 0))
+    return zlib.crc32(f.read(min(offset, TAIL_BYTES)))
+
+
+def read_source(path, offset=0):
+    """
+    (rows, neue Position, Prüfsumme vor der Position) einer Datei ab
+    Byte `offset`. Bei CSVs werden nur vollständige Zeilen gelesen, eine
+    gerade geschriebene halbe Zeile kommt beim nächsten Mal dran.
+    """
+    if path.endswith(".json"):
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            return parse_json(path), size, _tail_crc(f, size)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        lines = data[:end].decode("utf-8", errors="replace").splitlines()
+        rows = parse_csv_lines(lines, int(os.path.getmtime(path)))
+        return rows, offset + end, _tail_crc(f, offset + end)
+
+
+def _table(rows, source):
+    names = [name for name in COLUMNS if name != "source"]
+    columns = list(zip(*rows)) if rows else [()] * len(names)
+    table = {name: np.array(values, dtype=COLUMNS[name]) for name, values in zip(names, columns)}
+    table["source"] = np.full(len(rows), source, dtype=np.int32)
+    return table
+
+
+def empty_index():
+    index = {name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+    index.update(source_path=np.zeros(0, dtype="U512"), source_size=np.zeros(0, dtype=np.int64),
+                 source_mtime_ns=np.zeros(0, dtype=np.int64), source_offset=np.zeros(0, dtype=np.int64),
+                 source_crc=np.zeros(0, dtype=np.int64), hop_offsets=np.zeros(1, dtype=np.int64))
+    return index
+
+
+def load_index(path=DEFAULT_INDEX):
+    if not os.path.exists(path):
+        return empty_index()
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def save_index(index, path=DEFAULT_INDEX):
+    # Erst in eine temporäre Datei, damit ein Abbruch den alten Index nicht zerstört
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **index)
+    os.replace(tmp, path)
+
+
+def finish(table):
+    """
+    Doppelte Einträge (derselbe Lauf aus mehreren Dateien, z.B.
+    mtr_temp_1.csv und die Ergebnisdatei) entfernen, nach (hop,
+    start_time, ip) sortieren und hop_offsets setzen.
+    """
+    n = len(table["hop"])
+    # Pro Schlüssel die Zeile mit den meisten Pings, bei Gleichstand die spätere
+    order = np.lexsort((np.arange(n), table["sent"], table["ip"], table["start_time"], table["hop"]))
+    keys = [table[name][order] for name in ("hop", "start_time", "ip")]
+    last = np.ones(n, dtype=bool)
+    if n:
+        last[:-1] = np.any([key[1:] != key[:-1] for key in keys], axis=0)
+    keep = order[last]
+    table = {name: values[keep] for name, values in table.items()}
+    max_hop = int(table["hop"].max()) if len(keep) else -1
+    table["hop_offsets"] = np.searchsorted(table["hop"], np.arange(max_hop + 2)).astype(np.int64)
+    return table
+
+
+def expand(inputs):
+    """
+    Dateien aus Pfaden, Verzeichnissen (*.csv, *.json) und Globs.
+    """
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files += sorted(glob.glob(os.path.join(item, "*.csv")) + glob.glob(os.path.join(item, "*.json")))
+        elif os.path.exists(item):
+            files.append(item)
+        else:
+            files += sorted(glob.glob(item))
+    return [os.path.abspath(path) for path in dict.fromkeys(files)]
+
+
+def update(inputs, index_path=DEFAULT_INDEX):
+    """
+    Bringt den Index auf den Stand der Dateien in `inputs`. Gibt (index,
+    Anzahl neu gelesener Zeilen, Anzahl übersprungener Dateien) zurück.
+    """
+    old = load_index(index_path)
+    known = {str(path): i for i, path in enumerate(old["source_path"])}
+    sources = {name: list(old[name]) for name in
+               ("source_path", "source_size", "source_mtime_ns", "source_offset", "source_crc")}
+    keep = np.ones(len(old["hop"]), dtype=bool)
+    parts = []
+    new_rows = skipped = 0
+
+    for path in expand(inputs):
+        stat = os.stat(path)
+        i = known.get(path)
+        offset = 0
+        if i is not None:
+            if stat.st_size == sources["source_size"][i] and stat.st_mtime_ns == sources["source_mtime_ns"][i]:
+                skipped += 1
+                continue
+            offset = int(sources["source_offset"][i])
+            with open(path, "rb") as f:
+                appended = (not path.endswith(".json") and stat.st_size >= offset
+                            and _tail_crc(f, offset) == sources["source_crc"][i])
+            if not appended:
+                # Datei neu geschrieben: alte Zeilen verwerfen
+                keep &= old["source"] != i
+                offset = 0
+        else:
+            i = len(sources["source_path"])
+            for name in sources:
+                sources[name].append(0)
+            sources["source_path"][i] = path
+        rows, offset, crc = read_source(path, offset)
+        sources["source_size"][i] = stat.st_size
+        sources["source_mtime_ns"][i] = stat.st_mtime_ns
+        sources["source_offset"][i] = offset
+        sources["source_crc"][i] = crc
+        parts.append(_table(rows, i))
+        new_rows += len(rows)
+
+    old_rows = {name: old[name][keep] for name in COLUMNS}
+    table = {name: np.concatenate([old_rows[name]] + [part[name] for part in parts]).astype(dtype)
+             for name, dtype in COLUMNS.items()}
+    index = finish(table)
+    index["source_path"] = np.array(sources["source_path"], dtype="U512")
+    for name in ("source_size", "source_mtime_ns", "source_offset", "source_crc"):
+        index[name] = np.array(sources[name], dtype=np.int64)
+    save_index(index, index_path)
+    return index, new_rows, skipped
+
+
+def hop_series(index, hop, start=None, end=None):
+    """
+    Zeilen eines Hops, nach Startzeit sortiert, optional nur
+    start <= start_time < end.
+    """
+    offsets = index["hop_offsets"]
+    if hop < 0 or hop + 1 >= len(offsets):
+        lo = hi = 0
+    else:
+        lo, hi = int(offsets[hop]), int(offsets[hop + 1])
+    times = index["start_time"][lo:hi]
+    if start is not None:
+        lo += int(np.searchsorted(times, start))
+    if end is not None:
+        hi = lo + int(np.searchsorted(index["start_time"][lo:hi], end))
+    return {name: index[name][lo:hi] for name in COLUMNS}
+
+
+def hop_summary(index):
+    """
+    Pro Hop: Anzahl Läufe, mittlerer Verlust und mittlere/maximale Avg-
+    Latenz sowie die häufigste IP.
+    """
+    summary = []
+    for hop in range(len(index["hop_offsets"]) - 1):
+        rows = hop_series(index, hop)
+        if not len(rows["hop"]):
+            continue
+        ips, counts = np.unique(rows["ip"], return_counts=True)
+        avg = rows["avg"][~np.isnan(rows["avg"])]
+        wrst = rows["wrst"][~np.isnan(rows["wrst"])]
+        summary.append((hop, len(rows["hop"]), float(np.mean(rows["loss_pct"])),
+                        float(avg.mean()) if len(avg) else np.nan, float(wrst.max()) if len(wrst) else np.nan,
+                        str(ips[np.argmax(counts)])))
+    return summary
+
+
+def _time(value):
+    return datetime.datetime.fromtimestamp(int(value)).strftime("%Y-%m-%d %H:%M")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MTR-Ergebnisse (CSV/JSON) in einen Index pro Hop einlesen.")
+    parser.add_argument("inputs", nargs="*", default=[os.path.dirname(os.path.abspath(__file__))],
+                        help="Dateien, Verzeichnisse oder Globs (Standard: das MTR-Verzeichnis)")
+    parser.add_argument("-o", "--index", default=DEFAULT_INDEX, help=f"Index-Datei (Standard: {DEFAULT_INDEX})")
+    parser.add_argument("--hop", type=int, default=None, help="Zeitreihe dieses Hops ausgeben")
+    parser.add_argument("--summary", action="store_true", help="Übersicht pro Hop ausgeben")
+    args = parser.parse_args()
+
+    index, new_rows, skipped = update(args.inputs, args.index)
+    runs = len(np.unique(index["start_time"]))
+    print(f"{len(index['hop'])} Zeilen aus {len(index['source_path'])} Dateien, {runs} Läufe "
+          f"({new_rows} neu gelesen, {skipped} Dateien unverändert) -> {args.index}")
+
+    if args.summary:
+        print(f"{'Hop':>3}  {'Läufe':>5}  {'Loss%':>6}  {'Avg':>8}  {'Wrst':>8}  IP")
+        for hop, count, loss, avg, wrst, ip in hop_summary(index):
+            print(f"{hop:3d}  {count:5d}  {loss:6.2f}  {avg:8.2f}  {wrst:8.2f}  {ip}")
+    if args.hop is not None:
+        rows = hop_series(index, args.hop)
+        for i in range(len(rows["hop"])):
+            print(f"{_time(rows['start_time'][i])}  {rows['ip'][i]:<40} Loss {rows['loss_pct'][i]:6.2f}%  "
+                  f"Snt {rows['sent'][i]:6d}  Avg {rows['avg'][i]:7.2f}  Wrst {rows['wrst'][i]:7.2f}  "
+                  f"StDev {rows['stdev'][i]:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
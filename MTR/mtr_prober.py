@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+MTR-Messung als ein langlaufender Prozess statt 864 mtr-Aufrufen pro Tag.
+
+mtr_to_csv.sh startet alle 100 Pings ein neues `mtr --report`, mit
+DNS-Auflösung, Routenaufbau und Prozessstart bei jedem Aufruf. Hier
+bleibt der Zustand (Zieladresse, Hop-Anzahl, Namen der Hops) über die
+ganze Messung erhalten:
+
+- pro Zyklus geht an jeden TTL 1..n ein ICMP-Echo, alle gleichzeitig;
+  Antworten (Time Exceeded bzw. Echo Reply vom Ziel) werden über die
+  Sequenznummer dem TTL zugeordnet,
+- pro Hop laufen Loss%, Last, Avg, Best, Wrst und StDev inkrementell mit,
+- alle `report_cycles` Zyklen wird ein Schnappschuss der letzten Zyklen
+  im Format von `mtr --csv` an die Ausgabedatei angehängt (nie
+  überschrieben) und die Statistik neu begonnen. Start_Time ist der
+  Beginn des Abschnitts, so dass mtr_ingest.py daraus eine Zeitreihe pro
+  Hop macht.
+
+Das Senden übernimmt ein austauschbares Backend: IcmpBackend braucht
+Raw-Sockets (root bzw. CAP_NET_RAW), SimulatedBackend spielt einen
+festen Pfad mit Verzögerung, Jitter und Verlust nach (zum Ausprobieren
+ohne Netz, z.B. `--simulate 5`).
+
+Usage: sudo python3 mtr_prober.py reuna.cl [--count 86400] [--report-cycles 100] [-o mtr_results.csv]
+"""
+
+import os
+import sys
+import time
+import math
+import random
+import select
+import socket
+import struct
+import argparse
+import datetime
+
+VERSION = "MTR.prober"
+CSV_HEADER = "Mtr_Version,Start_Time,Status,Host,Hop,Ip,Loss%,Snt, ,Last,Avg,Best,Wrst,StDev,"
+
+ICMP_ECHO_REPLY = 0
+ICMP_UNREACHABLE = 3
+ICMP_ECHO_REQUEST = 8
+ICMP_TIME_EXCEEDED = 11
+
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def echo_request(ident, seq, payload_size=56):
+    payload = bytes(payload_size)
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, _checksum(header + payload), ident, seq) + payload
+
+
+def parse_reply(data):
+    """
+    (ICMP-Typ, ident, seq) des Echos, auf das sich ein empfangenes IPv4-
+    Paket bezieht, oder None. Bei Time Exceeded / Unreachable steht das
+    ursprüngliche Echo im ICMP-Inhalt.
+    """
+    if len(data) < 28:
+        return None
+    icmp = (data[0] & 0x0F) * 4
+    kind = data[icmp]
+    if kind == ICMP_ECHO_REPLY:
+        ident, seq = struct.unpack_from("!HH", data, icmp + 4)
+        return kind, ident, seq
+    if kind in (ICMP_TIME_EXCEEDED, ICMP_UNREACHABLE) and len(data) >= icmp + 8 + 28:
+        inner = icmp + 8
+        inner_icmp = inner + (data[inner] & 0x0F) * 4
+        if len(data) < inner_icmp + 8 or data[inner_icmp] != ICMP_ECHO_REQUEST:
+            return None
+        ident, seq = struct.unpack_from("!HH", data, inner_icmp + 4)
+        return kind, ident, seq
+    return None
+
+
+class IcmpBackend:
+    """
+    ICMP-Echo mit gesetztem TTL über einen Raw-Socket (IPv4).
+    """
+
+    def __init__(self, target_ip, timeout=1.0, payload_size=56):
+        self.target_ip = target_ip
+        self.timeout = timeout
+        self.payload_size = payload_size
+        self.ident = os.getpid() & 0xFFFF
+        self.seq = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+
+    def cycle(self, hops):
+        """
+        Ein Echo an jeden TTL 1..hops. Liste von (ttl, Antwortender oder
+        None, RTT in ms oder None, Ziel erreicht).
+        """
+        sent = {}
+        for ttl in range(1, hops + 1):
+            self.seq = (self.seq + 1) & 0xFFFF
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_TTL, ttl)
+            sent[self.seq] = (ttl, time.monotonic())
+            self.sock.sendto(echo_request(self.ident, self.seq, self.payload_size), (self.target_ip, 0))
+
+        replies = {}
+        deadline = time.monotonic() + self.timeout
+        while len(replies) < len(sent):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self.sock], [], [], remaining)[0]:
+                break
+            data, (address, _) = self.sock.recvfrom(65535)
+            now = time.monotonic()
+            reply = parse_reply(data)
+            if reply is None or reply[1] != self.ident or reply[2] not in sent or reply[2] in replies:
+                continue
+            kind, _, seq = reply
+            replies[seq] = (address, (now - sent[seq][1]) * 1000.0, kind == ICMP_ECHO_REPLY)
+        return [(ttl, *replies.get(seq, (None, None, False))) for seq, (ttl, _) in sent.items()]
+
+    def close(self):
+        self.sock.close()
+
+
+class SimulatedBackend:
+    """
+    Fester Pfad aus (ip, RTT in ms, Jitter in ms, Verlust 0..1) pro Hop;
+    der letzte Hop ist das Ziel. Wartet nicht wirklich.
+    """
+
+    def __init__(self, path, seed=None):
+        self.path = path
+        self.random = random.Random(seed)
+
+    def cycle(self, hops):
+        results = []
+        for ttl in range(1, min(hops, len(self.path)) + 1):
+            ip, rtt, jitter, loss = self.path[ttl - 1]
+            if self.random.random() < loss:
+                results.append((ttl, None, None, False))
+            else:
+                results.append((ttl, ip, max(rtt + self.random.gauss(0.0, jitter), 0.0), ttl == len(self.path)))
+        return results
+
+    def close(self):
+        pass
+
+
+def simulated_path(hops, last_rtt=195.0, seed=None):
+    """
+    Ein Pfad mit `hops` Hops aus 127.0.0.x, RTT steigt bis `last_rtt`.
+    """
+    rng = random.Random(seed)
+    return [(f"127.0.0.{ttl}", last_rtt * ttl / hops, 0.5 + 0.02 * last_rtt * rng.random(), 0.01 * rng.random())
+            for ttl in range(1, hops + 1)]
+
+
+class HopStats:
+    """
+    Laufende Statistik eines Hops wie in mtr --report (Welford für StDev).
+    """
+
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        self.last = self.best = self.worst = math.nan
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ip = None
+
+    def add(self, ip, rtt):
+        self.sent += 1
+        if rtt is None:
+            return
+        if self.ip is None:
+            self.ip = ip
+        self.received += 1
+        delta = rtt - self.mean
+        self.mean += delta / self.received
+        self.m2 += delta * (rtt - self.mean)
+        self.last = rtt
+        self.best = rtt if math.isnan(self.best) else min(self.best, rtt)
+        self.worst = rtt if math.isnan(self.worst) else max(self.worst, rtt)
+
+    def row(self):
+        """
+        (Loss%, Snt, Drop, Last, Avg, Best, Wrst, StDev), ohne Antwort 0 wie bei mtr.
+        """
+        drop = self.sent - self.received
+        loss = 100.0 * drop / self.sent if self.sent else 0.0
+        if not self.received:
+            return loss, self.sent, drop, 0.0, 0.0, 0.0, 0.0, 0.0
+        stdev = math.sqrt(self.m2 / self.received)
+        return loss, self.sent, drop, self.last, self.mean, self.best, self.worst, stdev
+
+
+class Prober:
+    """
+    Zustand einer Messung: Ziel, Anzahl Hops (ab dem ersten TTL, an dem
+    das Ziel antwortet, wird nicht weiter gesucht), Namen der Hops und
+    die Statistik des laufenden Abschnitts.
+    """
+
+    def __init__(self, backend, target, max_hops=30, resolve=True):
+        self.backend = backend
+        self.target = target
+        self.hops = max_hops
+        self.resolve = resolve
+        self.names = {}
+        self.start_time = int(time.time())
+        self.stats = {}
+
+    def name(self, ip):
+        if ip is None:
+            return "???"
+        if not self.resolve:
+            return ip
+        if ip not in self.names:
+            # Jede Adresse wird nur einmal aufgelöst
+            try:
+                self.names[ip] = socket.gethostbyaddr(ip)[0]
+            except (OSError, UnicodeError):
+                self.names[ip] = ip
+        return self.names[ip]
+
+    def cycle(self):
+        for ttl, ip, rtt, reached in sorted(self.backend.cycle(self.hops)):
+            if ttl > self.hops:
+                continue
+            self.stats.setdefault(ttl, HopStats()).add(ip, rtt)
+            if reached and ttl < self.hops:
+                # Hinter dem Ziel gibt es nichts mehr zu messen
+                self.hops = ttl
+                for extra in [hop for hop in self.stats if hop > ttl]:
+                    del self.stats[extra]
+
+    def snapshot(self):
+        """
+        Zeilen des laufenden Abschnitts im Format von mtr --csv; danach
+        beginnt ein neuer Abschnitt.
+        """
+        lines = []
+        for hop in sorted(self.stats):
+            loss, sent, drop, last, avg, best, worst, stdev = self.stats[hop].row()
+            lines.append(f"{VERSION},{self.start_time},OK,{self.target},{hop},{self.name(self.stats[hop].ip)},"
+                         f"{loss:.2f},{sent},{drop},{last:.2f},{avg:.2f},{best:.2f},{worst:.2f},{stdev:.2f}")
+        self.stats = {}
+        # Jeder Abschnitt bekommt eine eigene Start_Time (Schlüssel in mtr_ingest.py)
+        self.start_time = max(int(time.time()), self.start_time + 1)
+        return lines
+
+
+def run(prober, output, count=86400, report_cycles=100, interval=1.0, quiet=False):
+    """
+    `count` Zyklen im Abstand von `interval` Sekunden (fester Takt auf
+    der monotonen Uhr, ein langsamer Zyklus verschiebt die folgenden
+    nicht), alle `report_cycles` Zyklen ein Schnappschuss an `output`.
+    """
+    with open(output, "a") as f:
+        # Eine Kopfzeile pro Messung, wie bei mtr_script.sh
+        f.write(CSV_HEADER + "\n")
+        f.flush()
+        start = time.monotonic()
+        for i in range(count):
+            prober.cycle()
+            done = i + 1
+            if done % report_cycles == 0 or done == count:
+                lines = prober.snapshot()
+                f.write("".join(line + "\n" for line in lines))
+                f.flush()
+                os.fsync(f.fileno())
+                if not quiet:
+                    worst = max(lines, key=lambda line: float(line.split(",")[6]), default="")
+                    print(f"{done}/{count} Zyklen, {len(lines)} Hops, höchster Verlust: {worst}")
+            if interval and done < count:
+                delay = start + done * interval - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MTR-ähnliche Messung in einem Prozess, Schnappschüsse als mtr --csv.")
+    parser.add_argument("target", help="Zielhost, z.B. reuna.cl")
+    parser.add_argument("-o", "--output", default="mtr_results.csv", help="CSV, an die angehängt wird")
+    parser.add_argument("--count", type=int, default=86400, help="Anzahl Zyklen (Standard: 86400, 24 h bei 1 s)")
+    parser.add_argument("--report-cycles", type=int, default=100, help="Zyklen pro Schnappschuss (Standard: 100)")
+    parser.add_argument("--interval", type=float, default=1.0, help="Sekunden zwischen zwei Zyklen (Standard: 1)")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Wartezeit auf Antworten pro Zyklus (Standard: 1 s)")
+    parser.add_argument("--max-hops", type=int, default=30)
+    parser.add_argument("-n", "--no-dns", action="store_true", help="Hops nicht per DNS auflösen")
+    parser.add_argument("--simulate", type=int, default=None, metavar="HOPS",
+                        help="simulierten Pfad mit HOPS Hops statt Raw-Socket verwenden (ohne Netz, ohne root)")
+    parser.add_argument("--seed", type=int, default=None, help="Zufallszahlen der Simulation")
+    args = parser.parse_args()
+
+    if args.simulate:
+        backend = SimulatedBackend(simulated_path(args.simulate, seed=args.seed), seed=args.seed)
+    else:
+        # Das Ziel wird einmal aufgelöst, nicht bei jedem Abschnitt
+        target_ip = socket.gethostbyname(args.target)
+        try:
+            backend = IcmpBackend(target_ip, args.timeout)
+        except PermissionError:
+            print("Raw-Socket nicht erlaubt: als root starten (oder --simulate zum Ausprobieren).")
+            sys.exit(1)
+
+    prober = Prober(backend, args.target, args.max_hops, resolve=not args.no_dns and not args.simulate)
+    print(f"Starte Messung zu {args.target}: {args.count} Zyklen, Schnappschuss alle {args.report_cycles} "
+          f"-> {args.output} ({datetime.datetime.now():%Y-%m-%d %H:%M:%S})")
+    try:
+        run(prober, args.output, args.count, args.report_cycles, args.interval)
+    except KeyboardInterrupt:
+        print("Abgebrochen.")
+    finally:
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,16 @@
+import os
+import sys
+import argparse
 import matplotlib.pyplot as plt
 import numpy as np
 import matplotlib.patches as mpatches
 
+# Shared code lives in Tests-Throughput/throughput_tools
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+sys.path.insert(0, ROOT)
+
+from throughput_tools.aggregate import block_table, pivot
+
 # Load condition labels (in order: low, moderate, substantial, high)
 load_labels = ["Low (1-1-1)", "Moderate (3-2-2)", "Substantial (4-5-6)", "High (5-10-15)"]
 x = np.arange(len(load_labels))  # positions for the 4 load conditions
@@ -13,28 +22,23 @@ segment_colors = ["#b3cde3", "#ccebc5", "#decbe4", "#fed9a6"]
 
 # --- Data for Throughput (MB) ---
 # Each row is a load condition; each column is a time interval segment.
-# (Values are averages over Test 1, Test 2, and Test 3.)
-
-# CUBIC data
-cubic_low = [38040.3, 25973, 14488.6, 9365.7]
-cubic_mod = [37979.60, 14856.97, 1975.67, 286.00]
-cubic_sub = [40686.23, 6459.60, 278.67, 142.00]
-cubic_high = [40528.43, 4445.67, 89.33, 141.00]
-cubic_data = np.array([cubic_low, cubic_mod, cubic_sub, cubic_high])
+# (Values are averages over all tests of a load, computed from the main_*.log files.)
+# Read from the run store (throughput-store/); --update-store re-reads new
+# or changed runs into it first.
+parser = argparse.ArgumentParser(description="Stacked bars of the main flow bytes per 150 s block.")
+parser.add_argument("--update-store", action="store_true", help="bring the run store up to date first")
+args = parser.parse_args()
+loads = ["1-1-1", "3-2-2", "4-5-6", "5-10-15"]
+blocks = block_table(ROOT, update=args.update_store)
 
-# H-TCP data
-httcp_low = [31351.59, 17259.70, 11107.10, 4109.03]
-httcp_mod = [30765.28, 8219.91, 642.33, 267.17]
-httcp_sub = [23843.84, 2984.00, 210.33, 169.67]
-httcp_high = [23077.46, 2754.67, 165.00, 89.33]
-httcp_data = np.array([httcp_low, httcp_mod, httcp_sub, httcp_high])
+def block_data(cca):
+    mean, _ = pivot(blocks[blocks["cca"] == cca], "scenario", "block", rows=loads,
+                    cols=range(len(time_intervals)), scale=1024**2)
+    return mean
 
-# BBRv1 data
-bbrv1_low = [45862.38, 46222.33, 46051.79, 45684.47]
-bbrv1_mod = [45948.48, 46061.67, 45683.33, 45431.00]
-bbrv1_sub = [45881.39, 45799.93, 45143.18, 44213.00]
-bbrv1_high = [45896.36, 45673.93, 44421.67, 43054.33]
-bbrv1_data = np.array([bbrv1_low, bbrv1_mod, bbrv1_sub, bbrv1_high])
+cubic_data = block_data("cubic")
+httcp_data = block_data("htcp")
+bbrv1_data = block_data("bbr")
 
 
 title_fontsize = 48        
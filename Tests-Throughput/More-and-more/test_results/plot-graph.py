@@ -1,9 +1,18 @@
 #!/usr/bin/env python3
+import os
 import sys
 import matplotlib.pyplot as plt
 import re
 from datetime import datetime
 
+# Shared code lives in Tests-Throughput/throughput_tools
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from throughput_tools.iperf_log import load_log, aggregate_series
+from throughput_tools.decimate import plot_series
+from throughput_tools.cumulative import BG_START_TIMES, cumulative_transfer, phase_edges
+from throughput_tools.intervals import format_bins
+
 
 fontsize=15
 titlesize=20
@@ -21,60 +30,38 @@ if log_date_time_str:
 else:
     log_date_time_str = datetime.now().strftime('%Y%m%d_%H%M%S')
 
-# Initialize lists for timestamps and throughput values (all data, including zeros)
-timestamps = []
-throughputs = []
-
-# Updated regex:
-#   \[\s*\d+\]                 : Matches the id part (e.g., "[  5]")
-#   \s+\d+\.\d+-(\d+\.\d+)\s+sec : Captures the ending time (group 1) from "0.00-1.00 sec"
-#   \s+\S+\s+\S+\s+             : Skips over the transfer amount (e.g., "1.62 MBytes")
-#   ([\d\.]+)\s+((?:[GM])?bits/sec) : Captures the bitrate value (group 2) and its unit (group 3)
-pattern = re.compile(
-    r"\[\s*\d+\]\s+\d+\.\d+-(\d+\.\d+)\s+sec\s+\S+\s+\S+\s+([\d\.]+)\s+((?:[GM])?bits/sec)"
-)
-
-with open(main_log_file, "r") as file:
-    for line in file:
-        match = pattern.search(line)
-        if match:
-            end_time = float(match.group(1))
-            bitrate = float(match.group(2))
-            unit = match.group(3)
-            # Convert to Mbits/sec:
-            if unit.startswith("G"):
-                bitrate *= 1000
-            elif unit.startswith("bits"):
-                bitrate /= 1e6
-            timestamps.append(end_time)
-            throughputs.append(bitrate)
-        else:
-            # Uncomment the next line for debugging unmatched lines
-            # print("No match for line:", line.strip())
-            pass
+# Interval rows of the main flow (text or iperf3 --json log); with parallel
+# streams (-P) the [SUM] rows.
+# The sender/receiver summary rows at the end are not part of the series.
+series = aggregate_series(load_log(main_log_file))
+throughputs = series["bits_per_second"] / 1e6  # Mbits/sec
 
-print("Timestamps:", timestamps)
-print("Throughputs:", throughputs)
+# Cumulative bytes, non-zero mask, bytes per BG phase and the trapezoid
+# integral of the throughput (accumulated Mbit, including zeros) in one pass
+edges = phase_edges(series["end"].max() if len(series["end"]) else 0.0)
+transfer = cumulative_transfer(series["start"], series["end"], series["bytes"], edges, throughputs)
+# transfer is in start order, so the rates are taken from it as well
+timestamps = transfer["time"]
+throughputs = transfer["rate"]
+accumulated = transfer["accumulated"]
 
-# Prepare filtered data for the instantaneous throughput plot (excluding zero values)
-nonzero_timestamps = [t for t, th in zip(timestamps, throughputs) if th > 0]
-nonzero_throughputs = [th for t, th in zip(timestamps, throughputs) if th > 0]
+print("Timestamps:", timestamps.tolist())
+print("Throughputs:", throughputs.tolist())
+for line in format_bins(transfer["phase_bytes"], edges[:-1], edges[1:], "Phase"):
+    print(line)
 
-# Compute accumulated throughput from the complete dataset (including zeros)
-accumulated = [0]  # starting at 0 Mbits
-for i in range(1, len(timestamps)):
-    dt = timestamps[i] - timestamps[i - 1]
-    # Trapezoidal integration: average throughput over the interval
-    area = 0.5 * (throughputs[i] + throughputs[i - 1]) * dt
-    accumulated.append(accumulated[-1] + area)
+# Filtered data for the instantaneous throughput plot (excluding zero values)
+nonzero_timestamps = timestamps[transfer["nonzero"]]
+nonzero_throughputs = throughputs[transfer["nonzero"]]
 
 # Create subplots: top for instantaneous (nonzero) throughput, bottom for accumulated throughput
 fig, axs = plt.subplots(2, 1, figsize=(10, 10))
 
-# Top subplot: Instantaneous throughput (nonzero values only)
-axs[0].plot(nonzero_timestamps, nonzero_throughputs, label="Main Flow Throughput")
+# Top subplot: Instantaneous throughput (nonzero values only); series longer
+# than a few thousand points (e.g. -i 0.1 runs) are reduced to min/max per pixel
+plot_series(axs[0], nonzero_timestamps, nonzero_throughputs, label="Main Flow Throughput")
 # Mark background flow start times
-bg_start_times = [150, 300, 450]
+bg_start_times = BG_START_TIMES
 colors = ['red', 'green', 'purple']
 for t, col in zip(bg_start_times, colors):
     axs[0].axvline(x=t, color=col, linestyle="--", label=f"BG flow started at {t}s", linewidth=2)
@@ -85,7 +72,7 @@ axs[0].legend(fontsize=fontsize)
 axs[0].grid(True)
 
 # Bottom subplot: Accumulated throughput (all data)
-axs[1].plot(timestamps, accumulated, label="Accumulated Throughput")
+plot_series(axs[1], timestamps, accumulated, label="Accumulated Throughput")
 for t, col in zip(bg_start_times, colors):
     axs[1].axvline(x=t, color=col, linestyle="--", label=f"BG flow started at {t}s", linewidth=2)
 axs[1].set_xlabel("Time (s)", fontsize=fontsize)
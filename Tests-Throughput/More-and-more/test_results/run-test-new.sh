@@ -2,10 +2,25 @@
 
 # Check if the correct number of arguments is provided
 if [ "$#" -ne 5 ]; then
-    echo "Usage: $0 <congestion_control> <bg1_parallel> <bg2_parallel> <bg3_parallel> <test_number>"
+    echo "Usage: [IPERF_FORMAT=text|json|json-stream] $0 <congestion_control> <bg1_parallel> <bg2_parallel> <bg3_parallel> <test_number>"
     exit 1
 fi
 
+# Output format of the iperf3 logs:
+#   text        - human-readable output in *.log (default)
+#   json        - iperf3 --json, one JSON document per flow in *.json
+#   json-stream - iperf3 --json-stream (iperf3 >= 3.17), one JSON object per interval in *.json
+IPERF_FORMAT=${IPERF_FORMAT:-text}
+case "$IPERF_FORMAT" in
+    text)        IPERF_OPTS=();              LOG_EXT="log" ;;
+    json)        IPERF_OPTS=(--json);        LOG_EXT="json" ;;
+    json-stream) IPERF_OPTS=(--json-stream); LOG_EXT="json" ;;
+    *)
+        echo "Unknown IPERF_FORMAT ${IPERF_FORMAT} (text, json or json-stream)"
+        exit 1
+        ;;
+esac
+
 # Get command line arguments
 CONGESTION_CONTROL=$1
 BG1_PARALLEL=$2
@@ -36,6 +51,7 @@ Server IP:               ${SERVER}
 Main Flow Port:          5201
 Main Flow Duration:      ${MAIN_DURATION} seconds
 Main Flow Congestion:    ${CONGESTION_CONTROL}
+Log Format:              ${IPERF_FORMAT}
 
 Background Flow 1:
   Port:                5002
@@ -69,13 +85,31 @@ exec > >(tee -a "$TERMINAL_LOG") 2>&1
 sudo tc qdisc add dev enp2s0 root netem delay 195ms 1.6ms distribution paretonormal
 
 # Define log file names (stored in the test folder)
-MAIN_LOG="${TEST_DIR}/main_${NOW}_test${TEST_NUMBER}.log"
-BG1_LOG="${TEST_DIR}/bg1_${NOW}_test${TEST_NUMBER}.log"
-BG2_LOG="${TEST_DIR}/bg2_${NOW}_test${TEST_NUMBER}.log"
-BG3_LOG="${TEST_DIR}/bg3_${NOW}_test${TEST_NUMBER}.log"
+MAIN_LOG="${TEST_DIR}/main_${NOW}_test${TEST_NUMBER}.${LOG_EXT}"
+BG1_LOG="${TEST_DIR}/bg1_${NOW}_test${TEST_NUMBER}.${LOG_EXT}"
+BG2_LOG="${TEST_DIR}/bg2_${NOW}_test${TEST_NUMBER}.${LOG_EXT}"
+BG3_LOG="${TEST_DIR}/bg3_${NOW}_test${TEST_NUMBER}.${LOG_EXT}"
+
+###############################################################################
+# Function: run_iperf
+# Runs iperf3 with the given arguments and writes its output to a log file.
+# In the JSON formats stderr goes to the terminal log instead, so it cannot
+# break the JSON. Started with &, the subshell is replaced by iperf3 (exec),
+# so $! and pkill -P $$ in cleanup() reach iperf3 itself.
+# Usage: run_iperf <log_file> <iperf3 arguments...>
+###############################################################################
+run_iperf() {
+    local log=$1
+    shift
+    if [ "$IPERF_FORMAT" = "text" ]; then
+        exec iperf3 "$@" > "$log" 2>&1
+    else
+        exec iperf3 "$@" "${IPERF_OPTS[@]}" > "$log"
+    fi
+}
 
 echo "Starting main flow on port 5201 with congestion control ${CONGESTION_CONTROL}..."
-iperf3 -c "$SERVER" -p 5201 -t $MAIN_DURATION --congestion "$CONGESTION_CONTROL" > "$MAIN_LOG" 2>&1 &
+run_iperf "$MAIN_LOG" -c "$SERVER" -p 5201 -t $MAIN_DURATION --congestion "$CONGESTION_CONTROL" &
 MAIN_PID=$!
 
 # Sleep 150 seconds after the main stream starts before starting BG flows.
@@ -119,7 +153,7 @@ while [ $attempt -le 2 ]; do
         runtime=$((BG1_DURATION - 15))
     fi
     echo "Starting background flow 1 on port 5002 (attempt $attempt) with ${BG1_PARALLEL} parallel streams for $runtime seconds..."
-    iperf3 -c "$SERVER" -p 5002 -t "$runtime" --congestion cubic -P "$BG1_PARALLEL" > "$BG1_LOG" 2>&1 &
+    run_iperf "$BG1_LOG" -c "$SERVER" -p 5002 -t "$runtime" --congestion cubic -P "$BG1_PARALLEL" &
     sleep 15
     if check_iperf_running 5002; then
         echo "Background flow 1 is running."
@@ -149,7 +183,7 @@ while [ $attempt -le 2 ]; do
         runtime=$((BG2_DURATION - 15))
     fi
     echo "Starting background flow 2 on port 5001 (attempt $attempt) with ${BG2_PARALLEL} parallel streams for $runtime seconds..."
-    iperf3 -c "$SERVER" -p 5001 -t "$runtime" --congestion cubic -P "$BG2_PARALLEL" > "$BG2_LOG" 2>&1 &
+    run_iperf "$BG2_LOG" -c "$SERVER" -p 5001 -t "$runtime" --congestion cubic -P "$BG2_PARALLEL" &
     sleep 15
     if check_iperf_running 5001; then
         echo "Background flow 2 is running."
@@ -179,7 +213,7 @@ while [ $attempt -le 2 ]; do
         runtime=$((BG3_DURATION - 15))
     fi
     echo "Starting background flow 3 on port 5101 (attempt $attempt) with ${BG3_PARALLEL} parallel streams for $runtime seconds..."
-    iperf3 -c "$SERVER" -p 5101 -t "$runtime" --congestion cubic -P "$BG3_PARALLEL" > "$BG3_LOG" 2>&1 &
+    run_iperf "$BG3_LOG" -c "$SERVER" -p 5101 -t "$runtime" --congestion cubic -P "$BG3_PARALLEL" &
     sleep 15
     if check_iperf_running 5101; then
         echo "Background flow 3 is running."
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Python replacement of run-test-new.sh (same arguments, same test folder
+layout), see throughput_tools/orchestrator.py:
+
+    [IPERF_FORMAT=text|json|json-stream] ./run-test.py <congestion_control> <bg1_parallel> <bg2_parallel> <bg3_parallel> <test_number>
+"""
+import os
+import sys
+
+# Shared code lives in Tests-Throughput/throughput_tools
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from throughput_tools.orchestrator import main
+
+if __name__ == "__main__":
+    sys.exit(main(plot_script=os.path.join(os.path.dirname(os.path.abspath(__file__)), "plot-graph.py")))
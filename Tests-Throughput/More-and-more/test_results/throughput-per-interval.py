@@ -1,76 +1,69 @@
 #!/usr/bin/env python3
-import re
+import os
 import sys
+import argparse
+
+import numpy as np
+
+# Shared code lives in Tests-Throughput/throughput_tools
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from throughput_tools.iperf_log import load_log
+from throughput_tools.intervals import fixed_edges, sliding_sums, regular_rows, sweep, format_bins
+from throughput_tools.pscheduler import expand_inputs
 
-def convert_to_bytes(value, unit):
-    """
-    Convert a transfer value to bytes using 1024-based conversion.
-    Acceptable units: Bytes, KBytes, MBytes, GBytes.
-    """
-    value = float(value)
-    unit = unit.upper()
-    if "GBYTES" in unit:
-        return value * 1024**3
-    elif "MBYTES" in unit:
-        return value * 1024**2
-    elif "KBYTES" in unit:
-        return value * 1024
-    else:
-        return value
 
-def process_iperf3_log(file_path, block_duration=150, num_intervals=4):
-    """
-    This script always prints exactly four fixed intervals: 
-      0-150, 150-300, 300-450, and 450-600 seconds.
-    """
-    pattern = re.compile(
-        r"^\[\s*\d+\]\s+(\d+\.\d+)-(\d+\.\d+)\s+sec\s+([\d\.]+)\s+(\w+Bytes)",
-        re.IGNORECASE
-    )
-    
-    # Initialize dictionary for fixed intervals.
-    intervals = {i: 0.0 for i in range(num_intervals)}
-    
-    with open(file_path, 'r') as f:
-        for line in f:
-            match = pattern.match(line)
-            if not match:
-                continue
-            start_str, end_str, transfer_str, transfer_unit = match.groups()
-            try:
-                start_time = float(start_str)
-                end_time = float(end_str)
-            except ValueError:
-                continue
-            # Only consider records that represent ~1-second intervals.
-            duration = end_time - start_time
-            if abs(duration - 1.0) > 0.1:
-                continue
-            # Only include records that fall within the first (num_intervals*block_duration) seconds.
-            if start_time >= num_intervals * block_duration:
-                continue
-            transfer_bytes = convert_to_bytes(transfer_str, transfer_unit)
-            interval_index = int(start_time // block_duration)
-            intervals[interval_index] += transfer_bytes
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="TP-Sum per time interval of iperf3 logs (default: 0-150, 150-300, 300-450, 450-600 sec).")
+    parser.add_argument("inputs", nargs="+",
+                        help="iperf3 log files (text or --json), directories (searched for --name) or globs; "
+                             "a trailing number is the block duration in seconds")
+    parser.add_argument("--blocks", type=int, default=4, help="number of fixed intervals (default: 4)")
+    parser.add_argument("--edges", default=None, help="custom interval boundaries, e.g. 0,100,250,600")
+    parser.add_argument("--window", type=float, default=None, help="sliding windows of this length instead")
+    parser.add_argument("--step", type=float, default=1.0, help="step of the sliding windows (default: 1 s)")
+    parser.add_argument("--per-stream", action="store_true", help="one block of lines per stream [ID]")
+    parser.add_argument("--name", default="main_*", help="file pattern in directories (default: main_*, "
+                                                          "text .log or iperf3 --json .json)")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    # Old usage: throughput-per-interval.py <iperf3_log_file> [block_duration_seconds]
+    block_duration = 150
+    if len(args.inputs) > 1 and not os.path.exists(args.inputs[-1]):
+        try:
+            block_duration = float(args.inputs.pop())
+        except ValueError:
+            print("Invalid block duration provided. Using default 150 seconds.")
+    files = expand_inputs(args.inputs, args.name)
+    if not files:
+        print(f"No log files found in {' '.join(args.inputs)}")
+        sys.exit(1)
+
+    if args.window:
+        for path in files:
+            log = load_log(path)
+            mask = regular_rows(log)
+            lefts, sums = sliding_sums(log["start"][mask], log["bytes"][mask], args.window, args.step)
+            if len(files) > 1:
+                print(f"== {path}")
+            for line in format_bins(sums, lefts, lefts + args.window, "Window"):
+                print(line)
+        return
+
+    if args.edges:
+        edges = np.array([float(edge) for edge in args.edges.split(",")])
+    else:
+        edges = fixed_edges(block_duration, args.blocks)
+    for path, stream, sums in sweep(files, edges, args.per_stream):
+        if len(files) > 1 or args.per_stream:
+            print(f"== {path}" + (f" [{stream}]" if args.per_stream else ""))
+        for line in format_bins(sums, edges[:-1], edges[1:]):
+            print(line)
 
-    # For each fixed interval, compute TP-Sum in MBytes and throughput in Mbit/s.
-    for i in range(num_intervals):
-        sum_bytes = intervals.get(i, 0.0)
-        tp_sum_mbytes = sum_bytes / (1024**2)
-        throughput_mbit = (sum_bytes * 8) / (block_duration * 1e6)
-        start_sec = i * block_duration
-        end_sec = (i + 1) * block_duration
-        print(f"Interval {start_sec:.0f} - {end_sec:.0f} sec: TP-Sum = {tp_sum_mbytes:.2f} MBytes; {throughput_mbit:.2f} Mbit/s")
 
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         print("Usage: python throughput_fixed_intervals.py <iperf3_log_file> [block_duration_seconds]")
         sys.exit(1)
-    log_file = sys.argv[1]
-    block_duration = 150  # default block duration in seconds
-    if len(sys.argv) >= 3:
-        try:
-            block_duration = float(sys.argv[2])
-        except ValueError:
-            print("Invalid block duration provided. Using default 150 seconds.")
-    process_iperf3_log(log_file, block_duration)
+    main()
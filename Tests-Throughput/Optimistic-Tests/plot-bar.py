@@ -1,15 +1,37 @@
+import os
+import sys
+import argparse
 import matplotlib.pyplot as plt
 import numpy as np
 import matplotlib.patches as mpatches
 
-# Sample data
+# Shared code lives in Tests-Throughput/throughput_tools
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from throughput_tools.aggregate import METRICS, run_totals, pivot
+
+# Mean bytes of the main flow per run, from the run store (throughput-store/)
+# of the runs in the JSON-Files folders; --update-store re-reads new or
+# changed runs into it first.
+parser = argparse.ArgumentParser(description="Bars of the mean main flow bytes per scenario and CCA.")
+parser.add_argument("--metric", choices=METRICS, default="receiver_bytes",
+                    help="receiver_bytes (iperf3 server, default) or throughput_bytes (pscheduler summary)")
+parser.add_argument("--update-store", action="store_true", help="bring the run store up to date first")
+args = parser.parse_args()
 categories = ['Baseline', 'Buffer 1 GB', 'FQ - CoDel', 'Mixed Backgound Traffic']
-optimistic_values1 = [2010.33, 1948, 2017.33, 6365.67]
-realistic_values1  = [797.79, 1315.83, 1130.67, 1058.49]
-optimistic_values2 = [2514.33, 2821.33, 2798.33, 7097.67]
-realistic_values2  = [888.73, 1023.85, 812.65, 895.13]
-optimistic_values3 = [190.7, 190.77, 190.5, 190.97]
-realistic_values3  = [154.55, 153.76, 154.06, 153.78]
+scenarios = ['Baseline', 'Buffer', 'FQ-Codel', 'Bg-Flows']
+totals = run_totals(ROOT, metric=args.metric, update=args.update_store)
+
+def values(cca, scale):
+    # (realistic, optimistic) means and 95% CI half widths per scenario
+    mean, ci = pivot(totals[totals["cca"] == cca], "condition", "scenario",
+                     rows=['realistic', 'optimistic'], cols=scenarios, scale=scale)
+    return mean[0], mean[1], ci[0], ci[1]
+
+realistic_values1, optimistic_values1, realistic_ci1, optimistic_ci1 = values('cubic', 1e6)
+realistic_values2, optimistic_values2, realistic_ci2, optimistic_ci2 = values('htcp', 1e6)
+realistic_values3, optimistic_values3, realistic_ci3, optimistic_ci3 = values('bbr', 1e9)
 
 # Number of test conditions
 n_conditions = len(categories)
@@ -39,13 +61,15 @@ legend_fontsize = 24
 # Create figure with 3 subplots
 fig, axs = plt.subplots(3, 1, figsize=(20, 15))
 
-def plot_subplot(ax, realistic_vals, optimistic_vals, title, ylabel):
+def plot_subplot(ax, realistic_vals, optimistic_vals, title, ylabel, realistic_ci=None, optimistic_ci=None):
     # Plot each test condition as a bar in the respective group (Realistic and Optimistic)
     for i in range(n_conditions):
         # Group 'Realistic' at x = groups[0] with offset for test condition i
-        ax.bar(groups[0] + offsets[i], realistic_vals[i], bar_width, color=colors[i])
+        ax.bar(groups[0] + offsets[i], realistic_vals[i], bar_width, color=colors[i],
+               yerr=None if realistic_ci is None else realistic_ci[i], capsize=6)
         # Group 'Optimistic' at x = groups[1] with offset for test condition i
-        ax.bar(groups[1] + offsets[i], optimistic_vals[i], bar_width, color=colors[i])
+        ax.bar(groups[1] + offsets[i], optimistic_vals[i], bar_width, color=colors[i],
+               yerr=None if optimistic_ci is None else optimistic_ci[i], capsize=6)
     
     # Set x-axis ticks for the two groups
     ax.set_xticks(groups)
@@ -64,9 +88,9 @@ def plot_subplot(ax, realistic_vals, optimistic_vals, title, ylabel):
     ax.legend(handles=patches, fontsize=legend_fontsize)
 
 # Plot each subplot with its respective data
-plot_subplot(axs[0], realistic_values1, optimistic_values1, 'CUBIC', 'MB')
-plot_subplot(axs[1], realistic_values2, optimistic_values2, 'H-TCP', 'MB')
-plot_subplot(axs[2], realistic_values3, optimistic_values3, 'BBRv1', 'GB')
+plot_subplot(axs[0], realistic_values1, optimistic_values1, 'CUBIC', 'MB', realistic_ci1, optimistic_ci1)
+plot_subplot(axs[1], realistic_values2, optimistic_values2, 'H-TCP', 'MB', realistic_ci2, optimistic_ci2)
+plot_subplot(axs[2], realistic_values3, optimistic_values3, 'BBRv1', 'GB', realistic_ci3, optimistic_ci3)
 
 plt.tight_layout()
 plt.savefig('plot.pdf')
@@ -0,0 +1,10 @@
+"""
+Shared parsing and plotting code for the pscheduler throughput runs.
+
+The plot-measurement.py / plot-newstyle.py scripts in the test folders
+are thin wrappers around throughput_tools.cli. The submodules with
+heavier imports (plotting, cache, batch) are imported explicitly.
+"""
+
+from .pscheduler import load_json, parse_data, parse_diags, receiver_bytes, expand_inputs
+from .naming import SCHEMAS, FilenameSchema, register_schema, detect_schema, parse_filename
@@ -0,0 +1,167 @@
+"""
+Per-scenario / per-CCA averages of the runs in the Parquet store, the
+inputs of the bar charts (Optimistic-Tests/plot-bar.py and
+More-and-more/test_results/plot-bars.py).
+
+The functions read the store as it is (a missing store is built once).
+With update=True (--update-store here and in the plot scripts) it is
+brought up to date first, store.build only re-reads changed runs, so
+new runs show up in the plot.
+
+    python -m throughput_tools.aggregate totals [--metric throughput_bytes] [--update-store]
+    python -m throughput_tools.aggregate blocks [--block-duration 150] [--update-store]
+"""
+
+import os
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from . import store as run_store
+from .iperf_log import SUM_STREAM
+
+# Two-sided 95% quantiles of Student's t by degrees of freedom
+T95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+       10: 2.228, 15: 2.131, 20: 2.086, 30: 2.042}
+
+METRICS = ("throughput_bytes", "receiver_bytes")
+
+
+def t95(dof):
+    """
+    t quantile for `dof` degrees of freedom (next smaller tabulated value,
+    1.96 beyond the table).
+    """
+    if dof > max(T95):
+        return 1.96
+    return T95[max(d for d in T95 if d <= dof)]
+
+
+def mean_ci(values):
+    """
+    (mean, half width of the 95% confidence interval, n). The half width
+    is NaN for a single value.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    n = len(values)
+    if n == 0:
+        return np.nan, np.nan, 0
+    if n == 1:
+        return values[0], np.nan, 1
+    return values.mean(), t95(n - 1) * values.std(ddof=1) / np.sqrt(n), n
+
+
+def summarize(df, by, value):
+    """
+    mean, ci and n of column `value` per group of `by`.
+    """
+    rows = []
+    for key, group in df.groupby(list(by), observed=True):
+        rows.append((*key, *mean_ci(group[value])))
+    return pd.DataFrame(rows, columns=[*by, "mean", "ci", "n"])
+
+
+def _store(root, store, update=False):
+    store = store or os.path.join(root, run_store.STORE_DIR)
+    if update or not os.path.exists(os.path.join(store, "runs.parquet")):
+        run_store.build(root, store)
+    return store
+
+
+def run_totals(root, store=None, metric="receiver_bytes", conditions=("optimistic", "realistic"), update=False):
+    """
+    Bytes of the main flow per run (`metric` is the "receiver_bytes" of
+    the iperf3 server or the pscheduler summary "throughput_bytes"),
+    summarized per condition, scenario and cca.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"unknown metric {metric}, expected one of {', '.join(METRICS)}")
+    runs = run_store.load_runs(_store(root, store, update))
+    runs = runs[runs["condition"].isin(conditions)]
+    return summarize(runs, ("condition", "scenario", "cca"), metric)
+
+
+def block_sums(root, store=None, block_duration=150, num_blocks=4, condition="more-and-more", flow="main",
+               runs=None, update=False):
+    """
+    Bytes of `flow` per fixed block of `block_duration` seconds and run,
+    counted like throughput-per-interval.py (only ~1 s interval rows
+    starting before num_blocks * block_duration). `runs` limits the runs
+    to run ids starting with one of the given strings (e.g. "20250221"
+    for the series of that day). Columns scenario, cca, run_id, block,
+    bytes.
+    """
+    df = run_store.load_store(_store(root, store, update), {"condition": condition, "flow": flow},
+                              ["scenario", "cca", "run_id", "stream", "start", "end", "bytes"])
+    df = df[(df["stream"] != SUM_STREAM) & (np.abs(df["end"] - df["start"] - 1.0) <= 0.1)
+            & (df["start"] < num_blocks * block_duration)]
+    if runs is not None:
+        df = df[df["run_id"].astype(str).str.startswith(tuple(runs))]
+    df = df.assign(block=(df["start"] // block_duration).astype(np.int64))
+    sums = df.groupby(["scenario", "cca", "run_id", "block"], observed=True)["bytes"].sum()
+    # Blocks without any data count as 0 bytes
+    index = pd.MultiIndex.from_tuples(
+        [(*run, block) for run in sums.index.droplevel("block").unique() for block in range(num_blocks)],
+        names=sums.index.names)
+    return sums.reindex(index, fill_value=0.0).reset_index()
+
+
+def block_table(root, store=None, block_duration=150, num_blocks=4, condition="more-and-more", flow="main",
+                runs=None, update=False):
+    """
+    block_sums summarized per scenario, cca and block.
+    """
+    sums = block_sums(root, store, block_duration, num_blocks, condition, flow, runs, update)
+    return summarize(sums, ("scenario", "cca", "block"), "bytes")
+
+
+def pivot(summary, index, columns, rows=None, cols=None, scale=1.0):
+    """
+    (mean, ci) as 2-D arrays for the bar charts, optionally reordered to
+    the given `rows` / `cols` labels (missing cells are NaN) and divided
+    by `scale`.
+    """
+    tables = []
+    for name in ("mean", "ci"):
+        table = summary.pivot_table(index=index, columns=columns, values=name, aggfunc="first", dropna=False)
+        if rows is not None:
+            table = table.reindex(rows)
+        if cols is not None:
+            table = table.reindex(columns=cols)
+        tables.append(table.to_numpy(dtype=np.float64) / scale)
+    return tuple(tables)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mean and 95% CI per scenario and CCA from the run store.")
+    parser.add_argument("what", choices=["totals", "blocks"],
+                        help="totals: bytes per run (Optimistic/Realistic); blocks: bytes per time block (More-and-more)")
+    parser.add_argument("--root", default=".", help="Tests-Throughput directory (default: .)")
+    parser.add_argument("-s", "--store", default=None, help=f"store directory (default: <root>/{run_store.STORE_DIR})")
+    parser.add_argument("--metric", choices=METRICS, default="receiver_bytes")
+    parser.add_argument("--block-duration", type=float, default=150)
+    parser.add_argument("--blocks", type=int, default=4)
+    parser.add_argument("--runs", nargs="+", default=None, metavar="RUN_ID",
+                        help="blocks: only run ids starting with these, e.g. 20250221")
+    parser.add_argument("--csv", default=None, help="also write the table to this CSV file")
+    parser.add_argument("--update-store", action="store_true", help="bring the store up to date first")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    # MB as in the bar charts: 1e6 for the pscheduler bytes, 1024**2 as in throughput-per-interval.py
+    if args.what == "totals":
+        table, scale = run_totals(args.root, args.store, args.metric, update=args.update_store), 1e6
+    else:
+        table, scale = block_table(args.root, args.store, args.block_duration, args.blocks, runs=args.runs,
+                                   update=args.update_store), 1024**2
+    table[["mean", "ci"]] /= scale
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(table.round(2).to_string(index=False))
+    if args.csv:
+        table.to_csv(args.csv, index=False)
+
+
+if __name__ == "__main__":
+    main()
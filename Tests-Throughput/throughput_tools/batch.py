@@ -0,0 +1,106 @@
+"""
+Batch rendering: plot many pscheduler JSON runs in one go.
+
+Inputs are JSON files, directories (searched recursively) or glob
+patterns. The runs are spread over a process pool; every worker imports
+matplotlib once, uses the non-interactive Agg backend and draws all its
+runs into one reused figure per style. Like make, a PDF that is newer
+than its JSON file is not rendered again.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+from matplotlib import pyplot as plt
+
+from .cli import measurement_label, plot_run
+from .pscheduler import expand_inputs
+from .cache import load_run
+
+# One figure per style and worker process, reused for every run
+_worker_figures = {}
+
+
+def is_up_to_date(source, output):
+    return os.path.exists(output) and os.path.getmtime(output) >= os.path.getmtime(source)
+
+
+def _init_worker():
+    matplotlib.use("Agg")
+
+
+def _render(path, output, measurement, style, diags, use_cache):
+    """
+    Runs in a worker. Returns (path, output, error message or None).
+    """
+    fig = _worker_figures.get(style)
+    if fig is None:
+        fig = _worker_figures[style] = plt.figure()
+    try:
+        plot_run(load_run(path, use_cache), measurement, style, diags, output, fig=fig)
+    except Exception as e:
+        return path, output, f"{type(e).__name__}: {e}"
+    return path, output, None
+
+
+def plan(files, out_dir=None, schema=None, label=None, force=False):
+    """
+    (jobs, skipped, errors): jobs are (json, pdf, label) to render,
+    skipped the up-to-date ones, errors (json, message) for unusable
+    file names.
+    """
+    jobs, skipped, errors = [], [], []
+    for path in files:
+        try:
+            measurement = measurement_label(path, schema, label)
+        except ValueError as e:
+            errors.append((path, str(e)))
+            continue
+        output = os.path.join(out_dir or ".", f"plot_{measurement}.pdf")
+        if not force and is_up_to_date(path, output):
+            skipped.append((path, output))
+        else:
+            jobs.append((path, output, measurement))
+    return jobs, skipped, errors
+
+
+def render_all(jobs, style="classic", diags=True, workers=None, use_cache=True):
+    """
+    Renders (json, pdf, label) jobs in a process pool. Yields the
+    results of _render in input order.
+    """
+    if not jobs:
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_worker) as pool:
+        # Large chunks keep each worker on its own figure for many runs
+        chunksize = max(len(jobs) // (4 * workers), 1)
+        yield from pool.map(_render, *zip(*jobs), [style] * len(jobs), [diags] * len(jobs),
+                            [use_cache] * len(jobs), chunksize=chunksize)
+
+
+def run_batch(patterns, style="classic", schema=None, label=None, diags=True, out_dir=None,
+              force=False, workers=None, use_cache=True):
+    """
+    Plots everything matched by `patterns`, prints a line per run and a
+    summary. Returns the number of failed runs.
+    """
+    files = expand_inputs(patterns)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    jobs, skipped, errors = plan(files, out_dir, schema, label, force)
+
+    for path, message in errors:
+        print(f"[Error] {path}: {message}")
+    rendered = 0
+    for path, output, error in render_all(jobs, style, diags, workers, use_cache):
+        if error:
+            errors.append((path, error))
+            print(f"[Error] {path}: {error}")
+        else:
+            rendered += 1
+            print(f"{path} -> {output}")
+
+    print(f"{len(files)} JSON files: {rendered} plotted, {len(skipped)} up to date, {len(errors)} failed")
+    return len(errors)
@@ -0,0 +1,172 @@
+"""
+On-disk cache of parsed pscheduler runs.
+
+Parsing a run means json.load of the whole pscheduler output plus a
+second json.loads of the iperf3 JSON embedded in "diags". The extracted
+interval columns and summary values are stored next to the JSON file as
+`<name>.cache.npz` and reused as long as the JSON file is unchanged
+(same mtime and size, or with use_hash=True also the same SHA-1).
+
+    python -m throughput_tools.cache [--hash] <dir|glob>...
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+
+import numpy as np
+
+from .pscheduler import load_json, parse_data, parse_diags, receiver_bytes, expand_inputs
+
+# Bump when the stored columns change, older caches are rebuilt
+CACHE_VERSION = 2
+CACHE_SUFFIX = ".cache.npz"
+
+
+class Run:
+    """
+    Parsed pscheduler run: per-interval columns of the first stream
+    (end time, throughput and window size in bytes, retransmits, RTT in
+    microseconds), the summary dict and the bytes received by the iperf3
+    server (None without diags).
+    """
+
+    def __init__(self, xs, throughputs, windowsizes, retransmits, rtts, summary, received):
+        self.xs = xs
+        self.throughputs = throughputs
+        self.windowsizes = windowsizes
+        self.retransmits = retransmits
+        self.rtts = rtts
+        self.summary = summary
+        self.received = received
+
+    def plot_args(self):
+        """
+        Positional arguments of the plot functions in plotting.py.
+        """
+        return self.xs.tolist(), self.throughputs.tolist(), self.windowsizes.tolist(), self.summary, self.received
+
+
+def cache_path(path):
+    return os.path.splitext(path)[0] + CACHE_SUFFIX
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_run(json_input):
+    """
+    Run from an already loaded pscheduler result.
+    """
+    xs, throughputs, windowsizes, summary = parse_data(json_input)
+    streams = [interval["streams"][0] for interval in json_input["intervals"]]
+    return Run(
+        np.array(xs, dtype=np.int64),
+        np.array(throughputs),
+        np.array(windowsizes),
+        np.array([stream.get("retransmits", 0) for stream in streams], dtype=np.int64),
+        np.array([stream.get("rtt", -1) for stream in streams], dtype=np.int64),
+        summary,
+        receiver_bytes(parse_diags(json_input)),
+    )
+
+
+def _key(path):
+    st = os.stat(path)
+    return {"version": CACHE_VERSION, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha1": ""}
+
+
+def _valid(stored, key, path, use_hash):
+    """
+    Same version and mtime/size; with use_hash a matching SHA-1 is also
+    accepted (e.g. after a fresh checkout). The hash is only computed
+    when mtime/size differ and fills key["sha1"] for the rewrite.
+    """
+    if int(stored["version"]) != key["version"]:
+        return False
+    if int(stored["mtime_ns"]) == key["mtime_ns"] and int(stored["size"]) == key["size"]:
+        return True
+    if use_hash:
+        key["sha1"] = file_hash(path)
+        return str(stored["sha1"]) == key["sha1"]
+    return False
+
+
+def _read(cache_file, key, path, use_hash):
+    try:
+        with np.load(cache_file) as data:
+            if not _valid(data, key, path, use_hash):
+                return None
+            received = int(data["received"])
+            return Run(data["xs"], data["throughputs"], data["windowsizes"], data["retransmits"],
+                       data["rtts"], json.loads(str(data["summary"])), received if received >= 0 else None)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write(cache_file, key, run):
+    tmp = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            np.savez(f, xs=run.xs, throughputs=run.throughputs, windowsizes=run.windowsizes,
+                     retransmits=run.retransmits, rtts=run.rtts, summary=np.array(json.dumps(run.summary)),
+                     received=np.array(-1 if run.received is None else run.received),
+                     **{name: np.array(value) for name, value in key.items()})
+        os.replace(tmp, cache_file)
+    except OSError:
+        # Read-only directory: just work without cache
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def load_run(path, use_cache=True, use_hash=False):
+    """
+    Run of a pscheduler JSON file, from the cache if it is still valid.
+    Otherwise the JSON is parsed and the cache (re)written.
+    """
+    if not use_cache:
+        return parse_run(load_json(path))
+    key = _key(path)
+    cache_file = cache_path(path)
+    run = _read(cache_file, key, path, use_hash)
+    if run is not None:
+        if key["sha1"]:
+            # Valid by hash only: store the new mtime/size
+            _write(cache_file, key, run)
+        return run
+    run = parse_run(load_json(path))
+    if use_hash:
+        key["sha1"] = key["sha1"] or file_hash(path)
+    _write(cache_file, key, run)
+    return run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or refresh the parse cache of pscheduler JSON files.")
+    parser.add_argument("inputs", nargs="+", help="JSON files, directories or globs")
+    parser.add_argument("--hash", action="store_true", help="also accept a cache whose SHA-1 matches when mtime/size changed")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    files = expand_inputs(args.inputs)
+    start = time.perf_counter()
+    failed = 0
+    for path in files:
+        try:
+            load_run(path, use_hash=args.hash)
+        except (ValueError, KeyError, IndexError) as e:
+            failed += 1
+            print(f"[Error] {path}: {e}")
+    elapsed = time.perf_counter() - start
+    print(f"{len(files)} JSON files in {elapsed:.3f} s ({failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+"""
+Test campaigns from a TOML spec instead of hand-started runs.
+
+Every combination of the [matrix] values times `repetitions` is one
+cell (e.g. scenario 1-1-1..5-10-15 x cca cubic/htcp/bbr x 3). Cells are
+measured one after the other, since they share the bottleneck; the
+analysis of a finished cell (plot, store update) runs while the next one
+is measured. A manifest next to the spec records every cell, so a
+campaign that crashed or was stopped continues with the first cell that
+is not done; measured but not yet analyzed cells are analyzed first.
+
+    [campaign]
+    kind = "more-and-more"        # or "pscheduler"
+    repetitions = 3
+    first_test_number = 20        # test number of the first cell (more-and-more)
+    pause = 10                    # seconds between two cells
+    analysis = ["plot", "store"]
+
+    [matrix]
+    scenario = ["1-1-1", "3-2-2", "4-5-6", "5-10-15"]
+    cca = ["cubic", "htcp", "bbr"]
+
+    [run]                         # settings of every cell
+    server = "10.42.0.1"
+
+    [scenario.3-2-2]              # settings of the cells of one scenario
+    ...
+
+Matrix keys other than scenario and cca override the setting of the
+same name, so e.g. `netem = [...]` in [matrix] varies the delay. The
+settings of both kinds are described in More-and-more/test_results/
+campaign.toml and Realistic-Tests/campaign.toml; relative paths are
+relative to the spec file.
+
+    python -m throughput_tools.campaign <spec.toml> [--list] [--retry-failed] [--only key=value ...]
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import asyncio
+import tomllib
+import argparse
+import datetime
+import itertools
+
+from . import store as run_store
+from .orchestrator import (Experiment, PschedulerExperiment, FlowFailed, default_flows, background_flows, run_plot,
+                           SERVER, NETEM, DEVICE, START_TIMEOUT)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+KINDS = ("more-and-more", "pscheduler")
+ORDERS = ("grouped", "interleaved")
+ANALYSIS_STEPS = ("plot", "store")
+
+PAUSE = 10
+# Logs of failed pscheduler cells, inside the scenario directory
+FAILED_DIR = "Failed-Runs"
+
+
+class Cell:
+    """
+    One measurement of a campaign: its position in the campaign, the
+    matrix values (name -> value) and the repetition (from 1).
+    """
+
+    def __init__(self, index, values, repetition):
+        self.index = index
+        self.values = values
+        self.repetition = repetition
+
+    @property
+    def key(self):
+        return "/".join(str(value) for value in self.values.values()) + f"/{self.repetition}"
+
+
+def load_spec(path):
+    with open(path, "rb") as f:
+        spec = tomllib.load(f)
+    campaign = spec.setdefault("campaign", {})
+    kind = campaign.setdefault("kind", "more-and-more")
+    if kind not in KINDS:
+        raise ValueError(f"{path}: unknown kind {kind!r} ({', '.join(KINDS)})")
+    if campaign.setdefault("order", "grouped") not in ORDERS:
+        raise ValueError(f"{path}: unknown order {campaign['order']!r} ({', '.join(ORDERS)})")
+    unknown = set(campaign.setdefault("analysis", list(ANALYSIS_STEPS))) - set(ANALYSIS_STEPS)
+    if unknown:
+        raise ValueError(f"{path}: unknown analysis steps {sorted(unknown)}")
+    matrix = spec.setdefault("matrix", {})
+    for name in ("scenario", "cca"):
+        if name not in matrix:
+            raise ValueError(f"{path}: [matrix] needs a {name} list")
+    return spec
+
+
+def expand(spec):
+    """
+    All cells of the campaign in run order: "grouped" runs the repetitions
+    of a combination back to back (like run-multiple-tests.sh),
+    "interleaved" runs the whole matrix once per repetition, so slow
+    changes of the path spread over all combinations.
+    """
+    matrix = spec["matrix"]
+    names = list(matrix)
+    combinations = [dict(zip(names, values)) for values in itertools.product(*(matrix[name] for name in names))]
+    repetitions = range(1, spec["campaign"].get("repetitions", 1) + 1)
+    if spec["campaign"]["order"] == "grouped":
+        pairs = [(values, rep) for values in combinations for rep in repetitions]
+    else:
+        pairs = [(values, rep) for rep in repetitions for values in combinations]
+    return [Cell(i, values, rep) for i, (values, rep) in enumerate(pairs)]
+
+
+def cell_settings(spec, cell):
+    """
+    [run], then [scenario.<name>], then the matrix values of the cell.
+    """
+    settings = dict(spec.get("run", {}))
+    settings.update(spec.get("scenario", {}).get(str(cell.values["scenario"]), {}))
+    settings.update(cell.values)
+    return settings
+
+
+class Manifest:
+    """
+    State of every cell of a campaign, in a JSON file that is rewritten
+    atomically on every change: status "running", "measured" (analysis
+    pending), "done", "failed" or "interrupted", plus the main log, the
+    test directory, the log files, the number of attempts and times.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.cells = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.cells = json.load(f)["cells"]
+
+    def status(self, cell):
+        return self.cells.get(cell.key, {}).get("status")
+
+    def mark(self, cell, status, **fields):
+        entry = self.cells.setdefault(cell.key, {"values": cell.values, "repetition": cell.repetition, "attempts": 0})
+        entry.update(fields, status=status, updated=datetime.datetime.now().isoformat(timespec="seconds"))
+        if status == "running":
+            entry["attempts"] += 1
+        self.save()
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"cells": self.cells}, f, indent=1)
+        os.replace(tmp, self.path)
+
+
+def _path(spec_dir, path):
+    return os.path.normpath(os.path.join(spec_dir, path))
+
+
+def _netem(settings):
+    netem = settings.get("netem", NETEM)
+    return netem or None
+
+
+def more_and_more_experiment(spec, spec_dir, cell, settings):
+    """
+    Experiment of a More-and-more cell: the scenario "3-2-2" gives the
+    parallel streams of bg1..bg3 (or `bg_parallel`), the Test_* directory
+    goes to <results_dir>/<scenario>.
+    """
+    bg_parallel = settings.get("bg_parallel") or [int(n) for n in str(cell.values["scenario"]).split("-")]
+    test_number = spec["campaign"].get("first_test_number", 1) + cell.index
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    results_dir = os.path.join(_path(spec_dir, settings.get("results_dir", ".")), str(cell.values["scenario"]))
+    return Experiment(default_flows(settings["cca"], bg_parallel),
+                      os.path.join(results_dir, f"Test_{stamp}_test{test_number}"), stamp, test_number,
+                      server=settings.get("server", SERVER), iperf=settings.get("iperf", "iperf3"),
+                      log_format=settings.get("format", "text"), netem=_netem(settings),
+                      device=settings.get("dev", DEVICE), time_scale=settings.get("time_scale", 1.0),
+                      start_timeout=settings.get("start_timeout", START_TIMEOUT))
+
+
+def pscheduler_experiment(spec, spec_dir, cell, settings):
+    """
+    Experiment of a pscheduler cell (the run-real-*-test.sh scripts): the
+    scenario directory is `dir` (default: the scenario name), the
+    background flows come from `background`.
+    """
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
+    duration = settings.get("duration", 120)
+    return PschedulerExperiment(background_flows(settings.get("background", []), duration, stamp, settings["cca"]),
+                                settings["cca"], duration, _path(spec_dir, settings.get("dir", str(cell.values["scenario"]))),
+                                stamp, json_dir=settings.get("json_dir", "JSON-Files"),
+                                pscheduler=settings.get("pscheduler", "sudo pscheduler"),
+                                warmup=settings.get("warmup", 5), server=settings.get("server", SERVER),
+                                iperf=settings.get("iperf", "iperf3"), netem=_netem(settings),
+                                device=settings.get("dev", DEVICE), time_scale=settings.get("time_scale", 1.0),
+                                start_timeout=settings.get("start_timeout", START_TIMEOUT))
+
+
+EXPERIMENTS = {
+    "more-and-more": more_and_more_experiment,
+    "pscheduler": pscheduler_experiment,
+}
+
+# Default plot script per kind, relative to Tests-Throughput (more-and-more)
+# or to the scenario directory (pscheduler)
+PLOT_SCRIPTS = {
+    "more-and-more": os.path.join(ROOT, "More-and-more", "test_results", "plot-graph.py"),
+    "pscheduler": "plot-measurement.py",
+}
+
+
+class Campaign:
+    """
+    Runs the cells of a spec that are not done yet and analyzes the
+    finished ones in the background.
+    """
+
+    def __init__(self, spec_path, retry_failed=False, only=None):
+        self.spec_path = os.path.abspath(spec_path)
+        self.spec_dir = os.path.dirname(self.spec_path)
+        self.spec = load_spec(spec_path)
+        self.settings = self.spec["campaign"]
+        self.manifest = Manifest(self.settings.get("manifest") and _path(self.spec_dir, self.settings["manifest"])
+                                 or os.path.splitext(self.spec_path)[0] + ".manifest.json")
+        self.retry_failed = retry_failed
+        self.cells = [cell for cell in expand(self.spec)
+                      if all(str(cell.values.get(name)) == value for name, value in (only or {}).items())]
+        self._store_lock = asyncio.Lock()
+        # main log of the cell being measured, kept out of the store; the
+        # store build (in a thread) reads this list, so it is changed in
+        # place and filled before the log is created
+        self._measuring = []
+
+    def pending(self):
+        """
+        Cells to measure: not measured yet, interrupted, or (with
+        retry_failed) failed.
+        """
+        skip = {"measured", "done"} | (set() if self.retry_failed else {"failed"})
+        return [cell for cell in self.cells if self.manifest.status(cell) not in skip]
+
+    def plot_script(self, settings, test_dir):
+        script = settings.get("plot", PLOT_SCRIPTS[self.settings["kind"]])
+        if self.settings["kind"] == "pscheduler" and "plot" not in settings:
+            return os.path.join(test_dir, script)
+        return _path(self.spec_dir, script)
+
+    async def analyze(self, cell):
+        """
+        The analysis steps of one measured cell; marks it done.
+        """
+        entry = self.manifest.cells[cell.key]
+        steps = self.settings["analysis"]
+        if "plot" in steps and entry.get("main_log"):
+            script = self.plot_script(cell_settings(self.spec, cell), entry["test_dir"])
+            if os.path.exists(script):
+                for line in await run_plot(script, entry["main_log"], entry["test_dir"]):
+                    print(f"[{cell.key}] {line}", flush=True)
+            else:
+                print(f"[{cell.key}] no plot script {script}", flush=True)
+        if "store" in steps:
+            # one store update at a time; it only re-reads changed runs
+            async with self._store_lock:
+                written, unchanged, removed = await asyncio.to_thread(run_store.build, ROOT, None, False,
+                                                                      self._measuring)
+            print(f"[{cell.key}] store: {written} runs written, {unchanged} unchanged", flush=True)
+        self.manifest.mark(cell, "done")
+
+    async def _analysis_worker(self, queue):
+        while True:
+            cell = await queue.get()
+            try:
+                await self.analyze(cell)
+            except Exception as exc:
+                # stays "measured" and is analyzed again on the next start
+                print(f"[{cell.key}] analysis failed: {exc!r}", flush=True)
+            finally:
+                queue.task_done()
+
+    def set_aside(self, test_dir, logs=()):
+        """
+        Keeps an incomplete run out of the store and the plots: the Test_*
+        directory of a More-and-more run is renamed to Failed_Test_*, the
+        logs of a pscheduler run (main JSON, background .txt) are moved
+        from the scanned directories to <test_dir>/Failed-Runs as
+        Failed_<name>, which no file name schema matches. Returns the new
+        test directory and log paths.
+        """
+        if self.settings["kind"] == "more-and-more":
+            if not os.path.basename(test_dir).startswith("Test_") or not os.path.isdir(test_dir):
+                return test_dir, list(logs)
+            failed_dir = os.path.join(os.path.dirname(test_dir), "Failed_" + os.path.basename(test_dir))
+            os.replace(test_dir, failed_dir)
+            return failed_dir, [os.path.join(failed_dir, os.path.relpath(log, test_dir)) for log in logs]
+        moved = []
+        for log in logs:
+            if not os.path.exists(log):
+                continue
+            target = os.path.join(test_dir, FAILED_DIR, "Failed_" + os.path.basename(log))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(log, target)
+            moved.append(target)
+        return test_dir, moved
+
+    async def measure(self, cell):
+        """
+        Runs one cell; returns True if all its flows ran without error.
+        """
+        previous = self.manifest.cells.get(cell.key, {})
+        if previous.get("status") == "running" and previous.get("test_dir"):
+            # the campaign died while measuring this cell
+            test_dir, logs = self.set_aside(previous["test_dir"], previous.get("logs") or
+                                            [log for log in [previous.get("main_log")] if log])
+            self.manifest.mark(cell, "interrupted", test_dir=test_dir, main_log=None, logs=logs)
+        settings = cell_settings(self.spec, cell)
+        experiment = EXPERIMENTS[self.settings["kind"]](self.spec, self.spec_dir, cell, settings)
+        main_log = experiment.log_path(experiment.flows[0])
+        while os.path.exists(main_log):
+            # pscheduler file names have minutes only
+            await asyncio.sleep(60 - datetime.datetime.now().second)
+            experiment = EXPERIMENTS[self.settings["kind"]](self.spec, self.spec_dir, cell, settings)
+            main_log = experiment.log_path(experiment.flows[0])
+        logs = [experiment.log_path(flow) for flow in experiment.flows]
+        self.manifest.mark(cell, "running", test_dir=experiment.test_dir, main_log=main_log, logs=logs,
+                           started=datetime.datetime.now().isoformat(timespec="seconds"))
+        print(f"=== Cell {cell.index + 1}/{len(self.cells)}: {cell.key}", flush=True)
+        self._measuring[:] = [main_log]
+        failure = None
+        try:
+            await experiment.run()
+        except BaseException as exc:
+            failure = exc
+        if experiment.results:
+            for line in experiment.summary():
+                experiment.say(line)
+        experiment.finish()
+
+        # the log stays out of the store until it is complete or set aside
+        if failure is not None:
+            test_dir, logs = self.set_aside(experiment.test_dir, logs)
+            self._measuring.clear()
+            if not isinstance(failure, FlowFailed):
+                self.manifest.mark(cell, "interrupted", test_dir=test_dir, main_log=None, logs=logs)
+                raise failure
+            self.manifest.mark(cell, "failed", error=str(failure), test_dir=test_dir, main_log=None, logs=logs)
+            return False
+        self._measuring.clear()
+        self.manifest.mark(cell, "measured")
+        return True
+
+    async def run(self):
+        """
+        Measures all pending cells; returns the number of failed ones.
+        """
+        queue = asyncio.Queue()
+        workers = [asyncio.create_task(self._analysis_worker(queue))
+                   for _ in range(max(1, self.settings.get("analysis_workers", 1)))]
+        for cell in self.cells:
+            if self.manifest.status(cell) == "measured":
+                queue.put_nowait(cell)
+
+        failed = 0
+        pending = self.pending()
+        try:
+            for i, cell in enumerate(pending):
+                if not await self.measure(cell):
+                    failed += 1
+                elif self.settings["analysis"]:
+                    queue.put_nowait(cell)
+                else:
+                    self.manifest.mark(cell, "done")
+                if i + 1 < len(pending):
+                    await asyncio.sleep(self.settings.get("pause", PAUSE))
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+        return failed
+
+    def print_status(self):
+        for cell in self.cells:
+            entry = self.manifest.cells.get(cell.key, {})
+            print(f"{cell.index + 1:4d}  {cell.key:<30} {entry.get('status') or 'pending':<12} "
+                  f"{entry.get('attempts', 0)} attempts  {entry.get('test_dir', '')}")
+
+
+def lock_manifest(path):
+    """
+    Exclusive lock on <manifest>.lock, held until the returned file is
+    closed, so a second instance cannot measure the cell the first one is
+    measuring (and set aside its logs). None if another instance holds it.
+    """
+    f = open(path + ".lock", "w")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return None
+    return f
+
+
+def _parse_only(items):
+    only = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"--only expects key=value, got {item!r}")
+        only[name] = value
+    return only
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a campaign of throughput tests from a TOML spec.")
+    parser.add_argument("spec", help="campaign spec (TOML)")
+    parser.add_argument("--list", action="store_true", help="show the cells and their state, run nothing")
+    parser.add_argument("--retry-failed", action="store_true", help="measure failed cells again")
+    parser.add_argument("--only", nargs="+", default=[], metavar="KEY=VALUE",
+                        help="only cells with these matrix values, e.g. cca=bbr scenario=3-2-2")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    campaign = Campaign(args.spec, args.retry_failed, _parse_only(args.only))
+    if args.list:
+        campaign.print_status()
+        return 0
+    lock = lock_manifest(campaign.manifest.path)
+    if lock is None:
+        print(f"Another campaign is running with {campaign.manifest.path}.", file=sys.stderr)
+        return 1
+    with lock:
+        # read again, the instance before may have finished just now
+        campaign.manifest = Manifest(campaign.manifest.path)
+        pending = campaign.pending()
+        print(f"{len(campaign.cells)} cells, {len(pending)} to measure, manifest {campaign.manifest.path}", flush=True)
+        start = time.monotonic()
+        try:
+            failed = asyncio.run(campaign.run())
+        except KeyboardInterrupt:
+            print(f"Interrupted, start again to continue ({campaign.manifest.path}).")
+            return 130
+    print(f"Campaign finished in {(time.monotonic() - start) / 60:.1f} min, {failed} cells failed.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
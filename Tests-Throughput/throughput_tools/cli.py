@@ -0,0 +1,114 @@
+"""
+Command line entry point shared by all plot scripts.
+
+    python -m throughput_tools.cli <json_file> [--style classic|newstyle] [--schema NAME]
+    python -m throughput_tools.cli --batch <dir|glob>... [-j N] [--out-dir DIR] [--force]
+"""
+
+import os
+import sys
+import argparse
+
+from matplotlib import pyplot as plt
+
+from .cache import load_run
+from .naming import SCHEMAS, parse_filename
+from .plotting import STYLES
+
+
+def measurement_label(path, schema=None, label=None):
+    """
+    Label of a run from its file name. `label` (format string over the
+    file name fields) overrides the label of the schema.
+    """
+    info = parse_filename(path, schema)
+    if info is None:
+        raise ValueError(f"file name {os.path.basename(path)} does not match schema {schema or 'auto'}")
+    return label.format(**info) if label else info["label"]
+
+
+def plot_run(run, measurement, style="classic", diags=True, output=None, show=False, fig=None):
+    """
+    Plots one parsed pscheduler run (cache.Run), returns the path of the
+    PDF. A given `fig` is drawn into and kept open for the next run.
+    """
+    xs, throughputs, windowsizes, summary, received = run.plot_args()
+    if not diags:
+        received = None
+
+    output = output or f'plot_{measurement}.pdf'
+    drawn = STYLES[style](xs, throughputs, windowsizes, summary, received, measurement, output, fig=fig)
+    if show:
+        plt.show()
+    if fig is None:
+        plt.close(drawn)
+    return output
+
+
+def plot_file(path, style="classic", schema=None, label=None, diags=True, output=None, show=False, fig=None,
+              use_cache=True):
+    return plot_run(load_run(path, use_cache), measurement_label(path, schema, label), style, diags, output,
+                    show, fig)
+
+
+def main(argv=None, style="classic", schema=None, label=None, diags=True, show=False):
+    """
+    The keyword arguments are the defaults of the calling script; all of
+    them can be overridden on the command line.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("[Error] Datei namen angeben!")
+        exit(1)
+
+    parser = argparse.ArgumentParser(description="Plot throughput and window size of a pscheduler JSON run.")
+    parser.add_argument("json_file", nargs="+",
+                        help="JSON file; with --batch any number of files, directories or globs")
+    parser.add_argument("--style", choices=sorted(STYLES), default=style)
+    parser.add_argument("--schema", choices=sorted(SCHEMAS), default=schema,
+                        help="file name schema (default: detect from the name)")
+    parser.add_argument("--label", default=label,
+                        help="plot label as format string, e.g. '{algo}_{date}_{time}'")
+    parser.add_argument("--diags", action=argparse.BooleanOptionalAction, default=diags,
+                        help="show the receiver throughput from the iperf3 diags")
+    parser.add_argument("-o", "--output", help="output PDF (default: plot_<label>.pdf)")
+    parser.add_argument("--show", action="store_true", default=show, help="also open the plot window")
+    parser.add_argument("--batch", action="store_true",
+                        help="plot all matched runs in a process pool, skipping up-to-date PDFs")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--out-dir", default=None, help="directory for the PDFs in batch mode (default: .)")
+    parser.add_argument("--force", action="store_true", help="re-plot even if the PDF is newer than the JSON")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="always parse the JSON, do not read or write <name>.cache.npz")
+    args = parser.parse_args(argv)
+
+    if args.batch:
+        from .batch import run_batch
+        failed = run_batch(args.json_file, args.style, args.schema, args.label, args.diags,
+                           args.out_dir, args.force, args.jobs, args.cache)
+        exit(1 if failed else 0)
+    if len(args.json_file) != 1:
+        parser.error("only one JSON file without --batch")
+    args.json_file = args.json_file[0]
+
+    if not os.path.exists(args.json_file):
+        print(f"[Error] Datei {args.json_file} existiert nicht!")
+        exit(2)
+
+    try:
+        run = load_run(args.json_file, args.cache)
+    except ValueError:
+        print(f"[Error] Parsing json")
+        exit(3)
+
+    try:
+        measurement = measurement_label(args.json_file, args.schema, args.label)
+    except ValueError as e:
+        print(f"[Error] {e}")
+        exit(4)
+
+    plot_run(run, measurement, args.style, args.diags, args.output, args.show)
+
+
+if __name__ == "__main__":
+    main()
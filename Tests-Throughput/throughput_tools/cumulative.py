@@ -0,0 +1,77 @@
+"""
+Cumulative transfer of an iperf3 flow.
+
+One cumulative sum over the interval rows gives the transferred bytes
+up to every point in time, and the bytes of any time segment as the
+difference of two entries of it, e.g. the phases between the
+background flow starts (0-150-300-450-end in the More-and-more tests).
+plot-graph.py draws the accumulated curve and prints the phase totals
+from the same result.
+"""
+
+import numpy as np
+
+# Start times of the background flows in run-test-new.sh (seconds)
+BG_START_TIMES = (150, 300, 450)
+
+
+def phase_edges(end, phase_starts=BG_START_TIMES, start=0.0):
+    """
+    Boundaries of the phases start..150, 150..300, 300..450, 450..end;
+    phase starts at or after `end` are left out.
+    """
+    inner = [float(t) for t in phase_starts if start < t < end]
+    return np.array([float(start), *inner, float(end)])
+
+
+def trapezoid_cumsum(t, values):
+    """
+    Running trapezoid integral of `values` over `t`, starting at 0 at t[0].
+    """
+    t = np.asarray(t, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(t) == 0:
+        return np.zeros(0)
+    areas = 0.5 * (values[1:] + values[:-1]) * np.diff(t)
+    return np.concatenate(([0.0], np.cumsum(areas)))
+
+
+def cumulative_transfer(start, end, nbytes, edges=None, rate=None):
+    """
+    Everything about the transfer of one series of interval rows in one
+    pass (rows are ordered by start time first):
+
+    - order: positions of the rows in start order; all arrays below are
+      in this order
+    - time: end of each row
+    - bytes: bytes transferred up to the end of each row
+    - nonzero: mask of the rows with traffic (rate > 0, or bytes > 0
+      without `rate`)
+    - phase_bytes: bytes of the rows starting in [edges[i], edges[i+1])
+      (only with `edges`)
+    - rate: `rate` in start order (only with `rate`)
+    - accumulated: trapezoid integral of `rate` over the row ends, the
+      accumulated curve of plot-graph.py (only with `rate`)
+    """
+    start = np.asarray(start, dtype=np.float64)
+    order = np.argsort(start, kind="stable")
+    if np.any(order != np.arange(len(order))):
+        start, end, nbytes = start[order], np.asarray(end)[order], np.asarray(nbytes)[order]
+        rate = None if rate is None else np.asarray(rate)[order]
+    end = np.asarray(end, dtype=np.float64)
+    total = np.cumsum(np.asarray(nbytes, dtype=np.float64))
+
+    result = {
+        "order": order,
+        "time": end,
+        "bytes": total,
+        "nonzero": (np.asarray(rate) if rate is not None else np.asarray(nbytes)) > 0,
+    }
+    if edges is not None:
+        # bytes before each edge, taken from the same cumulative sum
+        before = np.concatenate(([0.0], total))[np.searchsorted(start, np.asarray(edges, dtype=np.float64))]
+        result["phase_bytes"] = np.diff(before)
+    if rate is not None:
+        result["rate"] = np.asarray(rate, dtype=np.float64)
+        result["accumulated"] = trapezoid_cumsum(end, rate)
+    return result
@@ -0,0 +1,139 @@
+"""
+Point reduction of long time series before plotting.
+
+A 24 h hping run has 86,400 RTT samples, a packet capture millions of
+points; drawn as they are, the PDFs get huge and slow to open while a
+figure is only a few thousand pixels wide anyway. Two reductions:
+
+- minmax: the x range is cut into equally wide buckets (about one per
+  pixel column) and only the smallest and largest value of each bucket
+  are kept, in time order. Every spike stays visible at its height.
+- lttb: Largest-Triangle-Three-Buckets, keeps the points that shape the
+  curve most (visually closer for smooth series, may drop single spikes).
+
+plot_series() is a drop-in for ax.plot() that reduces only series longer
+than `max_points`, so short runs (the 700 s pscheduler plots) are drawn
+exactly as before.
+"""
+
+import numpy as np
+
+# A figure 10-24 inches wide at 150-300 dpi has 2-4k pixel columns
+DEFAULT_POINTS = 4000
+
+METHODS = ("minmax", "lttb")
+
+
+def _arrays(x, y):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if x.shape != y.shape or x.ndim != 1:
+        raise ValueError(f"x and y must be 1-D arrays of equal length, got {x.shape} and {y.shape}")
+    return x, y
+
+
+def bucket_index(x, buckets):
+    """
+    Bucket 0..buckets-1 of each x for `buckets` equally wide buckets over
+    [min(x), max(x)].
+    """
+    lo, hi = np.nanmin(x), np.nanmax(x)
+    if hi <= lo:
+        return np.zeros(len(x), dtype=np.int64)
+    index = ((x - lo) * (buckets / (hi - lo))).astype(np.int64)
+    return np.minimum(index, buckets - 1)
+
+
+def _first_per_bucket(rows, bucket):
+    """
+    The first of the (ascending) `rows` of each bucket.
+    """
+    groups = bucket[rows]
+    return rows[np.concatenate(([True], groups[1:] != groups[:-1]))] if len(rows) else rows
+
+
+def minmax(x, y, buckets):
+    """
+    (x, y) reduced to the minimum and maximum of each of `buckets` equally
+    wide x buckets (at most 2 * buckets points), in x order. NaN values
+    are ignored; a bucket with nothing but NaN keeps one NaN point, so
+    gaps in the line stay gaps.
+    """
+    x, y = _arrays(x, y)
+    if len(x) <= 2 * buckets:
+        return x, y
+    if np.any(np.diff(x) < 0):
+        order = np.argsort(x, kind="stable")
+        x, y = x[order], y[order]
+
+    # x is ascending, so every bucket is one contiguous slice
+    index = bucket_index(x, buckets)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(index)) + 1))
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(x))))
+    with np.errstate(invalid="ignore"):
+        lows = np.fmin.reduceat(y, starts)
+        highs = np.fmax.reduceat(y, starts)
+    keep = np.concatenate((
+        _first_per_bucket(np.flatnonzero(y == lows[bucket]), bucket),
+        _first_per_bucket(np.flatnonzero(y == highs[bucket]), bucket),
+        starts[np.isnan(lows)],
+    ))
+    keep = np.unique(keep)
+    return x[keep], y[keep]
+
+
+def lttb(x, y, points):
+    """
+    (x, y) reduced to `points` points with Largest-Triangle-Three-Buckets
+    (Steinarsson 2013). x must be ascending; NaN values are dropped.
+    """
+    x, y = _arrays(x, y)
+    finite = ~np.isnan(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    if points >= len(x) or points < 3:
+        return x, y
+
+    # Equally many points per bucket; first and last point are always kept
+    edges = (np.arange(points - 1) * ((len(x) - 2) / (points - 2))).astype(np.int64) + 1
+    edges[-1] = len(x) - 1
+    keep = np.empty(points, dtype=np.int64)
+    keep[0], keep[-1] = 0, len(x) - 1
+    previous = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the last bucket)
+        next_hi = edges[i + 2] if i + 2 < len(edges) else len(x)
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        px, py = x[previous], y[previous]
+        area = np.abs((px - avg_x) * (y[lo:hi] - py) - (px - x[lo:hi]) * (avg_y - py))
+        previous = lo + int(np.argmax(area))
+        keep[i + 1] = previous
+    return x[keep], y[keep]
+
+
+def decimate(x, y, max_points=DEFAULT_POINTS, method="minmax"):
+    """
+    (x, y) with at most `max_points` points (unchanged if already short
+    enough or max_points is 0/None).
+    """
+    if not max_points or len(x) <= max_points:
+        return x, y
+    if method == "minmax":
+        return minmax(x, y, max(max_points // 2, 1))
+    if method == "lttb":
+        return lttb(x, y, max_points)
+    raise ValueError(f"unknown method {method}, expected one of {', '.join(METHODS)}")
+
+
+def plot_series(ax, x, y, *args, max_points=DEFAULT_POINTS, method="minmax", rasterize=False, **kwargs):
+    """
+    ax.plot(x, y, *args, **kwargs) with long series decimated first. With
+    `rasterize` a dense layer (more than max_points, or DEFAULT_POINTS if
+    decimation is off) is embedded as bitmap in vector output (PDF/SVG),
+    while axes and text stay vector.
+    """
+    if rasterize and len(x) > (max_points or DEFAULT_POINTS):
+        kwargs.setdefault("rasterized", True)
+    x, y = decimate(x, y, max_points, method)
+    return ax.plot(x, y, *args, **kwargs)
@@ -0,0 +1,143 @@
+"""
+Stand-in for the iperf3 client, for trying the orchestrator without a
+server or a network.
+
+Takes the client options the runners use (-c, -p, -t, -P, --congestion,
+--json, --json-stream, --forceflush) and prints output of the same shape
+as iperf3 (text, --json or --json-stream) at a constant rate. Behaviour
+is set by environment variables:
+
+    FAKE_IPERF3_SPEED       seconds of test time per second (default 1)
+    FAKE_IPERF3_RATE        Mbit/s per stream (default 100)
+    FAKE_IPERF3_FAIL_PORTS  comma-separated ports that refuse the
+                            connection, like a server that is not running
+
+    python -m throughput_tools.fake_iperf3 -c 127.0.0.1 -p 5201 -t 10 -P 2
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+
+def _parse(argv):
+    parser = argparse.ArgumentParser(prog="iperf3")
+    parser.add_argument("-c", "--client", required=True)
+    parser.add_argument("-p", "--port", type=int, default=5201)
+    parser.add_argument("-t", "--time", type=float, default=10)
+    parser.add_argument("-P", "--parallel", type=int, default=1)
+    parser.add_argument("-C", "--congestion", default="cubic")
+    parser.add_argument("-J", "--json", action="store_true")
+    parser.add_argument("--json-stream", action="store_true")
+    parser.add_argument("--forceflush", action="store_true")
+    return parser.parse_args(argv)
+
+
+def _units(value, base, units):
+    for unit in units[:-1]:
+        if value < 1000:
+            return value, unit
+        value /= base
+    return value, units[-1]
+
+
+def _text_row(stream, start, end, nbytes, rate, retr=None, cwnd=None, role=""):
+    size, size_unit = _units(nbytes, 1024.0, ["Bytes", "KBytes", "MBytes", "GBytes"])
+    bits, bits_unit = _units(rate, 1000.0, ["bits/sec", "Kbits/sec", "Mbits/sec", "Gbits/sec"])
+    ident = "SUM" if stream is None else f"{stream:3d}"
+    row = f"[{ident}] {start:6.2f}-{end:<6.2f} sec  {size:4.3g} {size_unit}  {bits:4.3g} {bits_unit}"
+    if retr is not None:
+        row += f"  {retr:3d}"
+    if cwnd is not None:
+        cwnd_value, cwnd_unit = _units(cwnd, 1024.0, ["Bytes", "KBytes", "MBytes", "GBytes"])
+        row += f"   {cwnd_value:4.3g} {cwnd_unit}"
+    return row + (f"  {role:>18}" if role else "")
+
+
+def main(argv=None):
+    args = _parse(sys.argv[1:] if argv is None else argv)
+    speed = float(os.environ.get("FAKE_IPERF3_SPEED", "1"))
+    rate = float(os.environ.get("FAKE_IPERF3_RATE", "100")) * 1e6
+    failing = {int(port) for port in os.environ.get("FAKE_IPERF3_FAIL_PORTS", "").split(",") if port.strip()}
+
+    def emit(text):
+        print(text, flush=True)
+
+    def event(name, data):
+        emit(json.dumps({"event": name, "data": data}))
+
+    if args.port in failing:
+        message = "unable to connect to server - server may have stopped running or use a different port, " \
+                  "firewall issue, etc.: Connection refused"
+        if args.json_stream:
+            event("error", message)
+        elif args.json:
+            emit(json.dumps({"start": {}, "intervals": [], "end": {}, "error": message}, indent="\t"))
+        else:
+            emit(f"iperf3: error - {message}")
+        return 1
+
+    streams = [5 + 2 * i for i in range(args.parallel)]
+    nbytes = rate / 8
+    start_info = {"connected": [{"socket": s, "remote_port": args.port} for s in streams],
+                  "test_start": {"protocol": "TCP", "num_streams": args.parallel, "duration": args.time},
+                  "tcp_mss_default": 1448, "congestion": args.congestion}
+    if args.json_stream:
+        event("start", start_info)
+    elif not args.json:
+        emit(f"Connecting to host {args.client}, port {args.port}")
+        for s in streams:
+            emit(f"[{s:3d}] local 127.0.0.1 port {40000 + s} connected to {args.client} port {args.port}")
+        emit("[ ID] Interval           Transfer     Bitrate         Retr  Cwnd")
+
+    intervals = []
+    began = time.monotonic()
+    second = 0
+    while second < args.time:
+        end = min(second + 1.0, args.time)
+        # Interval boundaries in (scaled) real time, like the real client
+        delay = began + end / speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        length = end - second
+        rows = [{"socket": s, "start": float(second), "end": end, "seconds": length, "bytes": int(nbytes * length),
+                 "bits_per_second": rate, "retransmits": 0, "snd_cwnd": 1258291, "rtt": 195000, "rttvar": 500,
+                 "omitted": False} for s in streams]
+        total = {"start": float(second), "end": end, "seconds": length, "bytes": sum(r["bytes"] for r in rows),
+                 "bits_per_second": rate * len(rows), "retransmits": 0, "omitted": False}
+        interval = {"streams": rows, "sum": total}
+        if args.json_stream:
+            event("interval", interval)
+        elif args.json:
+            intervals.append(interval)
+        else:
+            for row in rows:
+                emit(_text_row(row["socket"], row["start"], row["end"], row["bytes"], rate, 0, row["snd_cwnd"]))
+            if len(rows) > 1:
+                emit(_text_row(None, second, end, total["bytes"], total["bits_per_second"], 0))
+        second = end
+
+    sent = int(nbytes * args.time) * len(streams)
+    end_info = {"sum_sent": {"start": 0, "end": args.time, "seconds": args.time, "bytes": sent,
+                             "bits_per_second": rate * len(streams), "retransmits": 0},
+                "sum_received": {"start": 0, "end": args.time, "seconds": args.time, "bytes": sent,
+                                 "bits_per_second": rate * len(streams)}}
+    if args.json_stream:
+        event("end", end_info)
+    elif args.json:
+        emit(json.dumps({"start": start_info, "intervals": intervals, "end": end_info}, indent="\t"))
+    else:
+        emit("- - - - - - - - - - - - - - - - - - - - - - - - -")
+        emit("[ ID] Interval           Transfer     Bitrate         Retr")
+        for s in streams:
+            emit(_text_row(s, 0, args.time, sent / len(streams), rate, 0, role="sender"))
+            emit(_text_row(s, 0, args.time, sent / len(streams), rate, role="receiver"))
+        emit("")
+        emit("iperf Done.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Time binning of iperf3 interval rows.
+
+The rows of a log (text or JSON) are parsed once into arrays and then
+binned by their start time with np.bincount: fixed blocks (the
+0-150/150-300/... layout of throughput-per-interval.py), arbitrary
+boundaries, sliding windows and per-stream sums. sweep() bins any number
+of logs: the block sums of a whole log come from its cumulative transfer
+(cumulative.py), the per-stream sums from a single bincount over
+(file, stream, bin).
+"""
+
+import numpy as np
+
+from .iperf_log import load_log, SUM_STREAM
+from .cumulative import cumulative_transfer
+
+
+def fixed_edges(block_duration=150, num_blocks=4, start=0.0):
+    """
+    Bin boundaries of `num_blocks` blocks of `block_duration` seconds.
+    """
+    return start + np.arange(num_blocks + 1) * float(block_duration)
+
+
+def regular_rows(log, tolerance=0.1):
+    """
+    Mask of the ~1 s rows of the single streams. Drops the [SUM] rows and
+    the shorter last interval, as throughput-per-interval.py always did.
+    """
+    return (log["stream"] != SUM_STREAM) & (np.abs(log["end"] - log["start"] - 1.0) <= tolerance)
+
+
+def bin_index(start, edges):
+    """
+    Bin of each start time for ascending `edges`, -1 outside
+    [edges[0], edges[-1]).
+    """
+    index = np.searchsorted(edges, start, side="right") - 1
+    index[(start < edges[0]) | (start >= edges[-1])] = -1
+    return index
+
+
+def bin_sums(start, values, edges, groups=None, num_groups=None):
+    """
+    Sum of `values` per bin, rows binned by their start time. With
+    `groups` (ints 0..num_groups-1) an array of shape (num_groups, bins).
+    """
+    edges = np.asarray(edges, dtype=np.float64)
+    num_bins = len(edges) - 1
+    index = bin_index(np.asarray(start, dtype=np.float64), edges)
+    keep = index >= 0
+    values = np.asarray(values, dtype=np.float64)[keep]
+    if groups is None:
+        return np.bincount(index[keep], weights=values, minlength=num_bins)
+    groups = np.asarray(groups)
+    if num_groups is None:
+        num_groups = int(groups.max()) + 1 if len(groups) else 0
+    flat = groups[keep] * num_bins + index[keep]
+    return np.bincount(flat, weights=values, minlength=num_groups * num_bins).reshape(num_groups, num_bins)
+
+
+def sliding_sums(start, values, window, step=1.0, t_start=0.0, t_end=None):
+    """
+    (window starts, sums) over the windows [t, t + window) for t =
+    t_start, t_start + step, ... as long as the window ends before
+    `t_end` (default: end of the last row).
+    """
+    start = np.asarray(start, dtype=np.float64)
+    order = np.argsort(start, kind="stable")
+    start = start[order]
+    cumulative = np.concatenate(([0.0], np.cumsum(np.asarray(values, dtype=np.float64)[order])))
+    if t_end is None:
+        t_end = start[-1] + 1.0 if len(start) else t_start
+    count = max(int(np.floor((t_end - window - t_start) / step + 1e-9)) + 1, 0)
+    lefts = t_start + step * np.arange(count)
+    sums = cumulative[np.searchsorted(start, lefts + window)] - cumulative[np.searchsorted(start, lefts)]
+    return lefts, sums
+
+
+def sweep(paths, edges, per_stream=False):
+    """
+    Bytes per bin of many logs. Returns a list of (path, stream, sums) in
+    input order; stream is SUM_STREAM for the sum over all streams of a
+    file. The sums of a whole file come from its cumulative transfer
+    (cumulative.py, like the phases of plot-graph.py); the per-stream sums
+    of all files from one bincount over (file, stream, bin).
+    """
+    paths = list(paths)
+    if not per_stream:
+        result = []
+        for path in paths:
+            log = load_log(path)
+            mask = regular_rows(log)
+            transfer = cumulative_transfer(log["start"][mask], log["end"][mask], log["bytes"][mask], edges)
+            result.append((path, SUM_STREAM, transfer["phase_bytes"]))
+        return result
+
+    starts, values, keys = [], [], []
+    for i, path in enumerate(paths):
+        log = load_log(path)
+        mask = regular_rows(log)
+        starts.append(log["start"][mask])
+        values.append(log["bytes"][mask])
+        # file index in the high bits, stream id (+1 so SUM_STREAM maps to 0) in the low ones
+        keys.append((np.int64(i) << 32) | (log["stream"][mask] + 1))
+    if not paths:
+        return []
+
+    keys = np.concatenate(keys)
+    groups_keys, groups = np.unique(keys, return_inverse=True)
+    sums = bin_sums(np.concatenate(starts), np.concatenate(values), edges, groups, len(groups_keys))
+    return [(paths[key >> 32], int(key & 0xFFFFFFFF) - 1, row) for key, row in zip(groups_keys, sums)]
+
+
+def format_bins(sums, starts, ends, label="Interval"):
+    """
+    Report lines in the format of throughput-per-interval.py: TP-Sum in
+    MBytes (1024-based) and the mean rate of the bin in Mbit/s.
+    """
+    lines = []
+    for sum_bytes, start, end in zip(sums, starts, ends):
+        tp_sum_mbytes = sum_bytes / (1024**2)
+        throughput_mbit = (sum_bytes * 8) / ((end - start) * 1e6)
+        lines.append(f"{label} {start:.0f} - {end:.0f} sec: TP-Sum = {tp_sum_mbytes:.2f} MBytes; {throughput_mbit:.2f} Mbit/s")
+    return lines
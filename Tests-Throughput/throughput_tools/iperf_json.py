@@ -0,0 +1,87 @@
+"""
+Loader for iperf3 JSON output: `iperf3 --json` (one document) and
+`iperf3 --json-stream` (iperf3 >= 3.17, one {"event": ..., "data": ...}
+object per line). Byte counts, RTT and cwnd come exactly as measured,
+without the rounding of the text format.
+
+The columns are the ones of iperf_log.parse_iperf_log plus rtt_us and
+rttvar_us, so both formats can be used interchangeably.
+"""
+
+import json
+
+import numpy as np
+
+from .iperf_log import COLUMNS, SUM_STREAM
+
+JSON_COLUMNS = COLUMNS + ("rtt_us", "rttvar_us")
+
+
+def _load(path):
+    """
+    The iperf3 result as {"start": ..., "intervals": [...], "end": ...},
+    also for --json-stream files.
+    """
+    with open(path) as f:
+        text = f.read()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    result = {"intervals": []}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        event = json.loads(line)
+        if event.get("event") == "interval":
+            result["intervals"].append(event["data"])
+        elif "event" in event:
+            result[event["event"]] = event.get("data")
+    return result
+
+
+def iperf_intervals(result):
+    """
+    Columns of the intervals of a parsed iperf3 result (e.g. also the one
+    embedded in the pscheduler diags). Like the text output there are
+    [SUM] rows (stream -1) only for runs with parallel streams. Omitted
+    intervals (-O) are left out.
+    """
+    rows = []
+    for interval in result.get("intervals", []):
+        streams = interval.get("streams", [])
+        entries = [(stream.get("socket", 0), stream) for stream in streams]
+        if len(streams) > 1 and "sum" in interval:
+            entries.append((SUM_STREAM, interval["sum"]))
+        for stream_id, data in entries:
+            if data.get("omitted"):
+                continue
+            rows.append((
+                stream_id,
+                data["start"],
+                data["end"],
+                data["bytes"],
+                data["bits_per_second"],
+                data.get("retransmits", np.nan),
+                data.get("snd_cwnd", np.nan),
+                data.get("rtt", np.nan),
+                data.get("rttvar", np.nan),
+            ))
+
+    columns = list(zip(*rows)) if rows else [()] * len(JSON_COLUMNS)
+    log = {name: np.array(values, dtype=np.float64) for name, values in zip(JSON_COLUMNS, columns)}
+    log["stream"] = log["stream"].astype(np.int64)
+    return log
+
+
+def load_iperf_json(path):
+    """
+    Interval columns of an iperf3 --json or --json-stream file. Raises
+    ValueError if iperf3 reported an error and measured nothing.
+    """
+    result = _load(path)
+    log = iperf_intervals(result)
+    error = result.get("error") or (result.get("end") or {}).get("error")
+    if error and not len(log["start"]):
+        raise ValueError(f"{path}: iperf3 error: {error}")
+    return log
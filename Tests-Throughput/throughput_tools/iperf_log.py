@@ -0,0 +1,312 @@
+"""
+Parser for iperf3 client output in the human-readable text format
+(the main_*.log / bg*_*.log files and the Txt-Files-BG-* logs).
+
+The interval rows of all streams ("[  5]", "[  7]", ...) and the
+"[SUM]" rows of -P runs are cut out with one regex pass per chunk of the
+file, turned into plain numbers with bytes.translate and converted to
+one float array; only rows of an unexpected shape go through the slower
+per-row regex. Both paths skip the "(omitted)" rows of iperf3 -O.
+
+    python -m throughput_tools.iperf_log [--name PATTERN] <log|dir|glob>...
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+import numpy as np
+
+# Transfer column: iperf3 uses 1024-based units
+BYTE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+# Bitrate column: 1000-based
+BIT_UNITS = {"": 1, "K": 1e3, "M": 1e6, "G": 1e9, "T": 1e12}
+
+# "[  5]   1.00-2.00   sec  8.75 MBytes  73.4 Mbits/sec    4    923 KBytes"
+# Rows ending in "(omitted)" (iperf3 -O) do not match.
+INTERVAL_LINE = re.compile(
+    rb"^(?![^\n]*\(omitted\))\[\s*(\d+|SUM)\]\s+(\d+\.\d+)-\s*(\d+\.\d+)\s+sec\s+([\d.]+)\s+([KMGT]?)Bytes"
+    rb"\s+([\d.]+)\s+([KMGT]?)bits/sec(?:[ \t]+(\d+))?(?:[ \t]+([\d.]+)[ \t]+([KMGT]?)Bytes)?[ \t]*(sender|receiver)?",
+    re.MULTILINE
+)
+
+# Stream id of the [SUM] rows
+SUM_STREAM = -1
+
+# Fast path: interval rows only (no sender/receiver or "(omitted)" suffix)
+# are turned into numbers by one translate: "KBytes" -> "10" (1024**1),
+# "Mbits/sec" -> "20" (1000**2), "[", "]", "-" and "sec" -> blanks.
+INTERVAL_ROW = re.compile(
+    rb"^\[[ \dSUM]+\] +\d+\.\d+-[^\n]*bits/sec[ \t\d.KMGTBytes]*$", re.MULTILINE
+)
+_TOKENS = bytes.maketrans(b"[]-KMGTBb", b"   123400")
+_LETTERS = b"ytesic/\r"
+# Row separator, larger than any value iperf3 prints
+_ROW_END = 1e20
+_SEPARATOR = b" 100000000000000000000 "
+_SUM_ID = b"[4294967295]"
+
+COLUMNS = ("stream", "start", "end", "bytes", "bits_per_second", "retransmits", "cwnd_bytes")
+
+# Lines are matched per chunk of this many bytes (cut at a line end)
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def _chunks(path, chunk_size=CHUNK_SIZE):
+    with open(path, "rb") as f:
+        rest = b""
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            data = rest + data
+            cut = data.rfind(b"\n") + 1
+            rest = data[cut:]
+            yield data[:cut]
+        if rest:
+            yield rest
+
+
+def _scale(values, units, table):
+    """
+    float(values) * table[unit] for byte string columns.
+    """
+    names, index = np.unique(units, return_inverse=True)
+    factors = np.array([table[name.decode()] for name in names], dtype=np.float64)
+    return values.astype(np.float64) * factors[index]
+
+
+def _optional(values, units=None, table=None):
+    """
+    Like _scale for columns iperf3 does not always print, NaN if empty.
+    """
+    result = np.full(len(values), np.nan)
+    present = values != b""
+    if units is None:
+        result[present] = values[present].astype(np.float64)
+    else:
+        result[present] = _scale(values[present], units[present], table)
+    return result
+
+
+def _convert(rows):
+    if not rows:
+        return {name: np.array([], dtype=np.int64 if name == "stream" else np.float64) for name in COLUMNS}
+    table = np.array(rows, dtype=object).astype(bytes)
+    stream, start, end, value, unit, rate, rate_unit, retr, cwnd, cwnd_unit, _ = table.T
+    return {
+        "stream": np.where(stream == b"SUM", b"-1", stream).astype(np.int64),
+        "start": start.astype(np.float64),
+        "end": end.astype(np.float64),
+        "bytes": _scale(value, unit, BYTE_UNITS),
+        "bits_per_second": _scale(rate, rate_unit, BIT_UNITS),
+        "retransmits": _optional(retr),
+        "cwnd_bytes": _optional(cwnd, cwnd_unit, BYTE_UNITS),
+    }
+
+
+def _parse_fast(chunk):
+    """
+    Columns of the interval rows of a chunk, or None if a row does not
+    have one of the usual shapes (7, 8 or 10 numbers).
+    """
+    lines = INTERVAL_ROW.findall(chunk)
+    if not lines:
+        return _convert([])
+    text = _SEPARATOR.join(lines).replace(b"[SUM]", _SUM_ID).translate(_TOKENS, _LETTERS) + _SEPARATOR
+    try:
+        flat = np.array(text.split(), dtype=np.float64)
+    except ValueError:
+        # A token that is no number
+        return None
+    ends = np.flatnonzero(flat == _ROW_END)
+    if len(ends) != len(lines):
+        return None
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    width = ends - starts
+    if not np.all((width == 7) | (width == 8) | (width == 10)):
+        return None
+
+    stream = flat[starts].astype(np.int64)
+    stream[stream == int(_SUM_ID[1:-1])] = SUM_STREAM
+    retr = np.full(len(starts), np.nan)
+    retr[width >= 8] = flat[starts[width >= 8] + 7]
+    cwnd = np.full(len(starts), np.nan)
+    full = starts[width == 10]
+    cwnd[width == 10] = flat[full + 8] * 1024.0 ** (flat[full + 9] / 10)
+    return {
+        "stream": stream,
+        "start": flat[starts + 1],
+        "end": flat[starts + 2],
+        "bytes": flat[starts + 3] * 1024.0 ** (flat[starts + 4] / 10),
+        "bits_per_second": flat[starts + 5] * 1000.0 ** (flat[starts + 6] / 10),
+        "retransmits": retr,
+        "cwnd_bytes": cwnd,
+    }
+
+
+def _parse_regex(chunk):
+    return _convert([row for row in INTERVAL_LINE.findall(chunk) if not row[10]])
+
+
+def parse_iperf_log(path):
+    """
+    Interval rows of an iperf3 text log as dict of numpy arrays:
+    stream ([SUM] = -1), start, end, bytes, bits_per_second, retransmits
+    and cwnd_bytes (NaN if not printed). The final sender/receiver
+    summary rows are left out.
+    """
+    parts = []
+    for chunk in _chunks(path):
+        columns = _parse_fast(chunk)
+        parts.append(columns if columns is not None else _parse_regex(chunk))
+    if len(parts) == 1:
+        return parts[0]
+    return {name: np.concatenate([part[name] for part in parts]) if parts else _convert([])[name]
+            for name in COLUMNS}
+
+
+def load_log(path):
+    """
+    Interval columns of an iperf3 log in text or JSON format (--json,
+    --json-stream), told apart by the first character of the file.
+    """
+    with open(path, "rb") as f:
+        head = f.read(64).lstrip()
+    if head.startswith(b"{"):
+        from .iperf_json import load_iperf_json
+        return load_iperf_json(path)
+    return parse_iperf_log(path)
+
+
+def select(log, mask):
+    return {name: values[mask] for name, values in log.items()}
+
+
+def stream_ids(log):
+    """
+    Ids of the single streams (without [SUM]).
+    """
+    return np.unique(log["stream"][log["stream"] != SUM_STREAM])
+
+
+def stream_series(log):
+    """
+    {stream id: series} of the single streams, each series a dict of
+    arrays like the log itself.
+    """
+    return {int(stream): select(log, log["stream"] == stream) for stream in stream_ids(log)}
+
+
+def aggregate_series(log):
+    """
+    The series of all streams together: the [SUM] rows of a -P log, or
+    the only stream. Without [SUM] rows but several streams the streams
+    are added per interval start (cwnd is NaN then).
+    """
+    if np.any(log["stream"] == SUM_STREAM):
+        return select(log, log["stream"] == SUM_STREAM)
+    streams = stream_ids(log)
+    if len(streams) <= 1:
+        return log
+    starts, index = np.unique(log["start"], return_inverse=True)
+    series = {"stream": np.full(len(starts), SUM_STREAM), "start": starts}
+    series["end"] = np.zeros(len(starts))
+    np.maximum.at(series["end"], index, log["end"])
+    for name in ("bytes", "bits_per_second", "retransmits"):
+        series[name] = np.bincount(index, weights=np.nan_to_num(log[name]), minlength=len(starts))
+    series["cwnd_bytes"] = np.full(len(starts), np.nan)
+    return series
+
+
+def stream_matrix(log, column="bits_per_second"):
+    """
+    (stream ids, interval starts, array of shape (streams, intervals)) of
+    one column of the single streams; NaN where a stream has no row.
+    """
+    rows = log["stream"] != SUM_STREAM
+    streams, stream_index = np.unique(log["stream"][rows], return_inverse=True)
+    starts, start_index = np.unique(log["start"][rows], return_inverse=True)
+    matrix = np.full((len(streams), len(starts)), np.nan)
+    matrix[stream_index, start_index] = log[column][rows]
+    return streams, starts, matrix
+
+
+def jain_index(matrix):
+    """
+    Jain's fairness index per column of a (streams, intervals) array,
+    (sum x)^2 / (n * sum x^2): 1 for equal shares, 1/n if one stream
+    gets everything. NaN for intervals without traffic.
+    """
+    values = np.nan_to_num(np.asarray(matrix, dtype=np.float64))
+    squares = (values ** 2).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(squares > 0, values.sum(axis=0) ** 2 / (values.shape[0] * squares), np.nan)
+
+
+def parse_parameters(path):
+    """
+    parameters.txt of a More-and-more test as flat dict. Keys inside a
+    section get the section as prefix, e.g.
+    "Background Flow 1/Parallel Streams".
+    """
+    params = {}
+    section = None
+    with open(path, errors="replace") as f:
+        for line in f:
+            if not line.strip():
+                section = None
+                continue
+            if line.strip() == "Terminal comments:":
+                # Everything below is appended script output
+                break
+            key, sep, value = line.strip().partition(":")
+            if not sep:
+                if section and line[:1].isspace():
+                    # e.g. the tc command below "TC Netem Settings:"
+                    params[section] = line.strip()
+                continue
+            if not value.strip():
+                # "Background Flow 1:" starts a section of indented lines
+                section = key.strip()
+                continue
+            if section and line[:1].isspace():
+                params[f"{section}/{key.strip()}"] = value.strip()
+            else:
+                section = None
+                params[key.strip()] = value.strip()
+    return params
+
+
+def main(argv=None):
+    from .pscheduler import expand_inputs
+
+    parser = argparse.ArgumentParser(description="Per-stream summary and fairness of iperf3 text logs.")
+    parser.add_argument("inputs", nargs="+", help="log files, directories or globs")
+    parser.add_argument("--name", default="*.log", help="file pattern in directories (default: *.log)")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    files = expand_inputs(args.inputs, args.name)
+    start = time.perf_counter()
+    size = 0
+    print("file,streams,intervals,mean_mbps,retransmits,min_stream_mbps,max_stream_mbps,mean_jain")
+    for path in files:
+        size += os.path.getsize(path)
+        log = load_log(path)
+        if not len(log["start"]):
+            # e.g. terminal_output.log
+            continue
+        total = aggregate_series(log)
+        _, _, rates = stream_matrix(log)
+        per_stream = np.nanmean(rates, axis=1) / 1e6 if rates.size else np.array([np.nan])
+        fairness = np.nanmean(jain_index(rates)) if rates.shape[0] > 1 else np.nan
+        print(f"{path},{rates.shape[0]},{len(total['start'])},{np.mean(total['bits_per_second']) / 1e6:.2f},"
+              f"{np.nansum(total['retransmits']):.0f},{np.min(per_stream):.2f},{np.max(per_stream):.2f},{fairness:.3f}")
+    elapsed = time.perf_counter() - start
+    print(f"{len(files)} logs, {size / 1e6:.1f} MB in {elapsed:.3f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
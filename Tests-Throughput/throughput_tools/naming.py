@@ -0,0 +1,80 @@
+"""
+File name schemas of the pscheduler JSON files.
+
+The runners name their output either `<algo>_test_<date>_<time>.json`
+(Optimistic/Realistic tests) or `<prefix>_<algo>_<date>_<time>.json`
+(Initial tests). A schema maps the "_"-separated parts to fields and
+builds the measurement label used for the plot file name.
+"""
+
+import os
+import re
+
+
+class FilenameSchema:
+    """
+    `fields` names the "_"-separated parts of the file name (without
+    extension), `label` is a format string over these fields.
+    """
+
+    def __init__(self, name, fields, label):
+        self.name = name
+        self.fields = fields
+        self.label = label
+
+    def parse(self, path):
+        """
+        Dict of the named fields plus "label", or None if the name does
+        not fit this schema.
+        """
+        parts = os.path.basename(path).split(".")[0].split("_")
+        if len(parts) != len(self.fields):
+            return None
+        info = dict(zip(self.fields, parts))
+        info["label"] = self.label.format(**info)
+        return info
+
+
+SCHEMAS = {}
+
+
+def register_schema(name, fields, label):
+    SCHEMAS[name] = FilenameSchema(name, fields, label)
+    return SCHEMAS[name]
+
+
+# Plots of these runs have always been named plot_<algo>_<time>_<date>.pdf
+register_schema("algo_test_date_time", ("algo", "test", "date", "time"), "{algo}_{time}_{date}")
+register_schema("_algo_date_time", ("test", "algo", "date", "time"), "{algo}_{date}_{time}")
+
+
+def _plausible(info):
+    return bool(re.fullmatch(r"\d{8}", info.get("date", ""))
+                and re.fullmatch(r"\d{4}", info.get("time", "")))
+
+
+def detect_schema(path):
+    """
+    The first registered schema whose date/time fields look like
+    YYYYMMDD/HHMM for this file name, or None.
+    """
+    for schema in SCHEMAS.values():
+        info = schema.parse(path)
+        if info is not None and _plausible(info):
+            return schema
+    return None
+
+
+def parse_filename(path, schema=None):
+    """
+    Fields and label of a file name. `schema` is a registered name, a
+    FilenameSchema or None for auto detection. Returns None if it does
+    not match.
+    """
+    if schema is None:
+        schema = detect_schema(path)
+        if schema is None:
+            return None
+    elif isinstance(schema, str):
+        schema = SCHEMAS[schema]
+    return schema.parse(path)
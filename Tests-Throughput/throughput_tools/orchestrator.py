@@ -0,0 +1,644 @@
+"""
+Asyncio runner for the More-and-more tests: the main iperf3 flow and the
+three background flows of run-test-new.sh, driven from one event loop
+instead of sleep/pgrep polling.
+
+- The flows start on one monotonic timeline (main at 0 s, bg1..bg3 at
+  150/300/450 s); a late start does not push the following ones back.
+- A failed start is noticed as soon as iperf3 exits or prints
+  "iperf3: error", not after a fixed 15 s. A background flow is retried
+  once with the duration shortened so that it still ends on time; if
+  that fails too, or the main flow fails, all flows are stopped and
+  netem is removed.
+- stdout of every flow goes line by line into its log file and into a
+  parser at the same time, so the interval columns (as from
+  iperf_log.load_log) are ready when the flows end.
+
+The test directory looks like one of run-test-new.sh (same log names,
+parameters.txt, terminal_output.log), so plot-graph.py, the store and
+throughput-per-interval.py read it unchanged. PschedulerExperiment runs
+the pscheduler tests of run-real-*-test.sh the same way (background
+iperf3 flows, then the pscheduler task); campaign.py runs whole series
+of either. For a dry run on one
+machine use local iperf3 servers (`iperf3 -s -p 5201` ...) or the
+stand-in, e.g.
+
+    FAKE_IPERF3_SPEED=100 python -m throughput_tools.orchestrator cubic 1 1 1 1 \\
+        --server 127.0.0.1 --no-netem --time-scale 0.01 \\
+        --iperf "python throughput_tools/fake_iperf3.py"
+"""
+
+import os
+import sys
+import json
+import math
+import shlex
+import asyncio
+import argparse
+import datetime
+
+import numpy as np
+
+from .iperf_log import INTERVAL_LINE, _convert, aggregate_series
+from .iperf_json import iperf_intervals
+from .pscheduler import interval_columns
+from .cumulative import cumulative_transfer, phase_edges
+from .intervals import format_bins
+
+SERVER = "10.42.0.1"
+DEVICE = "enp2s0"
+NETEM = "delay 195ms 1.6ms distribution paretonormal"
+PSCHEDULER = "sudo pscheduler"
+
+# iperf3 options and log file extension per IPERF_FORMAT
+FORMATS = {
+    "text": ([], "log"),
+    "json": (["--json"], "json"),
+    "json-stream": (["--json-stream"], "json"),
+}
+
+# Port, duration (s) and start (s after the main flow) as in run-test-new.sh
+MAIN_FLOW = (5201, 700, 0)
+BG_FLOWS = ((5002, 550, 150), (5001, 400, 300), (5101, 250, 450))
+
+# A flow that has neither connected nor exited by then counts as running
+START_TIMEOUT = 15.0
+# Pause before the second attempt of a failed flow (the server may still
+# be busy with the previous test)
+RETRY_DELAY = 5.0
+ATTEMPTS = 2
+
+# run-real-*-test.sh: the background flows start this long before the
+# pscheduler measurement and run this much longer than it
+WARMUP = 5
+BG_EXTRA = 20
+
+
+class FlowFailed(Exception):
+    pass
+
+
+class Flow:
+    """
+    One iperf3 client of a test: name (main, bg1, ...), server port,
+    duration and start offset in seconds, congestion control, the
+    number of parallel streams (None: no -P) and the log file relative
+    to the test directory (None: named by the experiment).
+    """
+
+    def __init__(self, name, port, duration, offset=0.0, cca="cubic", parallel=None, log=None):
+        self.name = name
+        self.port = port
+        self.duration = duration
+        self.offset = offset
+        self.cca = cca
+        self.parallel = parallel
+        self.log = log
+
+    @property
+    def label(self):
+        if self.name == "main":
+            return "main flow"
+        return f"background flow {self.name[2:]}" if self.name.startswith("bg") else self.name
+
+
+def default_flows(cca, bg_parallel):
+    """
+    The flows of run-test-new.sh: main with `cca`, bg1..bg3 with cubic
+    and bg_parallel[i] streams.
+    """
+    port, duration, offset = MAIN_FLOW
+    flows = [Flow("main", port, duration, offset, cca)]
+    for i, ((port, duration, offset), parallel) in enumerate(zip(BG_FLOWS, bg_parallel), 1):
+        flows.append(Flow(f"bg{i}", port, duration, offset, "cubic", int(parallel)))
+    return flows
+
+
+class LiveParser:
+    """
+    Parses the output of one flow line by line while it is written: the
+    interval rows of the text format, the events of --json-stream, or the
+    --json document once it is complete. `connected` turns True at the
+    first sign of a working connection (never for --json, which prints
+    nothing before the end).
+    """
+
+    def __init__(self, log_format="text"):
+        self.format = log_format
+        self.connected = False
+        self.errors = []
+        self._rows = []
+        self._intervals = []
+        self._lines = []
+
+    def feed(self, line):
+        if self.format == "json":
+            self._lines.append(line)
+            return
+        if self.format == "text":
+            match = INTERVAL_LINE.match(line)
+            if match:
+                self.connected = True
+                if not match.group(11):
+                    self._rows.append(tuple(group or b"" for group in match.groups()))
+            elif b"connected to" in line:
+                self.connected = True
+            elif line.startswith(b"iperf3: error"):
+                self.errors.append(line.decode(errors="replace").strip())
+            return
+        try:
+            event = json.loads(line)
+        except ValueError:
+            return
+        name = event.get("event")
+        if name in ("start", "interval"):
+            self.connected = True
+        if name == "interval":
+            self._intervals.append(event["data"])
+        elif name == "error":
+            self.errors.append(f"iperf3: error - {event.get('data')}")
+
+    def error(self, text):
+        self.errors.append(text)
+
+    def log(self):
+        """
+        Interval columns of everything fed so far.
+        """
+        if self.format == "text":
+            return _convert(self._rows)
+        if self.format == "json-stream":
+            return iperf_intervals({"intervals": self._intervals})
+        try:
+            result = json.loads(b"".join(self._lines)) if self._lines else {}
+        except ValueError:
+            result = {}
+        if result.get("error"):
+            self.errors.append(f"iperf3: error - {result['error']}")
+        return iperf_intervals(result)
+
+
+class PschedulerParser(LiveParser):
+    """
+    Collects the JSON of `pscheduler task --format json throughput`,
+    which is printed at the end of the task.
+    """
+
+    def __init__(self):
+        super().__init__("json")
+
+    def log(self):
+        text = b"".join(self._lines)
+        try:
+            result = json.loads(text[text.find(b"{"):]) if b"{" in text else {}
+        except ValueError:
+            result = {}
+        if result.get("succeeded") is False:
+            self.errors.append(f"pscheduler: {result.get('error', 'task did not succeed')}")
+        return interval_columns(result)
+
+
+class Experiment:
+    """
+    One test run: starts `flows` against `server`, writes the logs,
+    parameters.txt and terminal_output.log into `test_dir` and keeps the
+    parsed interval columns per flow in `results`.
+
+    `time_scale` stretches the start offsets and the retry delay (0.01
+    runs the 150 s steps in 1.5 s, for dry runs against a sped-up
+    stand-in); the durations passed to iperf3 stay as they are.
+    """
+
+    def __init__(self, flows, test_dir, stamp, test_number, server=SERVER, iperf="iperf3", log_format="text",
+                 netem=NETEM, device=DEVICE, time_scale=1.0, start_timeout=START_TIMEOUT, retry_delay=RETRY_DELAY):
+        if log_format not in FORMATS:
+            raise ValueError(f"unknown log format {log_format!r} (text, json or json-stream)")
+        self.flows = flows
+        self.test_dir = test_dir
+        self.stamp = stamp
+        self.test_number = test_number
+        self.server = server
+        self.iperf = shlex.split(iperf) if isinstance(iperf, str) else list(iperf)
+        self.log_format = log_format
+        self.netem = netem
+        self.device = device
+        self.time_scale = time_scale
+        self.start_timeout = start_timeout
+        self.retry_delay = retry_delay
+        self.results = {}
+        self._processes = {}
+        self._terminal = None
+        self._t0 = None
+
+    @property
+    def parameters_path(self):
+        return os.path.join(self.test_dir, "parameters.txt")
+
+    @property
+    def terminal_path(self):
+        return os.path.join(self.test_dir, "terminal_output.log")
+
+    def log_path(self, flow):
+        if flow.log:
+            return os.path.join(self.test_dir, flow.log)
+        return os.path.join(self.test_dir, f"{flow.name}_{self.stamp}_test{self.test_number}.{FORMATS[self.log_format][1]}")
+
+    def open_log(self, flow):
+        path = self.log_path(flow)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return open(path, "wb")
+
+    def parser(self, flow):
+        return LiveParser(self.log_format)
+
+    def netem_command(self, action="add"):
+        command = ["sudo", "tc", "qdisc", action, "dev", self.device, "root", "netem"]
+        return command + shlex.split(self.netem) if action == "add" else command
+
+    def command(self, flow, duration):
+        command = self.iperf + ["-c", self.server, "-p", str(flow.port), "-t", str(duration), "--congestion", flow.cca]
+        if flow.parallel:
+            command += ["-P", str(flow.parallel)]
+        # without --forceflush iperf3 buffers its output when writing to a pipe
+        return command + FORMATS[self.log_format][0] + ([] if self.log_format == "json" else ["--forceflush"])
+
+    def say(self, text):
+        print(text, flush=True)
+        if self._terminal is not None:
+            self._terminal.write(text + "\n")
+            self._terminal.flush()
+
+    def write_parameters(self):
+        """
+        parameters.txt in the layout of run-test-new.sh.
+        """
+        main, background = self.flows[0], self.flows[1:]
+        lines = [
+            f"{'Test Number:':<25}{self.test_number}",
+            f"{'Date & Time:':<25}{self.stamp}",
+            f"{'Server IP:':<25}{self.server}",
+            f"{'Main Flow Port:':<25}{main.port}",
+            f"{'Main Flow Duration:':<25}{main.duration} seconds",
+            f"{'Main Flow Congestion:':<25}{main.cca}",
+            f"{'Log Format:':<25}{self.log_format}",
+            "",
+        ]
+        for i, flow in enumerate(background, 1):
+            lines += [
+                f"Background Flow {i}:",
+                f"  {'Port:':<21}{flow.port}",
+                f"  {'Duration:':<21}{flow.duration} seconds (shortened to end on time if restarted)",
+                f"  {'Parallel Streams:':<21}{flow.parallel or 1}",
+                f"  {'Congestion Control:':<21}{flow.cca}",
+                "",
+            ]
+        lines += ["TC Netem Settings:", "  " + (shlex.join(self.netem_command()) if self.netem else "none"), "", ""]
+        with open(self.parameters_path, "w") as f:
+            f.write("\n".join(lines))
+
+    def clock(self):
+        """
+        Test seconds since the main flow start.
+        """
+        return (asyncio.get_running_loop().time() - self._t0) / self.time_scale
+
+    async def _sleep_until(self, offset):
+        loop = asyncio.get_running_loop()
+        delay = self._t0 + offset * self.time_scale - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _pump(self, stream, log, parser, ready):
+        async for line in stream:
+            log.write(line)
+            parser.feed(line)
+            if parser.connected or parser.errors:
+                ready.set()
+
+    async def _pump_stderr(self, flow, stream, parser, ready):
+        # JSON formats: stderr is kept out of the log so the JSON stays valid
+        async for line in stream:
+            text = line.decode(errors="replace").rstrip()
+            self.say(f"[{flow.name}] {text}")
+            if text.startswith("iperf3: error"):
+                parser.error(text)
+                ready.set()
+
+    async def _attempt(self, flow, duration, attempt):
+        """
+        Starts one attempt of `flow`; returns (process, parser, pumps, log)
+        once it is connected, has been running for start_timeout, or has
+        ended without error, and raises FlowFailed otherwise.
+        """
+        port = f" on port {flow.port}" if flow.port else ""
+        parallel = f"{flow.parallel} parallel streams and " if flow.parallel else ""
+        self.say(f"Starting {flow.label}{port} (attempt {attempt}) with {parallel}congestion control "
+                 f"{flow.cca} for {duration} seconds...")
+        parser = self.parser(flow)
+        log = self.open_log(flow)
+        stderr = asyncio.subprocess.STDOUT if parser.format == "text" else asyncio.subprocess.PIPE
+        try:
+            process = await asyncio.create_subprocess_exec(*self.command(flow, duration), stdout=asyncio.subprocess.PIPE,
+                                                           stderr=stderr, limit=2**24)
+        except OSError as exc:
+            log.close()
+            raise FlowFailed(str(exc)) from exc
+        self._processes[flow.name] = process
+        ready = asyncio.Event()
+        pumps = [asyncio.create_task(self._pump(process.stdout, log, parser, ready))]
+        if process.stderr is not None:
+            pumps.append(asyncio.create_task(self._pump_stderr(flow, process.stderr, parser, ready)))
+
+        # whatever comes first: exit, first output line that shows the
+        # connection or an error, or the timeout
+        exited = asyncio.create_task(process.wait())
+        waiting = asyncio.create_task(ready.wait())
+        try:
+            await asyncio.wait([exited, waiting], timeout=self.start_timeout, return_when=asyncio.FIRST_COMPLETED)
+            if exited.done():
+                await asyncio.gather(*pumps)
+                if process.returncode != 0 or parser.errors:
+                    reason = parser.errors[-1] if parser.errors else f"exit status {process.returncode}"
+                    raise FlowFailed(reason)
+            elif parser.errors:
+                process.terminate()
+                await exited
+                await asyncio.gather(*pumps)
+                raise FlowFailed(parser.errors[-1])
+        except BaseException:
+            # also on cancellation (another flow failed): the process
+            # itself is stopped by run() via self._processes
+            for pump in pumps:
+                pump.cancel()
+            log.close()
+            raise
+        finally:
+            waiting.cancel()
+            exited.cancel()
+        return process, parser, pumps, log
+
+    async def _run_flow(self, flow):
+        await self._sleep_until(flow.offset)
+        duration = flow.duration
+        for attempt in range(1, ATTEMPTS + 1):
+            try:
+                process, parser, pumps, log = await self._attempt(flow, duration, attempt)
+                break
+            except FlowFailed as exc:
+                self.say(f"{flow.label.capitalize()} failed to start on attempt {attempt} ({exc}).")
+                # a shortened main flow would not be comparable to the
+                # other runs and shift the phases, so only background
+                # flows are retried
+                if flow is self.flows[0]:
+                    raise
+                if attempt == ATTEMPTS:
+                    self.say(f"{flow.label.capitalize()} failed after retrying.")
+                    raise
+            await self._sleep_until(self.clock() + self.retry_delay)
+            # end at the same time as the first attempt would have
+            duration = flow.duration - math.ceil(self.clock() - flow.offset)
+            if duration <= 0:
+                raise FlowFailed(f"no time left to retry {flow.label}")
+        self.say(f"{flow.label.capitalize()} is running ({self.clock():.1f} s into the test).")
+
+        try:
+            await process.wait()
+            await asyncio.gather(*pumps)
+        except BaseException:
+            for pump in pumps:
+                pump.cancel()
+            raise
+        finally:
+            log.close()
+        self.results[flow.name] = parser.log()
+        if process.returncode != 0 or parser.errors:
+            reason = parser.errors[-1] if parser.errors else f"exit status {process.returncode}"
+            self.say(f"{flow.label.capitalize()} failed ({reason}).")
+            raise FlowFailed(f"{flow.label} failed: {reason}")
+        return self.results[flow.name]
+
+    async def _terminate(self):
+        for process in self._processes.values():
+            if process.returncode is None:
+                process.terminate()
+        for process in self._processes.values():
+            try:
+                await asyncio.wait_for(process.wait(), 5.0)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+
+    async def _tc(self, action):
+        try:
+            process = await asyncio.create_subprocess_exec(*self.netem_command(action), stdout=asyncio.subprocess.PIPE,
+                                                           stderr=asyncio.subprocess.STDOUT)
+        except OSError as exc:
+            self.say(f"tc qdisc {action} failed: {exc}")
+            return
+        output, _ = await process.communicate()
+        for line in output.decode(errors="replace").splitlines():
+            self.say(line)
+        if process.returncode != 0:
+            self.say(f"tc qdisc {action} failed with exit status {process.returncode}.")
+
+    async def run(self):
+        """
+        Runs all flows; raises FlowFailed (after stopping the other flows)
+        if one of them cannot be started or ends with an error.
+        """
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.write_parameters()
+        if self.terminal_path:
+            self._terminal = open(self.terminal_path, "a")
+        try:
+            if self.netem:
+                await self._tc("add")
+            self._t0 = asyncio.get_running_loop().time()
+            tasks = [asyncio.create_task(self._run_flow(flow)) for flow in self.flows]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                self.say("An error occurred. Terminating all iperf processes...")
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await self._terminate()
+                raise
+            self.say("Test completed.")
+        finally:
+            if self.netem:
+                await self._tc("del")
+
+    def summary(self):
+        """
+        Report lines: mean rate per flow and the bytes of the main flow per
+        phase between the background flow starts.
+        """
+        lines = []
+        for flow in self.flows:
+            log = self.results.get(flow.name)
+            if log is None or not len(log["start"]):
+                lines.append(f"{flow.name}: no intervals")
+                continue
+            series = aggregate_series(log)
+            lines.append(f"{flow.name}: {len(series['start'])} intervals, mean {np.mean(series['bits_per_second']) / 1e6:.2f} "
+                         f"Mbit/s, {np.nansum(series['retransmits']):.0f} retransmits")
+        main = self.results.get(self.flows[0].name)
+        if main is not None and len(main["start"]):
+            series = aggregate_series(main)
+            # phases between the starts of the flows that begin after the main flow
+            edges = phase_edges(series["end"].max(), [flow.offset - self.flows[0].offset for flow in self.flows[1:]])
+            if len(edges) > 2:
+                phases = cumulative_transfer(series["start"], series["end"], series["bytes"], edges)["phase_bytes"]
+                lines += format_bins(phases, edges[:-1], edges[1:], label="Phase")
+        return lines
+
+    async def plot(self, script):
+        """
+        Runs the plot script on the main log inside the test directory.
+        """
+        for line in await run_plot(script, self.log_path(self.flows[0]), self.test_dir):
+            self.say(line)
+
+    def finish(self):
+        """
+        Appends the terminal output to parameters.txt, like run-test-new.sh.
+        """
+        if self._terminal is not None:
+            self._terminal.close()
+            self._terminal = None
+        if not self.terminal_path or not self.parameters_path:
+            return
+        with open(self.terminal_path) as f:
+            terminal = f.read()
+        with open(self.parameters_path, "a") as f:
+            f.write("\nTerminal comments:\n" + terminal)
+
+
+class PschedulerExperiment(Experiment):
+    """
+    One run of the run-real-*-test.sh / run-opt-*-test.sh scripts: the
+    `background` iperf3 flows (text logs with the header block of the
+    scripts, paths from Flow.log) start right away, the pscheduler
+    throughput task of `cca` follows after `warmup` seconds and writes
+    <json_dir>/<cca>_test_<stamp>.json, all relative to `test_dir` (the
+    scenario directory). No parameters.txt or terminal log.
+    """
+
+    def __init__(self, background, cca, duration, test_dir, stamp, json_dir="JSON-Files", pscheduler=PSCHEDULER,
+                 warmup=WARMUP, **kwargs):
+        main = Flow("main", None, duration, warmup, cca, log=os.path.join(json_dir, f"{cca}_test_{stamp}.json"))
+        super().__init__([main, *background], test_dir, stamp, None, log_format="text", **kwargs)
+        self.pscheduler = shlex.split(pscheduler)
+
+    @property
+    def parameters_path(self):
+        return None
+
+    @property
+    def terminal_path(self):
+        return None
+
+    def write_parameters(self):
+        pass
+
+    def command(self, flow, duration):
+        if flow.name != "main":
+            return super().command(flow, duration)
+        return self.pscheduler + ["task", "--format", "json", "throughput", f"--congestion={flow.cca}",
+                                  "-t", f"PT{duration}S", "--dest", self.server]
+
+    def parser(self, flow):
+        return PschedulerParser() if flow.name == "main" else LiveParser("text")
+
+    def open_log(self, flow):
+        log = super().open_log(flow)
+        if flow.name != "main":
+            main = self.flows[0]
+            header = ["Measurement Test", f"Timestamp: {datetime.datetime.now():%a %b %d %H:%M:%S %Y}",
+                      f"Interface: {self.device}", f"Destination: {self.server}", f"Duration: {main.duration}",
+                      f"Congestion Control: {main.cca}", "-" * 32]
+            log.write(("\n".join(header) + "\n").encode())
+        return log
+
+
+def background_flows(flows, duration, stamp, cca):
+    """
+    Flows of the background traffic of a pscheduler run from dicts with
+    port, cca, parallel and the log directory and file name prefix, e.g.
+    {"port": 5002, "cca": "cubic", "parallel": 3, "dir": "Txt-Files-BG-Cubic",
+    "prefix": "BG-Cubic_"}; the log is <dir>/<prefix><cca>_test_<stamp>.txt.
+    """
+    return [Flow(f"bg{i}", spec["port"], duration + BG_EXTRA, 0.0, spec.get("cca", "cubic"), spec.get("parallel"),
+                 log=os.path.join(spec.get("dir", "Txt-Files-BG-Traffic"), f"{spec.get('prefix', '')}{cca}_test_{stamp}.txt"))
+            for i, spec in enumerate(flows, 1)]
+
+
+async def run_plot(script, log, cwd):
+    """
+    Runs a plot script (plot-graph.py, plot-measurement.py) on `log` in
+    `cwd` without a display; returns its output lines, without the value
+    dumps and phase lines of plot-graph.py (those are in the summary).
+    """
+    env = dict(os.environ, MPLBACKEND="Agg")
+    process = await asyncio.create_subprocess_exec(sys.executable, os.path.abspath(script), os.path.abspath(log), cwd=cwd,
+                                                   env=env, stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.STDOUT)
+    output, _ = await process.communicate()
+    return [line for line in output.decode(errors="replace").splitlines()
+            if not line.startswith(("Timestamps:", "Throughputs:", "Phase "))]
+
+
+async def run_test(experiment, plot_script=None):
+    """
+    Runs the experiment, prints the summary, plots the main flow and
+    appends the terminal output to parameters.txt. Returns True if all
+    flows ran without error.
+    """
+    try:
+        await experiment.run()
+    except FlowFailed:
+        return False
+    finally:
+        if experiment.results:
+            for line in experiment.summary():
+                experiment.say(line)
+        if plot_script and experiment.results.get(experiment.flows[0].name) is not None:
+            await experiment.plot(plot_script)
+        experiment.finish()
+    return True
+
+
+def main(argv=None, plot_script=None):
+    parser = argparse.ArgumentParser(
+        description="Run the main flow and three background iperf3 flows of a More-and-more test.")
+    parser.add_argument("cca", help="congestion control of the main flow")
+    parser.add_argument("bg_parallel", nargs=3, type=int, metavar="bgN_parallel",
+                        help="parallel streams of background flows 1-3")
+    parser.add_argument("test_number")
+    parser.add_argument("--server", default=SERVER, help=f"iperf3 server (default: {SERVER})")
+    parser.add_argument("--iperf", default="iperf3", help='iperf3 command, e.g. "python throughput_tools/fake_iperf3.py"')
+    parser.add_argument("--format", default=os.environ.get("IPERF_FORMAT", "text"), choices=sorted(FORMATS),
+                        help="log format (default: $IPERF_FORMAT or text)")
+    parser.add_argument("--results-dir", default=".", help="the Test_<date>_test<n> directory is created here")
+    parser.add_argument("--netem", default=NETEM, help=f'tc netem arguments (default: "{NETEM}")')
+    parser.add_argument("--no-netem", action="store_true", help="do not touch the qdisc (loopback runs)")
+    parser.add_argument("--dev", default=DEVICE, help=f"interface for netem (default: {DEVICE})")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="factor for the start offsets (dry runs)")
+    parser.add_argument("--start-timeout", type=float, default=START_TIMEOUT,
+                        help=f"seconds until a silent flow counts as running (default: {START_TIMEOUT:g})")
+    parser.add_argument("--no-plot", action="store_true", help="do not run plot-graph.py afterwards")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    experiment = Experiment(default_flows(args.cca, args.bg_parallel),
+                            os.path.join(args.results_dir, f"Test_{stamp}_test{args.test_number}"), stamp,
+                            args.test_number, server=args.server, iperf=args.iperf, log_format=args.format,
+                            netem=None if args.no_netem else args.netem, device=args.dev, time_scale=args.time_scale,
+                            start_timeout=args.start_timeout)
+    ok = asyncio.run(run_test(experiment, None if args.no_plot else plot_script))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Throughput / window size plots of a single pscheduler run.
+"""
+
+from matplotlib import pyplot as plt
+import matplotlib.lines as mlines
+
+from .decimate import plot_series
+
+UNIT = {'factor': 1e3, 'name': "KBytes"}
+
+NEWSTYLE_RC = {
+    "axes.titlesize": 30,
+    "axes.labelsize": 28,
+    "xtick.labelsize": 23,
+    "ytick.labelsize": 23,
+    "legend.fontsize": 23,
+    "figure.titlesize": 33,
+    "lines.linewidth": 1.5,
+    "lines.markersize": 8,
+    "axes.grid": True,
+    "grid.color": "grey",
+    "grid.linestyle": "--",
+    "grid.linewidth": 0.5,
+}
+
+
+def _figure(fig, figsize, dpi=None):
+    """
+    A new figure with one Axes, or `fig` cleared and resized for reuse
+    (batch rendering draws many runs into the same figure).
+    """
+    if fig is None:
+        return plt.subplots(figsize=figsize, dpi=dpi)
+    fig.clear()
+    fig.set_size_inches(*figsize)
+    fig.set_dpi(dpi or plt.rcParams["figure.dpi"])
+    return fig, fig.add_subplot()
+
+
+def plot_throughputs_windowsizes(xs, throughputs, windowsizes, summary, received, measurement,
+                                 output=None, unit=UNIT, fig=None):
+    """
+    The classic plot-measurement.py figure. `received` are the bytes
+    received by the iperf3 server; without them (None) the receiver
+    throughput line is left out, as in the Initial tests.
+    """
+    # unit conversion
+    throughputs = list(map(lambda x: round(x/unit["factor"]), throughputs))
+    windowsizes = list(map(lambda x: round(x/unit["factor"]), windowsizes))
+
+    fig, ax1 = _figure(fig, (12,6))
+
+    color="red"
+    ax1.set_xlabel('time (s)')
+    ax1.set_ylabel(f'throughputs ({unit["name"]})', color=color)
+    plot_series(ax1, xs, throughputs, color=color)
+    ax1.tick_params(axis='y', labelcolor=color)
+    offset_xlim = 2
+    ax1.set_xlim(xs[1]-offset_xlim, xs[-1]+offset_xlim)
+
+    ax2 = ax1.twinx()  # instantiate a second Axes that shares the same x-axis
+
+    color="blue"
+    ax2.set_ylabel(f'windowsizes ({unit["name"]})', color=color)
+    plot_series(ax2, xs, windowsizes, color=color)
+    ax2.tick_params(axis='y', labelcolor=color)
+
+    lines = []
+    sum_throughput = round(int(summary["throughput-bytes"])/1e6)
+    lines.append(f'Throughput overall: {sum_throughput} MBytes')
+    sum_retransmits = round(int(summary["retransmits"]))
+    lines.append(f'Retransmits overall: {sum_retransmits}')
+    if received is not None:
+        lines.append(f'Receiver throughput: {round(received/1e6)} MBytes')
+
+    # bottom line at 0.02, the ones above in steps of 0.04
+    for i, text in enumerate(lines):
+        fig.text(0.5, 0.02 + 0.04 * (len(lines) - 1 - i), text,
+            fontsize=13,
+            horizontalalignment="center",
+            color="red"
+        )
+    fig.suptitle(measurement)
+
+    fig.tight_layout()  # otherwise the right y-label is slightly clipped
+
+    fig.subplots_adjust(bottom=0.2)
+
+    fig.savefig(output or f'plot_{measurement}.pdf')
+    return fig
+
+
+def plot_newstyle(xs, throughputs, windowsizes, summary, received, measurement,
+                  output=None, unit=UNIT, fig=None):
+    """
+    The larger figure of Plots-Throughput/plot-newstyle.py (legend on
+    top, black annotations, axes starting at 0).
+    """
+    # Convert from bytes to KBytes
+    throughputs = [round(x / unit["factor"]) for x in throughputs]
+    windowsizes = [round(x / unit["factor"]) for x in windowsizes]
+
+    # Create figure and primary axis
+    fig, ax1 = _figure(fig, (24,8), dpi=300)
+
+    # Customize plot appearance (only for this figure)
+    with plt.rc_context(NEWSTYLE_RC):
+        # Plot throughput on the left y-axis
+        color1 = "red"
+        ax1.set_xlabel('Time (s)', fontsize=28)
+        ax1.set_ylabel(f'Throughput ({unit["name"]})', fontsize=28, color=color1, labelpad=20)
+        plot_series(ax1, xs, throughputs, color=color1, linestyle='-', linewidth=1.5, label='Throughput')
+        ax1.tick_params(axis='x', labelsize=23, pad=10)
+        ax1.tick_params(axis='y', labelcolor=color1, labelsize=23, pad=10)
+        offset_xlim = 2
+        ax1.set_xlim(xs[0]-offset_xlim, xs[-1]+offset_xlim)
+
+        # Plot CWND on the right y-axis
+        ax2 = ax1.twinx()
+        color2 = "blue"
+        ax2.set_ylabel(f'CWND ({unit["name"]})', fontsize=28, color=color2, labelpad=20)
+        plot_series(ax2, xs, windowsizes, color=color2, linestyle='-', linewidth=1.5, label='CWND')
+        ax2.tick_params(axis='y', labelcolor=color2, labelsize=23, pad=10)
+
+        # Remove the top spine
+        ax1.spines['top'].set_visible(False)
+        ax2.spines['top'].set_visible(False)
+
+        # Place custom legend outside the plot area to avoid overlap
+        line1 = mlines.Line2D([], [], color=color1, linestyle='-', linewidth=1.5, label='Throughput')
+        line2 = mlines.Line2D([], [], color=color2, linestyle='-', linewidth=1.5, label='CWND')
+        ax1.legend(handles=[line1, line2], loc='upper center', bbox_to_anchor=(0.5, 1.2), fontsize=28,
+                   ncol=2, frameon=False)
+
+        # Adjust y-axis limits based on data range, starting at 0
+        ax1.set_ylim(0, max(throughputs) * 1.1)
+        ax2.set_ylim(0, max(windowsizes) * 1.1)
+
+        # Adjust overall layout to leave more space at the bottom for the annotations
+        fig.tight_layout(rect=[0, 0.1, 1, 1])
+
+        # Add bottom annotations with extra spacing.
+        bottom_gap = 0.05
+        sum_throughput = round(int(summary["throughput-bytes"]) / 1e6)
+        fig.text(0.18, bottom_gap, f'Throughput overall: {sum_throughput} MBytes', fontsize=28,
+                 horizontalalignment="center", color="black")
+        sum_retransmits = round(int(summary["retransmits"]))
+        fig.text(0.82, bottom_gap, f'Retransmissions overall: {sum_retransmits}', fontsize=28,
+                 horizontalalignment="center", color="black")
+        if received is not None:
+            fig.text(0.5, bottom_gap, f'Receiver throughput: {round(received / 1e6)} MBytes', fontsize=28,
+                     horizontalalignment="center", color="black")
+
+        fig.savefig(output or f'plot_{measurement}.pdf')
+    return fig
+
+
+STYLES = {
+    "classic": plot_throughputs_windowsizes,
+    "newstyle": plot_newstyle,
+}
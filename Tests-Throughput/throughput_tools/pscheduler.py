@@ -0,0 +1,93 @@
+"""
+Parsing of `pscheduler task --format json throughput` output.
+"""
+
+import os
+import glob
+import json
+import warnings
+
+import numpy as np
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def parse_diags(input):
+    """
+    The iperf3 JSON embedded in the "diags" text, as {"diags": [parsed]}
+    (empty list if there is none). Only the first JSON document is read,
+    pscheduler may append more text (or a second document) after it.
+    """
+    diags_str = input.get("diags", "")
+    start = diags_str.find('{')
+    if start == -1:
+        return {"diags": []}
+    try:
+        parsed, _ = json.JSONDecoder().raw_decode(diags_str, start)
+    except ValueError as e:
+        warnings.warn(f"Error parsing diag JSON: {e}")
+        return {"diags": []}
+    return {"diags": [parsed]}
+
+
+def parse_data(input):
+    """
+    Per-interval end times, throughput and window size of the first
+    stream plus the overall summary.
+    """
+    xs = []
+    throughputs = []
+    windowsizes = []
+    for interval in input["intervals"]:
+        data = interval["streams"][0]
+        xs.append(int(data["end"]))
+        throughputs.append(data["throughput-bytes"])
+        windowsizes.append(data["tcp-window-size"])
+
+    summary = input["summary"]["summary"]
+
+    return xs, throughputs, windowsizes, summary
+
+
+def receiver_bytes(diags_data):
+    """
+    Bytes received by the iperf3 server, or None without diags.
+    """
+    if not diags_data.get("diags"):
+        return None
+    return int(diags_data["diags"][0]["end"]["streams"][0]["receiver"]["bytes"])
+
+
+def expand_inputs(patterns, name="*.json"):
+    """
+    Sorted, de-duplicated files of files, directories and globs.
+    Directories are searched recursively for `name`.
+    """
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.update(glob.glob(os.path.join(pattern, "**", name), recursive=True))
+        else:
+            files.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(files)
+
+
+def interval_columns(input):
+    """
+    Intervals of a pscheduler throughput result in the columns of
+    iperf_log.parse_iperf_log (one row per stream and interval).
+    """
+    rows = [stream for interval in input.get("intervals", []) for stream in interval["streams"]
+            if not stream.get("omitted")]
+    return {
+        "stream": np.array([int(row.get("stream-id", 0)) for row in rows], dtype=np.int64),
+        "start": np.array([float(row["start"]) for row in rows]),
+        "end": np.array([float(row["end"]) for row in rows]),
+        "bytes": np.array([float(row["throughput-bytes"]) for row in rows]),
+        "bits_per_second": np.array([float(row["throughput-bits"]) for row in rows]),
+        "retransmits": np.array([float(row.get("retransmits", np.nan)) for row in rows]),
+        "cwnd_bytes": np.array([float(row.get("tcp-window-size", np.nan)) for row in rows]),
+    }
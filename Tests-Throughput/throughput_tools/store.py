@@ -0,0 +1,379 @@
+"""
+Columnar store of all throughput runs.
+
+Every run found below Tests-Throughput is normalized into one Parquet
+dataset of interval rows, partitioned like
+
+    <store>/intervals/condition=<c>/scenario=<s>/cca=<a>/run_id=<r>/part-0.parquet
+
+plus `<store>/runs.parquet` with one row of metadata per run. Sources:
+
+- pscheduler JSON files of Optimistic-/Realistic-Tests (condition
+  "optimistic"/"realistic", scenario Baseline/Bg-Flows/Buffer/FQ-Codel)
+  and Initial-Tests (condition "initial", scenario = test directory),
+  flow "main", plus the iperf3 text logs of their background traffic
+  (flow "bg", "bg-cubic" or "bg-reno")
+- More-and-more/test_results/<load>/Test_* directories (condition
+  "more-and-more", scenario = load), flows main and bg1..bg3 from the
+  iperf3 logs (text *.log or --json *.json) and the metadata from
+  parameters.txt
+
+Rebuilds are incremental: a run is only re-read if one of its source
+files changed (mtime/size).
+
+    python -m throughput_tools.store build [root] [-o DIR] [--force]
+    python -m throughput_tools.store query [-s DIR] [key=value ...]
+"""
+
+import os
+import sys
+import glob
+import json
+import shutil
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .pscheduler import load_json, parse_diags, receiver_bytes
+from .naming import parse_filename
+from .iperf_log import load_log, parse_parameters, SUM_STREAM
+
+STORE_DIR = "throughput-store"
+# Part of every run signature; bump it when ingest() computes something
+# differently, so existing stores re-read all runs
+STORE_VERSION = 2
+PARTITIONS = ("condition", "scenario", "cca", "run_id")
+
+INTERVAL_SCHEMA = pa.schema([
+    ("source", pa.string()),
+    ("flow", pa.string()),
+    ("stream", pa.int64()),
+    ("start", pa.float64()),
+    ("end", pa.float64()),
+    ("bytes", pa.float64()),
+    ("throughput_bps", pa.float64()),
+    ("retransmits", pa.float64()),
+    ("cwnd_bytes", pa.float64()),
+    ("rtt_us", pa.float64()),
+])
+
+# Directory of the background logs -> (file name prefix, flow name)
+BG_LOG_DIRS = {
+    "Txt-Files-BG-Traffic": ("", "bg"),
+    "Txt-Files-BG-Cubic": ("BG-Cubic_", "bg-cubic"),
+    "Txt-Files-BG-Reno": ("BG_Reno_", "bg-reno"),
+}
+
+# Top directory -> (condition, file name schema of its JSON files)
+CONDITIONS = {
+    "Optimistic-Tests": ("optimistic", "algo_test_date_time"),
+    "Realistic-Tests": ("realistic", "algo_test_date_time"),
+    "Initial-Tests": ("initial", "_algo_date_time"),
+}
+
+
+class RunSource:
+    """
+    One run to ingest: its partition values, the source files per flow
+    (flow -> path, "main" first) and the parameters.txt if there is one.
+    """
+
+    def __init__(self, condition, scenario, cca, run_id, flows, parameters=None):
+        self.condition = condition
+        self.scenario = scenario
+        self.cca = cca
+        self.run_id = run_id
+        self.flows = flows
+        self.parameters = parameters
+
+    @property
+    def key(self):
+        return self.condition, self.scenario, self.cca, self.run_id
+
+    def files(self):
+        return list(self.flows.values()) + ([self.parameters] if self.parameters else [])
+
+    def signature(self):
+        """
+        Changes whenever a source file is added, removed or modified, or
+        with STORE_VERSION.
+        """
+        return json.dumps([STORE_VERSION] + [(path, os.stat(path).st_mtime_ns, os.stat(path).st_size)
+                                             for path in self.files()])
+
+    def partition_dir(self, store):
+        return os.path.join(store, "intervals", *(f"{name}={value}" for name, value in zip(PARTITIONS, self.key)))
+
+
+def _pscheduler_runs(root):
+    for top, (condition, schema) in CONDITIONS.items():
+        for path in sorted(glob.glob(os.path.join(root, top, "**", "*.json"), recursive=True)):
+            info = parse_filename(path, schema)
+            if info is None:
+                continue
+            parts = os.path.relpath(path, os.path.join(root, top)).split(os.sep)
+            scenario = os.path.basename(os.path.dirname(path)) if top == "Initial-Tests" else parts[0]
+            stem = os.path.splitext(os.path.basename(path))[0]
+            flows = {"main": path}
+            if top == "Initial-Tests":
+                log = os.path.splitext(path)[0] + ".txt"
+                if os.path.exists(log):
+                    flows["bg"] = log
+            else:
+                for dirname, (prefix, flow) in BG_LOG_DIRS.items():
+                    log = os.path.join(root, top, parts[0], dirname, f"{prefix}{stem}.txt")
+                    if os.path.exists(log):
+                        flows[flow] = log
+            yield RunSource(condition, scenario, info["algo"], f"{info['date']}_{info['time']}", flows)
+
+
+def _flow_logs(test_dir, pattern):
+    """
+    iperf3 logs of a test directory, text (.log) or JSON (.json).
+    """
+    return sorted(path for path in glob.glob(os.path.join(test_dir, pattern))
+                  if path.endswith((".log", ".json")))
+
+
+def _more_and_more_runs(root):
+    for test_dir in sorted(glob.glob(os.path.join(root, "More-and-more", "test_results", "*", "Test_*"))):
+        parameters = os.path.join(test_dir, "parameters.txt")
+        main_logs = _flow_logs(test_dir, "main_*")
+        if not os.path.exists(parameters) or not main_logs:
+            continue
+        params = parse_parameters(parameters)
+        flows = {"main": main_logs[0]}
+        for log in _flow_logs(test_dir, "bg[0-9]_*"):
+            flows[os.path.basename(log).split("_")[0]] = log
+        run_id = params.get("Date & Time") or "_".join(os.path.basename(test_dir).split("_")[1:3])
+        yield RunSource("more-and-more", os.path.basename(os.path.dirname(test_dir)),
+                        params.get("Main Flow Congestion", "unknown"), run_id, flows, parameters)
+
+
+def discover(root):
+    """
+    RunSource of every run below `root` (the Tests-Throughput directory).
+    """
+    runs = {}
+    for run in list(_pscheduler_runs(root)) + list(_more_and_more_runs(root)):
+        if run.key in runs:
+            raise ValueError(f"run {'/'.join(run.key)} found twice: {runs[run.key].flows['main']} and {run.flows['main']}")
+        runs[run.key] = run
+    return list(runs.values())
+
+
+def _json_intervals(json_input, source):
+    rows = [stream for interval in json_input["intervals"] for stream in interval["streams"]]
+    return {
+        "source": [source] * len(rows),
+        "flow": ["main"] * len(rows),
+        "stream": [int(row.get("stream-id", 0)) for row in rows],
+        "start": [float(row["start"]) for row in rows],
+        "end": [float(row["end"]) for row in rows],
+        "bytes": [float(row["throughput-bytes"]) for row in rows],
+        "throughput_bps": [float(row["throughput-bits"]) for row in rows],
+        "retransmits": [float(row.get("retransmits", np.nan)) for row in rows],
+        "cwnd_bytes": [float(row.get("tcp-window-size", np.nan)) for row in rows],
+        "rtt_us": [float(row.get("rtt", np.nan)) for row in rows],
+    }
+
+
+def _log_intervals(log, path, flow):
+    n = len(log["stream"])
+    return {
+        "source": [os.path.basename(path)] * n,
+        "flow": [flow] * n,
+        "stream": log["stream"],
+        "start": log["start"],
+        "end": log["end"],
+        "bytes": log["bytes"],
+        "throughput_bps": log["bits_per_second"],
+        "retransmits": log["retransmits"],
+        "cwnd_bytes": log["cwnd_bytes"],
+        "rtt_us": log.get("rtt_us", np.full(n, np.nan)),
+    }
+
+
+def _flow_totals(log):
+    """
+    Transferred bytes and retransmits of a text log, from the [SUM] rows
+    if the flow had parallel streams, otherwise over all its streams.
+    """
+    rows = log["stream"] == SUM_STREAM
+    if not rows.any():
+        rows = slice(None)
+    return float(log["bytes"][rows].sum()), float(np.nansum(log["retransmits"][rows]))
+
+
+def ingest(run):
+    """
+    (interval table, metadata dict) of one run.
+    """
+    tables = []
+    meta = dict(zip(PARTITIONS, run.key))
+    meta.update(flows=",".join(run.flows), source_dir=os.path.dirname(run.flows["main"]))
+    for flow, path in run.flows.items():
+        if flow == "main" and run.parameters is None:
+            # pscheduler result
+            json_input = load_json(path)
+            summary = json_input["summary"]["summary"]
+            meta.update(throughput_bytes=float(summary["throughput-bytes"]),
+                        retransmits=float(summary.get("retransmits", np.nan)),
+                        duration=float(summary["end"]))
+            received = receiver_bytes(parse_diags(json_input))
+            meta["receiver_bytes"] = float(received) if received is not None else np.nan
+            columns = _json_intervals(json_input, os.path.basename(path))
+        else:
+            log = load_log(path)
+            columns = _log_intervals(log, path, flow)
+            if flow == "main":
+                meta["throughput_bytes"], meta["retransmits"] = _flow_totals(log)
+                meta["duration"] = float(log["end"].max()) if len(log["end"]) else np.nan
+        tables.append(pa.table(columns, schema=INTERVAL_SCHEMA))
+
+    if run.parameters:
+        params = parse_parameters(run.parameters)
+        meta["test_number"] = params.get("Test Number")
+        meta["netem"] = params.get("TC Netem Settings")
+        for i in range(1, 4):
+            section = f"Background Flow {i}"
+            meta[f"bg{i}_streams"] = params.get(f"{section}/Parallel Streams")
+            meta[f"bg{i}_cca"] = params.get(f"{section}/Congestion Control")
+    return pa.concat_tables(tables), meta
+
+
+def _remove_partition(path):
+    """
+    Deletes a run directory and the partition directories it leaves empty.
+    """
+    shutil.rmtree(path, ignore_errors=True)
+    for _ in PARTITIONS[:-1]:
+        path = os.path.dirname(path)
+        if os.path.isdir(path) and not os.listdir(path):
+            os.rmdir(path)
+
+
+def build(root, store=None, force=False, skip=()):
+    """
+    Brings the store up to date with the runs below `root`. Returns
+    (written, unchanged, removed) run counts. Runs whose main flow file
+    is in `skip` (e.g. still being measured) are left out; `skip` is
+    read after the files are listed, so a log that is created while the
+    build runs is left out as long as it is in `skip` before it exists.
+    """
+    store = store or os.path.join(root, STORE_DIR)
+    runs_file = os.path.join(store, "runs.parquet")
+    old = {}
+    if os.path.exists(runs_file) and not force:
+        for row in pd.read_parquet(runs_file).to_dict("records"):
+            old[tuple(row[name] for name in PARTITIONS)] = row
+
+    metas, written, unchanged = [], 0, 0
+    runs = list(discover(root))
+    skip = {os.path.abspath(path) for path in skip}
+    runs = [run for run in runs if os.path.abspath(run.flows["main"]) not in skip]
+    for run in runs:
+        signature = run.signature()
+        previous = old.pop(run.key, None)
+        if previous is not None and previous["signature"] == signature \
+                and os.path.exists(run.partition_dir(store)):
+            metas.append(previous)
+            unchanged += 1
+            continue
+        table, meta = ingest(run)
+        meta["signature"] = signature
+        out_dir = run.partition_dir(store)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.makedirs(out_dir)
+        pq.write_table(table, os.path.join(out_dir, "part-0.parquet"))
+        metas.append(meta)
+        written += 1
+
+    # Runs whose sources are gone
+    for row in old.values():
+        _remove_partition(RunSource(*(row[name] for name in PARTITIONS), flows={}).partition_dir(store))
+    if force:
+        # Partitions not belonging to any discovered run
+        keep = {os.path.normpath(run.partition_dir(store)) for run in runs}
+        for path in glob.glob(os.path.join(store, "intervals", *["*"] * len(PARTITIONS))):
+            if os.path.normpath(path) not in keep:
+                _remove_partition(path)
+
+    os.makedirs(store, exist_ok=True)
+    tmp = f"{runs_file}.{os.getpid()}.tmp"
+    pd.DataFrame(metas).to_parquet(tmp, index=False)
+    os.replace(tmp, runs_file)
+    return written, unchanged, len(old)
+
+
+def load_store(store, filters=None, columns=None):
+    """
+    Interval rows as DataFrame. `filters` is a dict column -> value (or
+    list of values); filters on partition columns only read the matching
+    directories.
+    """
+    predicates = []
+    for name, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set)):
+            predicates.append((name, "in", list(value)))
+        else:
+            predicates.append((name, "==", value))
+    return pd.read_parquet(os.path.join(store, "intervals"), columns=columns, filters=predicates or None,
+                           partitioning=ds.partitioning(
+                               pa.schema([(name, pa.string()) for name in PARTITIONS]), flavor="hive"))
+
+
+def load_runs(store):
+    return pd.read_parquet(os.path.join(store, "runs.parquet"))
+
+
+def _parse_filters(items):
+    filters = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"filter {item!r} is not key=value")
+        values = value.split(",")
+        filters[name] = values if len(values) > 1 else value
+    return filters
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the Parquet store of all throughput runs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="ingest new and changed runs")
+    build_parser.add_argument("root", nargs="?", default=".", help="Tests-Throughput directory (default: .)")
+    build_parser.add_argument("-o", "--output", default=None, help=f"store directory (default: <root>/{STORE_DIR})")
+    build_parser.add_argument("--force", action="store_true", help="re-ingest every run")
+    query_parser = commands.add_parser("query", help="mean throughput per condition/scenario/cca/flow")
+    query_parser.add_argument("-s", "--store", default=STORE_DIR, help=f"store directory (default: {STORE_DIR})")
+    query_parser.add_argument("filters", nargs="*", help="key=value or key=a,b filters, e.g. cca=bbr flow=main")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.command == "build":
+        written, unchanged, removed = build(args.root, args.output, args.force)
+        print(f"{written} runs written, {unchanged} unchanged, {removed} removed")
+        return
+
+    try:
+        filters = _parse_filters(args.filters)
+    except ValueError as e:
+        parser.error(str(e))
+    df = load_store(args.store, filters)
+    # Per-stream rows would count parallel flows twice next to their [SUM]
+    run_flow = ["condition", "scenario", "cca", "run_id", "flow"]
+    has_sum = (df["stream"] == SUM_STREAM).groupby([df[name] for name in run_flow], observed=True).transform("any")
+    df = df[(df["stream"] == SUM_STREAM) | ~has_sum]
+    result = df.groupby(["condition", "scenario", "cca", "flow"], observed=True).agg(
+        runs=("run_id", "nunique"), mean_mbps=("throughput_bps", lambda x: x.mean() / 1e6),
+        retransmits=("retransmits", "sum"))
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(result.round(2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,165 @@
-import pandas as pd
+import os
 import sys
+import pandas as pd
+import numpy as np
+import argparse
+
+from pcap_reader import iter_packets
+from tcp_flows import FlowTable
+
+# Dezimierung wie bei den Durchsatz-Plots (Tests-Throughput/throughput_tools)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Tests-Throughput'))
+from throughput_tools.decimate import plot_series, DEFAULT_POINTS
+
+# Nur diese Spalten werden gebraucht, mit festen Datentypen
+CSV_COLUMNS = ['Time', 'Length', 'Info']
+CSV_DTYPES = {'Time': 'float64', 'Length': 'int64', 'Info': 'object'}
+
+# Zeilen pro Block beim Einlesen (Speicherbedarf bleibt konstant)
+DEFAULT_CHUNKSIZE = 500_000
+
+
+class WindowSeries:
+    """
+    Durchsatz und Retransmissions pro Zeitfenster (z.B. 0.1 s oder 1 s).
+    Pakete werden über ihren Fensterindex mit np.bincount gezählt, die
+    Zeit läuft relativ zum ersten Paket (wie frame.time_relative).
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.start = None
+        self.packets = np.zeros(0, dtype=np.int64)
+        self.bytes = np.zeros(0, dtype=np.int64)
+        self.retransmissions = np.zeros(0, dtype=np.int64)
+
+    def add(self, times, lengths, retransmitted):
+        if len(times) == 0:
+            return
+        if self.start is None:
+            self.start = float(times[0])
+        index = ((np.asarray(times) - self.start) // self.window).astype(np.int64)
+        np.maximum(index, 0, out=index)
+        count = int(index.max()) + 1
+        if count > len(self.packets):
+            for name in ('packets', 'bytes', 'retransmissions'):
+                grown = np.zeros(count, dtype=np.int64)
+                grown[:len(getattr(self, name))] = getattr(self, name)
+                setattr(self, name, grown)
+        self.packets[:count] += np.bincount(index, minlength=count)
+        self.bytes[:count] += np.bincount(index, weights=lengths, minlength=count).astype(np.int64)
+        self.retransmissions[:count] += np.bincount(index[retransmitted], minlength=count)
+
+    def table(self):
+        """
+        Spalten start, end, packets, bytes, throughput_mbps, retransmissions, retransmission_pct.
+        """
+        start = np.arange(len(self.packets)) * self.window
+        return {
+            'start': start,
+            'end': start + self.window,
+            'packets': self.packets,
+            'bytes': self.bytes,
+            'throughput_mbps': self.bytes * 8 / (self.window * 1_000_000),
+            'retransmissions': self.retransmissions,
+            'retransmission_pct': 100.0 * self.retransmissions / np.maximum(self.packets, 1),
+        }
+
+
+def analyze_csv(file_name, chunksize=DEFAULT_CHUNKSIZE, series=None):
+    """
+    Liest die tshark-CSV blockweise ein und zählt laufend mit:
+    Pakete, Retransmissions, "previous segment not captured",
+    Gesamtbytes sowie erste/letzte Zeit. Mit `series` (WindowSeries)
+    wird zusätzlich pro Zeitfenster gezählt.
+    """
+    counters = {
+        'total_packets': 0,
+        'retransmission_count': 0,
+        'ack_lost_count': 0,
+        'total_bytes': 0,
+        'first_time': None,
+        'last_time': None,
+    }
+
+    if chunksize:
+        chunks = pd.read_csv(file_name, usecols=CSV_COLUMNS, dtype=CSV_DTYPES, chunksize=chunksize)
+    else:
+        chunks = [pd.read_csv(file_name, usecols=CSV_COLUMNS, dtype=CSV_DTYPES)]
+
+    for data in chunks:
+        if data.empty:
+            continue
+
+        # Gesamtanzahl der Pakete
+        counters['total_packets'] += len(data)
+
+        # Pakete mit TCP Retransmissions
+        retransmitted = data['Info'].str.contains("Retransmission", na=False, regex=False)
+        counters['retransmission_count'] += int(retransmitted.sum())
+
+        # Pakete mit ACK Lost Segments
+        counters['ack_lost_count'] += int(
+            data['Info'].str.contains("TCP Previous segment not captured", na=False, regex=False).sum()
+        )
 
-# Prüfen, ob eine Datei angegeben wurde
-if len(sys.argv) != 2:
-    print("Usage: python3 analyze_wireshark.py <path_to_csv_file>")
-    sys.exit(1)
+        # Gesamtdaten in Bytes
+        counters['total_bytes'] += int(data['Length'].sum())
 
-# Datei von den Kommandozeilenargumenten einlesen
-file_name = sys.argv[1]
+        # Erste und letzte Zeit der Capture-Session
+        if counters['first_time'] is None:
+            counters['first_time'] = data['Time'].iloc[0]
+        counters['last_time'] = data['Time'].iloc[-1]
 
-try:
-    # Wireshark-CSV-Datei laden
-    data = pd.read_csv(file_name)
+        if series is not None:
+            series.add(data['Time'].to_numpy(), data['Length'].to_numpy(), retransmitted.to_numpy())
 
-    # Gesamtanzahl der Pakete
-    total_packets = len(data)
+    return counters
 
-    # Pakete mit TCP Retransmissions
-    retransmission_packets = data[
-        data['Info'].str.contains("Retransmission", na=False)
-    ]
-    retransmission_count = len(retransmission_packets)
 
-    # Pakete mit ACK Lost Segments
-    ack_lost_packets = data[
-        data['Info'].str.contains("TCP Previous segment not captured", na=False)
-    ]
-    ack_lost_count = len(ack_lost_packets)
+def analyze_pcap(file_name, series=None):
+    """
+    Wertet eine pcap/pcapng-Datei direkt aus, ohne Umweg über tshark/CSV.
+    Retransmissions und "previous segment not captured" kommen aus der
+    Flow-Analyse in tcp_flows.py (Sequenznummern pro Verbindung).
+    """
+    counters = {
+        'total_packets': 0,
+        'retransmission_count': 0,
+        'ack_lost_count': 0,
+        'total_bytes': 0,
+        'first_time': None,
+        'last_time': None,
+    }
+    table = FlowTable()
+
+    for packets in iter_packets(file_name):
+        tcp = packets['is_tcp']
+        if not tcp.any():
+            continue
+        ts = packets['ts'][tcp]
+        counters['total_packets'] += int(tcp.sum())
+        counters['total_bytes'] += int(packets['frame_len'][tcp].sum())
+        if counters['first_time'] is None:
+            counters['first_time'] = float(ts[0])
+        counters['last_time'] = float(ts[-1])
+        retransmitted = table.add_batch(packets)
+
+        if series is not None:
+            series.add(ts, packets['frame_len'][tcp], retransmitted)
+
+    for flow in table.flows.values():
+        counters['retransmission_count'] += flow.retransmissions
+        counters['ack_lost_count'] += flow.gaps
+
+    return counters
+
+
+def print_results(file_name, counters):
+    total_packets = counters['total_packets']
+    retransmission_count = counters['retransmission_count']
+    ack_lost_count = counters['ack_lost_count']
+    total_bytes = counters['total_bytes']
 
     # Gesamtzahl verlorener Pakete
     total_lost_count = retransmission_count + ack_lost_count
@@ -36,10 +169,7 @@ try:
 
     # Durchsatzberechnung
     # Dauer der Capture-Session
-    duration = data['Time'].iloc[-1] - data['Time'].iloc[0]  # Dauer in Sekunden
-
-    # Gesamtdaten in Bytes
-    total_bytes = data['Length'].sum()
+    duration = counters['last_time'] - counters['first_time']  # Dauer in Sekunden
 
     # Durchsatz in Mbps
     throughput_mbps = (total_bytes * 8) / (duration * 1_000_000)  # 1 Byte = 8 Bits
@@ -55,6 +185,94 @@ try:
     print(f"Duration: {duration:.2f} seconds")
     print(f"Throughput: {throughput_mbps:.2f} Mbps")
 
-except Exception as e:
-    print(f"Error processing file {file_name}: {e}")
 
+def print_windows(series, csv_file=None):
+    columns = series.table()
+    if csv_file:
+        names = list(columns)
+        np.savetxt(csv_file, np.column_stack([columns[name] for name in names]), delimiter=",",
+                   header=",".join(names), comments="",
+                   fmt=["%.3f", "%.3f", "%d", "%d", "%.3f", "%d", "%.2f"])
+        print(f"Window series saved to {csv_file}")
+        return
+
+    print(f"Throughput per {series.window:g} s window:")
+    for i in range(len(columns['start'])):
+        print(f"{columns['start'][i]:10.3f} - {columns['end'][i]:10.3f} s  "
+              f"{columns['throughput_mbps'][i]:10.2f} Mbps  "
+              f"{columns['retransmissions'][i]:6d} retransmissions "
+              f"({columns['retransmission_pct'][i]:.2f}%)")
+
+
+def plot_windows(series, output, title=None, max_points=None, rasterize=False):
+    """
+    Durchsatz und Retransmissions pro Zeitfenster als Plot. Lange Reihen
+    (kleine Fenster über lange Mitschnitte) werden vorher auf Min/Max pro
+    Pixelspalte reduziert (Tests-Throughput/throughput_tools/decimate.py),
+    `max_points` 0 zeichnet alle Punkte.
+    """
+    from matplotlib import pyplot as plt
+
+    if max_points is None:
+        max_points = DEFAULT_POINTS
+    columns = series.table()
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 9), sharex=True, gridspec_kw={'height_ratios': [3, 1]})
+    plot_series(ax1, columns['start'], columns['throughput_mbps'], color='red', linewidth=0.8,
+                max_points=max_points, rasterize=rasterize)
+    ax1.set_ylabel(f'Throughput per {series.window:g} s (Mbps)')
+    ax1.grid(True)
+    plot_series(ax2, columns['start'], columns['retransmissions'], color='black', linewidth=0.8,
+                max_points=max_points, rasterize=rasterize)
+    ax2.set_xlabel('Time (s)')
+    ax2.set_ylabel('Retransmissions')
+    ax2.grid(True)
+    if title:
+        fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(output, dpi=200)
+    plt.close(fig)
+    print(f"Plot saved to {output}")
+
+
+def main():
+    # Datei von den Kommandozeilenargumenten einlesen
+    parser = argparse.ArgumentParser(
+        usage="python3 analyze_wireshark.py <path_to_csv_or_pcap_file> [--chunksize N] "
+              "[--window SECONDS [--window-csv FILE]] [--plot FILE [--max-points N] [--rasterize]]"
+    )
+    parser.add_argument("file_name")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"Zeilen pro Block (Standard: {DEFAULT_CHUNKSIZE}, 0 = ganze Datei auf einmal)")
+    parser.add_argument("--window", type=float, default=None,
+                        help="Durchsatz und Retransmissions zusätzlich pro Zeitfenster (Sekunden, z.B. 0.1 oder 1)")
+    parser.add_argument("--window-csv", default=None,
+                        help="Zeitreihe als CSV in diese Datei schreiben statt sie auszugeben")
+    parser.add_argument("--plot", default=None,
+                        help="Zeitreihe als Plot (PDF/PNG) in diese Datei schreiben (Fenster ohne --window: 1 s)")
+    parser.add_argument("--max-points", type=int, default=None,
+                        help="Punkte pro Linie im Plot (Standard: 4000, 0 = alle)")
+    parser.add_argument("--rasterize", action="store_true",
+                        help="dichte Linien in PDF/SVG als Bitmap einbetten")
+    args = parser.parse_args()
+    file_name = args.file_name
+    series = WindowSeries(args.window or 1.0) if args.window or args.plot else None
+
+    try:
+        if file_name.endswith(('.pcap', '.pcapng', '.cap')):
+            # Mitschnitt direkt lesen, ohne tshark-CSV
+            counters = analyze_pcap(file_name, series)
+        else:
+            # Wireshark-CSV-Datei blockweise auswerten
+            counters = analyze_csv(file_name, args.chunksize, series)
+        print_results(file_name, counters)
+        if args.window:
+            print_windows(series, args.window_csv)
+        if args.plot:
+            plot_windows(series, args.plot, os.path.basename(file_name), args.max_points, args.rasterize)
+
+    except Exception as e:
+        print(f"Error processing file {file_name}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Direkter Leser für pcap- und pcapng-Dateien (ohne tshark).
+
+Die Datei wird per mmap eingelesen. In Python werden nur die
+Record-Header abgelaufen (Offset, Länge, Zeitstempel pro Paket), alle
+Felder aus Ethernet-, IP- und TCP-Headern werden danach blockweise mit
+NumPy aus den Rohbytes geholt. Ergebnis sind Spalten-Arrays pro Block.
+"""
+
+import mmap
+import struct
+import ipaddress
+
+import numpy as np
+
+# Pakete pro Block (Speicherbedarf bleibt konstant)
+DEFAULT_BATCH_SIZE = 1_000_000
+
+# Link-Layer-Typen (LINKTYPE_*) und Länge ihres Headers
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+PCAP_MAGIC = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1e-6),  # little endian, Mikrosekunden
+    b'\xa1\xb2\xc3\xd4': ('>', 1e-6),
+    b'\x4d\x3c\xb2\xa1': ('<', 1e-9),  # little endian, Nanosekunden
+    b'\xa1\xb2\x3c\x4d': ('>', 1e-9),
+}
+PCAPNG_SHB = 0x0A0D0D0A
+
+# TCP-Flags
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_ACK = 0x10
+
+FIELDS = ('ts', 'frame_len', 'is_tcp', 'ip_version', 'src_hi', 'src_lo', 'dst_hi', 'dst_lo',
+          'sport', 'dport', 'seq', 'ack', 'flags', 'window', 'payload_len', 'options_len')
+
+
+class PcapError(Exception):
+    pass
+
+
+def _records_pcap(mm, batch_size):
+    """
+    Läuft die Record-Header einer klassischen pcap-Datei ab.
+    Liefert Blöcke (Zeitstempel, Daten-Offsets, caplen, origlen, linktype).
+    """
+    endian, unit = PCAP_MAGIC[bytes(mm[:4])]
+    linktype = struct.unpack_from(endian + 'I', mm, 20)[0] & 0x0FFFFFFF
+    header = struct.Struct(endian + 'IIII')
+    size = len(mm)
+    pos = 24
+    while pos + 16 <= size:
+        ts, offsets, caplens, origlens = [], [], [], []
+        while pos + 16 <= size and len(offsets) < batch_size:
+            sec, frac, caplen, origlen = header.unpack_from(mm, pos)
+            if pos + 16 + caplen > size:
+                pos = size  # abgeschnittener letzter Record
+                break
+            ts.append(sec + frac * unit)
+            offsets.append(pos + 16)
+            caplens.append(caplen)
+            origlens.append(origlen)
+            pos += 16 + caplen
+        if offsets:
+            yield (np.array(ts), np.array(offsets, dtype=np.int64), np.array(caplens, dtype=np.int64),
+                   np.array(origlens, dtype=np.int64), np.full(len(offsets), linktype, dtype=np.int64))
+
+
+def _tsresol(options, endian):
+    """
+    Zeitauflösung aus den Optionen eines Interface Description Blocks.
+    """
+    pos = 0
+    while pos + 4 <= len(options):
+        code, length = struct.unpack_from(endian + 'HH', options, pos)
+        if code == 0:
+            break
+        if code == 9 and length >= 1:
+            value = options[pos + 4]
+            if value & 0x80:
+                return 2.0 ** -(value & 0x7F)
+            return 10.0 ** -value
+        pos += 4 + ((length + 3) & ~3)
+    return 1e-6
+
+
+def _records_pcapng(mm, batch_size):
+    """
+    Läuft die Blöcke einer pcapng-Datei ab (SHB, IDB, EPB, SPB).
+    """
+    size = len(mm)
+    pos = 0
+    endian = '<'
+    interfaces = []  # (linktype, Zeiteinheit, snaplen)
+    ts, offsets, caplens, origlens, links = [], [], [], [], []
+    while pos + 12 <= size:
+        block_type = struct.unpack_from(endian + 'I', mm, pos)[0]
+        if block_type == PCAPNG_SHB:
+            # Section Header: Byte-Reihenfolge neu bestimmen, Interfaces zurücksetzen
+            magic = bytes(mm[pos + 8:pos + 12])
+            endian = '<' if magic == b'\x4d\x3c\x2b\x1a' else '>'
+            interfaces = []
+        block_len = struct.unpack_from(endian + 'I', mm, pos + 4)[0]
+        if block_len < 12 or pos + block_len > size:
+            break
+        body = pos + 8
+        if block_type == 1:
+            linktype, _, snaplen = struct.unpack_from(endian + 'HHI', mm, body)
+            unit = _tsresol(mm[body + 8:pos + block_len - 4], endian)
+            interfaces.append((linktype, unit, snaplen))
+        elif block_type == 6:
+            iface, ts_high, ts_low, caplen, origlen = struct.unpack_from(endian + 'IIIII', mm, body)
+            linktype, unit, _ = interfaces[iface]
+            ts.append(((ts_high << 32) | ts_low) * unit)
+            offsets.append(body + 20)
+            caplens.append(caplen)
+            origlens.append(origlen)
+            links.append(linktype)
+        elif block_type == 3:
+            # Simple Packet Block: kein Zeitstempel, Interface 0
+            origlen = struct.unpack_from(endian + 'I', mm, body)[0]
+            linktype, _, snaplen = interfaces[0]
+            ts.append(ts[-1] if ts else 0.0)
+            offsets.append(body + 4)
+            caplens.append(min(origlen, snaplen or origlen, block_len - 16))
+            origlens.append(origlen)
+            links.append(linktype)
+        pos += block_len
+
+        if len(offsets) >= batch_size or (offsets and pos + 12 > size):
+            yield (np.array(ts), np.array(offsets, dtype=np.int64), np.array(caplens, dtype=np.int64),
+                   np.array(origlens, dtype=np.int64), np.array(links, dtype=np.int64))
+            ts, offsets, caplens, origlens, links = [], [], [], [], []
+    if offsets:
+        yield (np.array(ts), np.array(offsets, dtype=np.int64), np.array(caplens, dtype=np.int64),
+               np.array(origlens, dtype=np.int64), np.array(links, dtype=np.int64))
+
+
+class _Gather:
+    """
+    Liest Big-Endian-Felder an vielen Offsets gleichzeitig. Offsets
+    außerhalb des mitgeschnittenen Pakets werden als ungültig markiert.
+    """
+
+    def __init__(self, buf, start, end):
+        self.buf = buf
+        self.start = start
+        self.end = end
+        self.last = len(buf) - 1
+
+    def u8(self, off):
+        return self.buf[np.clip(off, 0, self.last)].astype(np.uint64)
+
+    def be16(self, off):
+        return (self.u8(off) << np.uint64(8)) | self.u8(off + 1)
+
+    def be32(self, off):
+        return (self.be16(off) << np.uint64(16)) | self.be16(off + 2)
+
+    def be64(self, off):
+        return (self.be32(off) << np.uint64(32)) | self.be32(off + 4)
+
+    def inside(self, off, length):
+        return (off >= self.start) & (off + length <= self.end)
+
+
+def _decode(buf, ts, offsets, caplens, origlens, links):
+    """
+    Holt IP- und TCP-Felder aller Pakete eines Blocks vektorisiert.
+    """
+    g = _Gather(buf, offsets, offsets + caplens)
+    n = len(offsets)
+
+    # Link-Layer: Offset des Netzwerk-Headers und EtherType
+    l3 = offsets.copy()
+    ethertype = np.zeros(n, dtype=np.uint64)
+    eth = links == LINKTYPE_ETHERNET
+    ethertype = np.where(eth, g.be16(offsets + 12), ethertype)
+    l3 = np.where(eth, offsets + 14, l3)
+    for _ in range(2):  # bis zu zwei VLAN-Tags (802.1Q / 802.1ad)
+        vlan = eth & ((ethertype == 0x8100) | (ethertype == 0x88A8))
+        ethertype = np.where(vlan, g.be16(l3 + 2), ethertype)
+        l3 = np.where(vlan, l3 + 4, l3)
+    sll = links == LINKTYPE_LINUX_SLL
+    ethertype = np.where(sll, g.be16(offsets + 14), ethertype)
+    l3 = np.where(sll, offsets + 16, l3)
+    sll2 = links == LINKTYPE_LINUX_SLL2
+    ethertype = np.where(sll2, g.be16(offsets), ethertype)
+    l3 = np.where(sll2, offsets + 20, l3)
+    null = links == LINKTYPE_NULL
+    l3 = np.where(null, offsets + 4, l3)
+    raw = null | np.isin(links, (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6, 12, 14))
+
+    version = g.u8(l3) >> np.uint64(4)
+    is_v4 = np.where(raw, version == 4, ethertype == 0x0800) & g.inside(l3, 20)
+    is_v6 = np.where(raw, version == 6, ethertype == 0x86DD) & g.inside(l3, 40)
+
+    # IPv4: IHL, Gesamtlänge, Protokoll, Adressen
+    ihl = (g.u8(l3) & np.uint64(0x0F)).astype(np.int64) * 4
+    v4_total = g.be16(l3 + 2).astype(np.int64)
+    v4_proto = g.u8(l3 + 9)
+    # IPv6: Payload-Länge, Next Header (ohne Extension Header)
+    v6_payload = g.be16(l3 + 4).astype(np.int64)
+    v6_proto = g.u8(l3 + 6)
+
+    l4 = np.where(is_v4, l3 + ihl, l3 + 40)
+    ip_payload = np.where(is_v4, v4_total - ihl, v6_payload)
+    is_tcp = ((is_v4 & (v4_proto == 6)) | (is_v6 & (v6_proto == 6))) & g.inside(l4, 20)
+
+    zero = np.zeros(n, dtype=np.uint64)
+    src_hi = np.where(is_v6, g.be64(l3 + 8), zero)
+    src_lo = np.where(is_v6, g.be64(l3 + 16), np.where(is_v4, g.be32(l3 + 12), zero))
+    dst_hi = np.where(is_v6, g.be64(l3 + 24), zero)
+    dst_lo = np.where(is_v6, g.be64(l3 + 32), np.where(is_v4, g.be32(l3 + 16), zero))
+
+    tcp_hlen = (g.u8(l4 + 12) >> np.uint64(4)).astype(np.int64) * 4
+    payload_len = np.where(is_tcp, np.maximum(ip_payload - tcp_hlen, 0), 0)
+
+    def tcp(values, dtype):
+        return np.where(is_tcp, values, 0).astype(dtype)
+
+    return {
+        'ts': ts,
+        'frame_len': origlens,
+        'is_tcp': is_tcp,
+        'ip_version': np.where(is_v4, 4, np.where(is_v6, 6, 0)).astype(np.int8),
+        'src_hi': src_hi,
+        'src_lo': src_lo,
+        'dst_hi': dst_hi,
+        'dst_lo': dst_lo,
+        'sport': tcp(g.be16(l4), np.uint16),
+        'dport': tcp(g.be16(l4 + 2), np.uint16),
+        'seq': tcp(g.be32(l4 + 4), np.uint32),
+        'ack': tcp(g.be32(l4 + 8), np.uint32),
+        'flags': tcp(g.u8(l4 + 13), np.uint8),
+        'window': tcp(g.be16(l4 + 14), np.uint16),
+        'payload_len': payload_len.astype(np.int64),
+        'options_len': tcp(np.maximum(tcp_hlen - 20, 0), np.int64),
+    }
+
+
+def iter_packets(path, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Liefert die Pakete einer pcap/pcapng-Datei blockweise als dict von
+    Spalten-Arrays (siehe FIELDS). Zeitstempel sind Sekunden seit Epoch,
+    frame_len ist die Originallänge (wie frame.len in tshark).
+    """
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise PcapError(f"{path}: leere Datei")
+    with mm:
+        magic = bytes(mm[:4])
+        if magic in PCAP_MAGIC:
+            records = _records_pcap(mm, batch_size)
+        elif len(mm) >= 4 and struct.unpack_from('<I', mm, 0)[0] == PCAPNG_SHB:
+            records = _records_pcapng(mm, batch_size)
+        else:
+            raise PcapError(f"{path}: weder pcap noch pcapng")
+
+        buf = np.frombuffer(mm, dtype=np.uint8)
+        try:
+            for batch in records:
+                yield _decode(buf, *batch)
+        finally:
+            # Alle Sichten auf die mmap freigeben, bevor sie geschlossen wird
+            del buf
+            records.close()
+
+
+def format_address(hi, lo, version):
+    """
+    Adresse aus (src_hi, src_lo) bzw. (dst_hi, dst_lo) als Text.
+    """
+    if version == 4:
+        return str(ipaddress.IPv4Address(int(lo)))
+    return str(ipaddress.IPv6Address((int(hi) << 64) | int(lo)))
@@ -0,0 +1,302 @@
+"""
+Analyse pro TCP-Flow (5-Tupel, je Richtung) direkt aus pcap/pcapng.
+
+Statt den Info-Text von tshark nach "Retransmission" zu durchsuchen,
+wird pro Richtung einer Verbindung ein kleiner Zustand gehalten: das
+höchste bisher gesehene Sequenzende und eine Liste der Lücken darunter
+(wie SACK-Blöcke, nur umgekehrt). Damit wird jedes Datensegment
+eingeordnet als
+
+- in Reihenfolge (beginnt genau am bisherigen Ende),
+- Capture-Lücke ("previous segment not captured", beginnt darüber),
+- Out-of-Order (füllt kurz nach ihrem Entstehen eine Lücke),
+- Retransmission (alles andere unterhalb des bisherigen Endes).
+
+Der Normalfall wird pro Block und Flow mit NumPy berechnet, nur Lücken
+und Segmente unterhalb des Endes laufen durch Python. Die Datei wird
+dabei genau einmal gelesen, auch bei vielen parallelen iperf3-Streams.
+
+Usage: python3 tcp_flows.py <capture.pcap> [--reorder-threshold 0.003] [--csv flows.csv]
+"""
+
+import csv
+import bisect
+import argparse
+
+import numpy as np
+
+from pcap_reader import iter_packets, format_address, TCP_SYN, TCP_FIN
+
+# Ein Segment, das eine Lücke früher als nach dieser Zeit füllt, gilt als
+# Out-of-Order statt als Retransmission (wie tshark ohne bekannte RTT)
+DEFAULT_REORDER_THRESHOLD = 0.003
+
+# Höchstens so viele offene Lücken pro Flow; die ältesten fallen heraus
+# und zählen dann als nicht mitgeschnitten
+MAX_HOLES = 1024
+
+KEY_FIELDS = ('src_hi', 'src_lo', 'dst_hi', 'dst_lo', 'sport', 'dport')
+
+CSV_COLUMNS = ['src', 'sport', 'dst', 'dport', 'packets', 'data_packets', 'bytes', 'payload_bytes',
+               'goodput_bytes', 'retransmissions', 'retransmitted_bytes', 'out_of_order',
+               'gaps', 'missing_bytes', 'duration', 'goodput_mbps', 'loss_pct']
+
+
+class FlowState:
+    """
+    Zustand einer Richtung einer TCP-Verbindung. Sequenznummern werden
+    relativ zum ersten gesehenen Segment und ohne 32-Bit-Überlauf gezählt.
+    """
+
+    __slots__ = ('key', 'ip_version', 'first_ts', 'last_ts', 'packets', 'data_packets', 'bytes',
+                 'payload_bytes', 'unique_seq', 'last_raw', 'last_abs', 'max_end', 'holes',
+                 'dropped_hole_bytes', 'retransmissions', 'retransmitted_bytes', 'out_of_order',
+                 'gaps', 'syn', 'fin')
+
+    def __init__(self, key, ip_version, ts, raw_seq):
+        self.key = key
+        self.ip_version = ip_version
+        self.first_ts = ts
+        self.last_ts = ts
+        self.packets = 0
+        self.data_packets = 0
+        self.bytes = 0
+        self.payload_bytes = 0
+        self.unique_seq = 0
+        self.last_raw = raw_seq
+        self.last_abs = 0
+        self.max_end = -1          # -1: noch kein Datensegment gesehen
+        self.holes = []            # sortiert: [Beginn, Ende, Zeitpunkt des Entstehens]
+        self.dropped_hole_bytes = 0
+        self.retransmissions = 0
+        self.retransmitted_bytes = 0
+        self.out_of_order = 0
+        self.gaps = 0
+        self.syn = False
+        self.fin = False
+
+    def open_hole(self, start, end, ts):
+        self.holes.append([start, end, ts])
+        self.gaps += 1
+        if len(self.holes) > MAX_HOLES:
+            oldest = self.holes.pop(0)
+            self.dropped_hole_bytes += oldest[1] - oldest[0]
+
+    def fill(self, start, end):
+        """
+        Entfernt [start, end) aus den Lücken. Liefert die Anzahl neu
+        gefüllter Bytes und den Entstehungszeitpunkt der ersten
+        berührten Lücke (None, wenn keine berührt wurde).
+        """
+        holes = self.holes
+        i = max(bisect.bisect_right(holes, [start]) - 1, 0)
+        filled = 0
+        opened = None
+        while i < len(holes) and holes[i][0] < end:
+            h_start, h_end, h_ts = holes[i]
+            if h_end <= start:
+                i += 1
+                continue
+            lo, hi = max(h_start, start), min(h_end, end)
+            filled += hi - lo
+            if opened is None:
+                opened = h_ts
+            pieces = []
+            if h_start < lo:
+                pieces.append([h_start, lo, h_ts])
+            if hi < h_end:
+                pieces.append([hi, h_end, h_ts])
+            holes[i:i + 1] = pieces
+            i += len(pieces)
+        return filled, opened
+
+    @property
+    def missing_bytes(self):
+        """
+        Bytes, die nie im Mitschnitt aufgetaucht sind.
+        """
+        return sum(end - start for start, end, _ in self.holes) + self.dropped_hole_bytes
+
+    @property
+    def goodput_bytes(self):
+        # SYN und FIN belegen je eine Sequenznummer, aber keine Nutzdaten
+        return max(self.unique_seq - self.syn - self.fin, 0)
+
+    @property
+    def duration(self):
+        return self.last_ts - self.first_ts
+
+    @property
+    def goodput_mbps(self):
+        return self.goodput_bytes * 8 / (self.duration * 1_000_000) if self.duration > 0 else 0.0
+
+    @property
+    def loss_pct(self):
+        """
+        Anteil der Datensegmente, die erneut gesendet wurden.
+        """
+        return 100.0 * self.retransmissions / self.data_packets if self.data_packets else 0.0
+
+    def endpoints(self):
+        src_hi, src_lo, dst_hi, dst_lo, sport, dport = self.key
+        return (format_address(src_hi, src_lo, self.ip_version), sport,
+                format_address(dst_hi, dst_lo, self.ip_version), dport)
+
+
+class FlowTable:
+    """
+    Sammelt die Flows einer Capture blockweise (siehe add_batch).
+    """
+
+    def __init__(self, reorder_threshold=DEFAULT_REORDER_THRESHOLD):
+        self.reorder_threshold = reorder_threshold
+        self.flows = {}
+
+    def add_batch(self, packets):
+        """
+        Verarbeitet einen Block aus pcap_reader.iter_packets. Liefert für
+        die TCP-Pakete des Blocks (in Dateireihenfolge) eine Maske der
+        Retransmissions.
+        """
+        tcp = packets['is_tcp']
+        if not tcp.any():
+            return np.zeros(0, dtype=bool)
+        cols = {name: packets[name][tcp] for name in
+                KEY_FIELDS + ('ts', 'frame_len', 'ip_version', 'seq', 'flags', 'payload_len')}
+
+        # Pakete nach Flow gruppieren (lexsort ist stabil, Reihenfolge im Flow bleibt)
+        order = np.lexsort([cols[name] for name in reversed(KEY_FIELDS)])
+        cols = {name: values[order] for name, values in cols.items()}
+        change = np.zeros(len(order) - 1, dtype=bool)
+        for name in KEY_FIELDS:
+            change |= cols[name][1:] != cols[name][:-1]
+        bounds = np.concatenate(([0], np.flatnonzero(change) + 1, [len(order)]))
+        retransmitted = np.zeros(len(order), dtype=bool)
+
+        for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            key = tuple(int(cols[name][a]) for name in KEY_FIELDS)
+            flow = self.flows.get(key)
+            if flow is None:
+                flow = self.flows[key] = FlowState(key, int(cols['ip_version'][a]),
+                                                   float(cols['ts'][a]), int(cols['seq'][a]))
+            self._update(flow, {name: values[a:b] for name, values in cols.items()}, retransmitted[a:b])
+
+        # Zurück in die Reihenfolge der Datei
+        result = np.empty_like(retransmitted)
+        result[order] = retransmitted
+        return result
+
+    def _update(self, flow, c, retransmitted):
+        ts = c['ts']
+        flags = c['flags']
+        payload = c['payload_len']
+        syn = (flags & TCP_SYN) > 0
+        fin = (flags & TCP_FIN) > 0
+        length = payload + syn + fin
+
+        flow.packets += len(ts)
+        flow.bytes += int(c['frame_len'].sum())
+        flow.payload_bytes += int(payload.sum())
+        flow.last_ts = float(ts[-1])
+        flow.syn |= bool(syn.any())
+        flow.fin |= bool(fin.any())
+
+        # Sequenznummern über 32-Bit-Überläufe hinweg fortzählen
+        raw = c['seq'].astype(np.int64)
+        delta = np.diff(raw, prepend=flow.last_raw)
+        delta = (delta + 2**31) % 2**32 - 2**31
+        absolute = flow.last_abs + np.cumsum(delta)
+        flow.last_raw = int(raw[-1])
+        flow.last_abs = int(absolute[-1])
+
+        data = length > 0
+        flow.data_packets += int(data.sum())
+        end = np.where(data, absolute + length, -1)
+        # Höchstes Sequenzende vor jedem Segment
+        prev_end = np.maximum.accumulate(np.concatenate(([flow.max_end], end)))
+        flow.max_end = int(prev_end[-1])
+        prev_end = prev_end[:-1]
+
+        # Neu gesehene Sequenzbereiche oberhalb des bisherigen Endes
+        flow.unique_seq += int(np.where(data, np.maximum(end - np.maximum(absolute, prev_end), 0), 0).sum())
+
+        known = data & (prev_end >= 0)
+        gap = known & (absolute > prev_end)
+        below = known & (absolute < prev_end)
+
+        # Nur die Ausnahmen laufen durch Python, in Paketreihenfolge
+        for j in np.flatnonzero(gap | below).tolist():
+            start, stop, limit = int(absolute[j]), int(end[j]), int(prev_end[j])
+            if gap[j]:
+                flow.open_hole(limit, start, float(ts[j]))
+                continue
+            filled, opened = flow.fill(start, min(stop, limit))
+            flow.unique_seq += filled
+            if opened is not None and ts[j] - opened < self.reorder_threshold:
+                flow.out_of_order += 1
+            else:
+                flow.retransmissions += 1
+                flow.retransmitted_bytes += int(payload[j])
+                retransmitted[j] = True
+
+    def data_flows(self):
+        """
+        Flows mit Nutzdaten, nach Datenmenge absteigend.
+        """
+        flows = [flow for flow in self.flows.values() if flow.payload_bytes > 0]
+        return sorted(flows, key=lambda flow: flow.payload_bytes, reverse=True)
+
+
+def analyze_flows(file_name, reorder_threshold=DEFAULT_REORDER_THRESHOLD):
+    table = FlowTable(reorder_threshold)
+    for packets in iter_packets(file_name):
+        table.add_batch(packets)
+    return table
+
+
+def flow_row(flow):
+    src, sport, dst, dport = flow.endpoints()
+    return [src, sport, dst, dport, flow.packets, flow.data_packets, flow.bytes, flow.payload_bytes,
+            flow.goodput_bytes, flow.retransmissions, flow.retransmitted_bytes, flow.out_of_order,
+            flow.gaps, flow.missing_bytes, round(flow.duration, 6), round(flow.goodput_mbps, 3),
+            round(flow.loss_pct, 3)]
+
+
+def print_flows(file_name, flows):
+    print(f"Analyzed file: {file_name}")
+    print(f"Flows with data: {len(flows)}")
+    for flow in flows:
+        src, sport, dst, dport = flow.endpoints()
+        print(f"{src}:{sport} -> {dst}:{dport}")
+        print(f"  Packets: {flow.packets} ({flow.data_packets} with data), {flow.payload_bytes} payload Bytes")
+        print(f"  Retransmissions: {flow.retransmissions} ({flow.retransmitted_bytes} Bytes), "
+              f"Out-of-order: {flow.out_of_order}, Capture gaps: {flow.gaps} "
+              f"({flow.missing_bytes} Bytes never seen)")
+        print(f"  Duration: {flow.duration:.2f} seconds, Goodput: {flow.goodput_mbps:.2f} Mbps, "
+              f"Loss: {flow.loss_pct:.2f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python3 tcp_flows.py <path_to_pcap_file> [--reorder-threshold S] [--csv FILE]"
+    )
+    parser.add_argument("file_name")
+    parser.add_argument("--reorder-threshold", type=float, default=DEFAULT_REORDER_THRESHOLD,
+                        help=f"Lücken, die schneller gefüllt werden, gelten als Out-of-Order "
+                             f"(Standard: {DEFAULT_REORDER_THRESHOLD} s)")
+    parser.add_argument("--csv", help="Tabelle der Flows zusätzlich als CSV schreiben")
+    args = parser.parse_args()
+
+    flows = analyze_flows(args.file_name, args.reorder_threshold).data_flows()
+    print_flows(args.file_name, flows)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            writer.writerows(flow_row(flow) for flow in flows)
+        print(f"Flow table saved to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
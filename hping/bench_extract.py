@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: regex line-by-line RTT parsing vs. the mmap/NumPy extractor.
+
+Writes a synthetic hping log (10M lines by default) to a temp file and
+times both paths on it. Usage: python3 bench_extract.py [lines] [log_file]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import tempfile
+
+import numpy as np
+
+from rtt_extract import extract_rtts
+
+
+def write_synthetic_log(path, lines):
+    random.seed(0)
+    with open(path, 'w') as f:
+        f.write("HPING lg.reuna.cl (enp2s0 146.83.187.2): icmp mode set, 28 headers + 0 data bytes\n")
+        block = []
+        for seq in range(lines):
+            rtt = 190.0 + random.expovariate(0.3)
+            block.append(f"len=46 ip=146.83.187.2 ttl=50 id={seq % 65536} "
+                         f"icmp_seq={seq % 65536} rtt={rtt:.1f} ms\n")
+            if len(block) == 100000:
+                f.writelines(block)
+                block = []
+        f.writelines(block)
+
+
+def regex_path(path):
+    # The per-line path parse-rtt.py and sort_rtt.py used before
+    pattern = re.compile(r'rtt=([\d\.]+)\s+ms')
+    values = []
+    with open(path, 'r') as f:
+        for line in f:
+            match = pattern.search(line)
+            if match:
+                values.append(float(match.group(1)))
+    return np.array(values)
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    if len(sys.argv) > 2:
+        path, cleanup = sys.argv[2], False
+    else:
+        fd, path = tempfile.mkstemp(suffix=".txt", prefix="hping_bench_")
+        os.close(fd)
+        cleanup = True
+
+    try:
+        if cleanup or not os.path.exists(path):
+            print(f"Writing {lines} synthetic lines to {path} ...")
+            write_synthetic_log(path, lines)
+        size_mb = os.path.getsize(path) / 1e6
+
+        t0 = time.perf_counter()
+        ref = regex_path(path)
+        t_regex = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        fast = extract_rtts(path)
+        t_fast = time.perf_counter() - t0
+
+        print(f"File size:       {size_mb:.1f} MB, {len(ref)} RTTs")
+        print(f"regex per line:  {t_regex:.2f} s ({size_mb / t_regex:.0f} MB/s)")
+        print(f"mmap + NumPy:    {t_fast:.2f} s ({size_mb / t_fast:.0f} MB/s)")
+        print(f"Speedup:         {t_regex / t_fast:.1f}x")
+        print(f"Identical values: {np.array_equal(ref, fast)}")
+    finally:
+        if cleanup:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
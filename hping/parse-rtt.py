@@ -1,54 +1,91 @@
 #!/usr/bin/env python3
 
-import re
 import sys
-import math
-
-def simple_percentile(sorted_list, p):
-    """
-    Returns the p-th percentile (0 <= p <= 100) of a *sorted* list
-    using a simple 'nearest-rank' approach (no linear interpolation).
-    """
-    if not sorted_list:
-        return None
-    # Convert percentile p (e.g. 95) to an index in the range 0..len-1
-    idx = int(round((p / 100.0) * (len(sorted_list) - 1)))
-    return sorted_list[idx]
-
-rtt_values = []
-
-# Read all lines from stdin
-for line in sys.stdin:
-    match = re.search(r'rtt=([\d\.]+)\s+ms', line)
-    if match:
-        val = float(match.group(1))
-        rtt_values.append(val)
-
-if not rtt_values:
-    print("No RTT found!")
-    sys.exit(0)
-
-# Calculate mean and std. dev.
-mean = sum(rtt_values)/len(rtt_values)
-if len(rtt_values) > 1:
-    var = sum((x - mean)**2 for x in rtt_values) / (len(rtt_values)-1)
-    sd = math.sqrt(var)
-else:
-    sd = 0.0
-
-# Sort the values for percentile calculation
-sorted_rtt = sorted(rtt_values)
-
-# Example percentiles to compute
-percentiles = [50, 90, 95, 99]
-
-# Print the basic stats
-print(f"Count: {len(rtt_values)}")
-print(f"Mean RTT: {mean:.2f} ms")
-print(f"StdDev: {sd:.2f} ms")
-
-# Print the percentiles
-print("Percentiles:")
-for p in percentiles:
-    val = simple_percentile(sorted_rtt, p)
-    print(f"  {p}th: {val:.2f} ms")
+import argparse
+
+from rtt_stats import RttSummary, PERCENTILES
+from rtt_batch import expand_patterns, run_batch
+from rtt_extract import iter_file_rtts
+from rtt_follow import follow, parse_duration
+
+
+def print_summary(summary, title=None):
+    if title:
+        print(f"=== {title}")
+    if not summary.count:
+        print("No RTT found!")
+        return
+    # Print the basic stats and the percentiles
+    for line in summary.report(PERCENTILES):
+        print(line)
+
+
+def batch_main(args):
+    files = expand_patterns(args.batch)
+    if not files:
+        print(f"No files match {' '.join(args.batch)}")
+        sys.exit(1)
+
+    per_file, per_day, total = run_batch(files, jobs=args.jobs, exact=args.exact,
+                                         relative_accuracy=args.accuracy)
+    for path in files:
+        print_summary(per_file[path], path)
+        print()
+    for day in sorted(per_day):
+        print_summary(per_day[day], f"Day {day}")
+        print()
+    print_summary(total, f"Total ({len(files)} files)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Summarize hping RTTs read from stdin (count, mean, stddev, percentiles)."
+    )
+    parser.add_argument("files", nargs="*",
+                        help="hping logs to read instead of stdin (memory-mapped)")
+    parser.add_argument("--exact", action="store_true",
+                        help="keep every RTT and compute exact percentiles (validation mode)")
+    parser.add_argument("--accuracy", type=float, default=0.001,
+                        help="relative accuracy of the percentile sketch (default: 0.001)")
+    parser.add_argument("--batch", nargs="+", metavar="GLOB",
+                        help="summarize all matching hping logs in parallel "
+                             "(per file, per day and total), e.g. 'hping_24h_result*.txt'")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of worker processes for --batch (default: all cores)")
+    parser.add_argument("--follow", metavar="LOG",
+                        help="tail a growing hping log (like tail -F) and print live statistics")
+    parser.add_argument("--interval", type=parse_duration, default=10.0,
+                        help="print interval for --follow, e.g. 10s (default: 10s)")
+    parser.add_argument("--windows", default="5m,1h",
+                        help="rolling windows for --follow (default: 5m,1h)")
+    parser.add_argument("--skip-existing", action="store_true",
+                        help="with --follow, ignore what is already in the log")
+    args = parser.parse_args()
+
+    if args.follow:
+        windows = [parse_duration(w) for w in args.windows.split(",") if w.strip()]
+        follow(args.follow, interval=args.interval, windows=windows, percentiles=PERCENTILES,
+               relative_accuracy=args.accuracy, from_start=not args.skip_existing)
+        return
+
+    if args.batch:
+        batch_main(args)
+        return
+
+    summary = RttSummary(exact=args.exact, relative_accuracy=args.accuracy)
+
+    # One pass over the raw bytes, constant memory
+    if args.files:
+        for path in args.files:
+            with open(path, 'rb') as f:
+                for values in iter_file_rtts(f):
+                    summary.add_array(values)
+    else:
+        for values in iter_file_rtts(sys.stdin.buffer):
+            summary.add_array(values)
+
+    print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
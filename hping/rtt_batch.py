@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Batch mode for parse-rtt.py: summarize many hping logs in a process pool.
+
+Every worker parses one log and returns an RttSummary (count, mean, M2,
+min, max and quantile sketch). The partial summaries are merged into
+per-file, per-day and grand-total statistics in the parent process.
+"""
+
+import os
+import re
+import glob
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from rtt_stats import RttSummary
+from rtt_extract import iter_file_rtts
+
+
+def summarize_file(path, exact=False, relative_accuracy=0.001):
+    """
+    Parse one hping log and return its partial RttSummary.
+    """
+    summary = RttSummary(exact=exact, relative_accuracy=relative_accuracy)
+    with open(path, 'rb') as f:
+        for values in iter_file_rtts(f):
+            summary.add_array(values)
+    return summary
+
+
+def day_key(path):
+    """
+    Day a log belongs to, taken from the file name if possible:
+    YYYYMMDD, DDMMYY (e.g. 061224) or DDMM (e.g. hping24h_stats2701),
+    otherwise the modification date of the file.
+    """
+    name = os.path.basename(path)
+    # DDMM has no year; it is parsed in the leap year 2000, otherwise
+    # strptime takes 1900 and rejects 2902
+    for fmt, pattern, year in (("%Y%m%d", r'(?<!\d)(\d{8})(?!\d)', ""),
+                               ("%d%m%y", r'(?<!\d)(\d{6})(?!\d)', ""),
+                               ("%d%m%Y", r'(?<!\d)(\d{4})(?!\d)', "2000")):
+        match = re.search(pattern, name)
+        if not match:
+            continue
+        try:
+            day = datetime.datetime.strptime(match.group(1) + year, fmt)
+        except ValueError:
+            continue
+        if year:
+            return day.strftime("%d.%m.")
+        return day.strftime("%Y-%m-%d")
+    mtime = datetime.datetime.fromtimestamp(os.path.getmtime(path))
+    return mtime.strftime("%Y-%m-%d")
+
+
+def expand_patterns(patterns):
+    """
+    Expand glob patterns (quoted on the shell) into a sorted file list.
+    """
+    files = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern)
+        if not matches and os.path.isfile(pattern):
+            matches = [pattern]
+        files.update(matches)
+    return sorted(files)
+
+
+def run_batch(files, jobs=None, exact=False, relative_accuracy=0.001):
+    """
+    Summarize `files` across a process pool.
+
+    Returns (per_file, per_day, total): two dicts of RttSummary keyed by
+    path and by day, and the grand-total RttSummary.
+    """
+    per_file = {}
+    per_day = {}
+    total = RttSummary(exact=exact, relative_accuracy=relative_accuracy)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        partials = pool.map(summarize_file, files,
+                            [exact] * len(files),
+                            [relative_accuracy] * len(files))
+        for path, partial in zip(files, partials):
+            per_file[path] = partial
+            day = day_key(path)
+            if day not in per_day:
+                per_day[day] = RttSummary(exact=exact,
+                                          relative_accuracy=relative_accuracy)
+            per_day[day].merge(partial)
+            total.merge(partial)
+
+    return per_file, per_day, total
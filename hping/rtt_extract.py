@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Fast RTT extraction from hping logs without regex or per-line decoding.
+
+The log is memory-mapped and scanned block by block as a NumPy byte
+array: all "rtt=" markers of a block are located at once and the
+decimal numbers behind them are converted in a vectorized step.
+Blocks always end on a newline, so no line is ever split.
+"""
+
+import os
+import mmap
+import stat
+
+import numpy as np
+
+RTT_FIELD = b'rtt='
+# Also matches "icmp_seq=" in ICMP mode
+SEQ_FIELD = b'seq='
+
+# Bytes handed to NumPy per step (bounded memory on multi-GB captures)
+BLOCK_SIZE = 64 * 1024 * 1024
+
+# Longest number we expect behind a field ("1271.7" is 6 bytes)
+NUMBER_WIDTH = 16
+
+_NEWLINE = ord('\n')
+
+
+def find_field(buf, field=RTT_FIELD):
+    """
+    Returns the offsets just behind every occurrence of `field` in `buf`
+    (a uint8 NumPy array).
+    """
+    # Candidates from the first byte, then narrow down byte by byte
+    pos = np.flatnonzero(buf[:max(len(buf) - len(field) + 1, 0)] == field[0])
+    for i in range(1, len(field)):
+        pos = pos[buf[pos + i] == field[i]]
+    return pos + len(field)
+
+
+def parse_decimals(buf, starts, width=NUMBER_WIDTH):
+    """
+    Converts the unsigned decimal numbers starting at `starts` to float64.
+
+    Returns (values, valid); entries without a digit are marked invalid.
+    Works column by column (Horner scheme) over all numbers at once and
+    stops as soon as every number has ended. The mantissa is built as an
+    integer and divided by a power of ten, so results are identical to
+    float() on the same text.
+    """
+    n = len(starts)
+    mantissa = np.zeros(n, dtype=np.int64)
+    nfrac = np.zeros(n, dtype=np.int64)
+    ndigits = np.zeros(n, dtype=np.int64)
+    active = np.ones(n, dtype=bool)
+    seen_dot = np.zeros(n, dtype=bool)
+    last = len(buf) - 1
+
+    for j in range(width):
+        pos = starts + j
+        active &= pos <= last
+        column = buf[np.minimum(pos, last)]
+        value = column - np.uint8(ord('0'))  # wraps around for non-digits
+        digit = active & (value < 10)
+        # The number ends at the first byte that is neither digit nor the first dot
+        dot = active & (column == ord('.')) & ~seen_dot
+        active = digit | dot
+        if not active.any():
+            break
+        mantissa = np.where(digit, mantissa * 10 + value, mantissa)
+        nfrac += digit & seen_dot
+        ndigits += digit
+        seen_dot |= dot
+
+    return mantissa / 10.0 ** nfrac, ndigits > 0
+
+
+def scan_rtts(buf):
+    """
+    All RTT values (ms) found in a uint8 array or bytes-like buffer.
+    """
+    values, _ = scan_rtt_positions(buf)
+    return values
+
+
+def scan_rtt_positions(buf, field=RTT_FIELD):
+    """
+    RTT values of a buffer plus the offset of each value in the buffer.
+    """
+    buf = np.frombuffer(buf, dtype=np.uint8) if not isinstance(buf, np.ndarray) else buf
+    starts = find_field(buf, field)
+    values, valid = parse_decimals(buf, starts)
+    return values[valid], starts[valid]
+
+
+def scan_rtt_lines(buf):
+    """
+    Like scan_rtt_positions, but returns (values, line_starts, line_ends)
+    with one entry per line (the first RTT of a line counts, as with
+    re.search). Line ends exclude the newline.
+    """
+    buf = np.frombuffer(buf, dtype=np.uint8) if not isinstance(buf, np.ndarray) else buf
+    values, pos = scan_rtt_positions(buf)
+    newlines = np.flatnonzero(buf == _NEWLINE)
+    line = np.searchsorted(newlines, pos)
+    line, first = np.unique(line, return_index=True)
+    values = values[first]
+    ends = np.append(newlines, len(buf))[line]
+    starts = np.append(-1, newlines)[line] + 1
+    return values, starts, ends
+
+
+def scan_replies(buf):
+    """
+    (seq, rtt) of every line that carries both fields, e.g.
+    "len=46 ip=... icmp_seq=17 rtt=194.6 ms". seq is returned as int64
+    as printed by hping (16 bit, wraps at 65536).
+    """
+    buf = np.frombuffer(buf, dtype=np.uint8) if not isinstance(buf, np.ndarray) else buf
+    newlines = np.flatnonzero(buf == _NEWLINE)
+    rtts, rtt_pos = scan_rtt_positions(buf)
+    seqs, seq_pos = scan_rtt_positions(buf, SEQ_FIELD)
+    rtt_line, rtt_first = np.unique(np.searchsorted(newlines, rtt_pos), return_index=True)
+    seq_line, seq_first = np.unique(np.searchsorted(newlines, seq_pos), return_index=True)
+    _, in_rtt, in_seq = np.intersect1d(rtt_line, seq_line, assume_unique=True, return_indices=True)
+    return seqs[seq_first[in_seq]].astype(np.int64), rtts[rtt_first[in_rtt]]
+
+
+def iter_blocks(mm, block_size=BLOCK_SIZE, start=0):
+    """
+    Yields (offset, uint8 array) views of a mmap, each ending on a newline.
+    """
+    size = len(mm)
+    while start < size:
+        end = min(start + block_size, size)
+        if end < size:
+            cut = mm.rfind(b'\n', start, end)
+            if cut >= 0:
+                end = cut + 1
+        yield start, np.frombuffer(mm, dtype=np.uint8, count=end - start, offset=start)
+        start = end
+
+
+def open_mmap(f):
+    """
+    Read-only mmap of an open binary file, or None if it is empty or
+    cannot be mapped (pipes, terminals).
+    """
+    try:
+        mode = os.fstat(f.fileno()).st_mode
+    except (OSError, ValueError):
+        return None
+    if not stat.S_ISREG(mode) or os.fstat(f.fileno()).st_size == 0:
+        return None
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def iter_file_rtts(f, block_size=BLOCK_SIZE):
+    """
+    Yields arrays of RTT values from an open binary file. Regular files
+    are memory-mapped, pipes (hping3 ... | parse-rtt.py) are read in
+    blocks and cut at the last newline.
+    """
+    mm = open_mmap(f)
+    if mm is not None:
+        with mm:
+            blocks = iter_blocks(mm, block_size)
+            block = None
+            try:
+                for _, block in blocks:
+                    yield scan_rtts(block)
+            finally:
+                # Views into the mmap must be gone before it is closed
+                del block
+                blocks.close()
+        return
+
+    rest = b''
+    while True:
+        chunk = f.read(block_size)
+        if not chunk:
+            break
+        data = rest + chunk
+        cut = data.rfind(b'\n') + 1
+        if cut == 0:
+            rest = data
+            continue
+        rest = data[cut:]
+        yield scan_rtts(data[:cut])
+    if rest:
+        yield scan_rtts(rest)
+
+
+def extract_rtts(path, block_size=BLOCK_SIZE):
+    """
+    All RTT values of an hping log as one float64 array.
+    """
+    with open(path, 'rb') as f:
+        parts = list(iter_file_rtts(f, block_size))
+    if not parts:
+        return np.empty(0)
+    return np.concatenate(parts)
+
+
+def extract_replies(path, block_size=BLOCK_SIZE):
+    """
+    (seq, rtt) arrays of all replies in an hping log, in file order.
+    """
+    seq_parts, rtt_parts = [], []
+    with open(path, 'rb') as f:
+        mm = open_mmap(f)
+        if mm is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        with mm:
+            block = None
+            for _, block in iter_blocks(mm, block_size):
+                seqs, rtts = scan_replies(block)
+                seq_parts.append(seqs)
+                rtt_parts.append(rtts)
+            del block
+    if not seq_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(seq_parts), np.concatenate(rtt_parts)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Follow mode for parse-rtt.py: tail a growing hping log (like tail -F).
+
+Only newly appended bytes are read and scanned, so every update costs
+O(new lines). Running totals and rolling windows (e.g. last 5 minutes,
+last hour) are printed at a fixed interval. hping lines carry no
+timestamp, so RTTs are placed in the windows by the time they were read.
+"""
+
+import os
+import time
+import datetime
+
+from rtt_stats import RttSummary, RollingWindow
+from rtt_extract import scan_rtts
+
+READ_SIZE = 4 * 1024 * 1024
+
+
+def parse_duration(text):
+    """
+    Converts "300", "90s", "5m" or "1h" to seconds.
+    """
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def format_duration(seconds):
+    for unit, size in (("h", 3600), ("m", 60)):
+        if seconds >= size and seconds % size == 0:
+            return f"{int(seconds // size)}{unit}"
+    return f"{seconds:g}s"
+
+
+class LogFollower:
+    """
+    Reads the bytes appended to a file since the last call. Starts over
+    when the file is replaced (new inode) or truncated.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.f = None
+        self.inode = None
+        self.pos = 0
+        self.rest = b''
+
+    def _open(self):
+        try:
+            self.f = open(self.path, 'rb')
+        except FileNotFoundError:
+            self.f = None
+            return False
+        self.inode = os.fstat(self.f.fileno()).st_ino
+        self.pos = 0
+        self.rest = b''
+        return True
+
+    def _drain(self):
+        chunks = []
+        while True:
+            chunk = self.f.read(READ_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            self.pos += len(chunk)
+        if not chunks:
+            return b''
+        data = self.rest + b''.join(chunks)
+        cut = data.rfind(b'\n') + 1
+        self.rest = data[cut:]
+        return data[:cut]
+
+    def read_new(self):
+        """
+        Returns the complete new lines as bytes (possibly empty).
+        """
+        if self.f is None and not self._open():
+            return b''
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            # Removed: keep reading the open file until a new one shows up
+            return self._drain()
+        if st.st_ino != self.inode:
+            # Rotated: finish the old file, then continue with the new one
+            data = self._drain()
+            self.f.close()
+            if not self._open():
+                return data
+            return data + self._drain()
+        if st.st_size < self.pos:
+            # Truncated: start over at the beginning
+            self.f.seek(0)
+            self.pos = 0
+            self.rest = b''
+        return self._drain()
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+
+
+def format_summary(label, summary, percentiles):
+    if not summary.count:
+        return f"  {label:>8}: no RTT"
+    stats = summary.stats
+    pct = " ".join(f"p{p}={summary.quantiles.quantile(p):.2f}" for p in percentiles)
+    return (f"  {label:>8}: n={stats.count} mean={stats.mean:.2f} sd={stats.stddev:.2f} "
+            f"max={stats.max:.2f} {pct} ms")
+
+
+def follow(path, interval=10.0, windows=(300.0, 3600.0), percentiles=(50, 90, 95, 99),
+           relative_accuracy=0.001, poll=0.5, from_start=True):
+    """
+    Tail `path` until interrupted, printing statistics every `interval` s.
+
+    With `from_start`, the existing content only counts into the totals,
+    because its arrival time says nothing about when it was measured.
+    """
+    total = RttSummary(relative_accuracy=relative_accuracy)
+    rolling = [RollingWindow(span, relative_accuracy=relative_accuracy) for span in windows]
+    follower = LogFollower(path)
+
+    initial = follower.read_new()
+    if from_start:
+        total.add_array(scan_rtts(initial))
+
+    next_report = time.monotonic() + interval
+    try:
+        while True:
+            now = time.monotonic()
+            values = scan_rtts(follower.read_new())
+            if len(values):
+                total.add_array(values)
+                for window in rolling:
+                    window.add_array(values, now)
+
+            if now >= next_report:
+                stamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                print(f"[{stamp}] {path}")
+                print(format_summary("total", total, percentiles))
+                for window in rolling:
+                    label = f"last {format_duration(window.span)}"
+                    print(format_summary(label, window.summary(now), percentiles))
+                print(flush=True)
+                next_report = now + interval
+            time.sleep(poll)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
+    return total
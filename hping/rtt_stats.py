@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Streaming RTT statistics used by parse-rtt.py and friends.
+
+RunningStats keeps count/mean/variance with Welford's algorithm, the
+quantile classes keep either a bounded log-bucket sketch (DDSketch style)
+or, for validation, every value. All of them can be merged, so partial
+results from several files/processes can be combined afterwards.
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+# Percentiles reported by default
+PERCENTILES = [50, 90, 95, 99]
+
+
+class RunningStats:
+    """
+    Single-pass count, mean, variance, min and max (Welford).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def add_array(self, values):
+        """
+        Add a NumPy array of values in one vectorized step.
+        """
+        if len(values) == 0:
+            return
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other):
+        """
+        Combine with another RunningStats (Chan et al. parallel update).
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        # Sample variance (n-1), same as the old two-pass computation
+        if self.count < 2:
+            return 0.0
+        return self.m2 / (self.count - 1)
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with bounded relative error (DDSketch style).
+
+    Positive values x are counted in bucket ceil(log_gamma(x)), so every
+    estimate is within `relative_accuracy` of a true value. At the default
+    0.1% (about 0.2 ms on a 195 ms path) RTTs between 0.1 ms and 10 s fit
+    into roughly 6000 buckets, independent of the number of samples.
+    If `max_buckets` is exceeded the lowest buckets are collapsed, which only
+    affects the accuracy of the smallest values.
+    """
+
+    def __init__(self, relative_accuracy=0.001, max_buckets=8192):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, x):
+        return math.ceil(math.log(x) / self._log_gamma)
+
+    def _value(self, key):
+        # Midpoint of bucket (gamma^(k-1), gamma^k] in relative terms
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, x, n=1):
+        self.count += n
+        if x <= 0:
+            self.zero_count += n
+            return
+        key = self._key(x)
+        self.buckets[key] = self.buckets.get(key, 0) + n
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def add_array(self, values):
+        """
+        Add a NumPy array of values in one vectorized step.
+        """
+        if len(values) == 0:
+            return
+        positive = values[values > 0]
+        self.count += len(values)
+        self.zero_count += len(values) - len(positive)
+        keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma),
+                                 return_counts=True)
+        for key, n in zip(keys.astype(int).tolist(), counts.tolist()):
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        target = keys[excess]
+        for key in keys[:excess]:
+            self.buckets[target] += self.buckets.pop(key)
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+        return self
+
+    def quantile(self, p):
+        """
+        Returns the p-th percentile (0 <= p <= 100) using the same
+        nearest-rank index as the exact mode.
+        """
+        if self.count == 0:
+            return None
+        rank = int(round((p / 100.0) * (self.count - 1)))
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return self._value(key)
+        return self._value(max(self.buckets))
+
+
+class ExactQuantiles:
+    """
+    Keeps every value; only meant for validating the sketch.
+    """
+
+    def __init__(self):
+        self.values = []
+        self._sorted = True
+
+    @property
+    def count(self):
+        return len(self.values)
+
+    def add(self, x):
+        self.values.append(x)
+        self._sorted = False
+
+    def add_array(self, values):
+        self.values.extend(values.tolist())
+        self._sorted = False
+
+    def merge(self, other):
+        self.values.extend(other.values)
+        self._sorted = False
+        return self
+
+    def quantile(self, p):
+        if not self.values:
+            return None
+        if not self._sorted:
+            self.values.sort()
+            self._sorted = True
+        return simple_percentile(self.values, p)
+
+
+def simple_percentile(sorted_list, p):
+    """
+    Returns the p-th percentile (0 <= p <= 100) of a *sorted* list
+    using a simple 'nearest-rank' approach (no linear interpolation).
+    """
+    if not sorted_list:
+        return None
+    # Convert percentile p (e.g. 95) to an index in the range 0..len-1
+    idx = int(round((p / 100.0) * (len(sorted_list) - 1)))
+    return sorted_list[idx]
+
+
+class RttSummary:
+    """
+    Running statistics plus a quantile estimator for one stream of RTTs.
+    """
+
+    def __init__(self, exact=False, relative_accuracy=0.001):
+        self.stats = RunningStats()
+        if exact:
+            self.quantiles = ExactQuantiles()
+        else:
+            self.quantiles = QuantileSketch(relative_accuracy)
+
+    @property
+    def count(self):
+        return self.stats.count
+
+    def add(self, x):
+        self.stats.add(x)
+        self.quantiles.add(x)
+
+    def add_array(self, values):
+        self.stats.add_array(values)
+        self.quantiles.add_array(values)
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        self.quantiles.merge(other.quantiles)
+        return self
+
+    def report(self, percentiles=PERCENTILES):
+        """
+        Returns the summary as printable lines (format of parse-rtt.py).
+        """
+        lines = [
+            f"Count: {self.stats.count}",
+            f"Mean RTT: {self.stats.mean:.2f} ms",
+            f"StdDev: {self.stats.stddev:.2f} ms",
+            f"Min/Max RTT: {self.stats.min:.2f}/{self.stats.max:.2f} ms",
+            "Percentiles:",
+        ]
+        for p in percentiles:
+            lines.append(f"  {p}th: {self.quantiles.quantile(p):.2f} ms")
+        return lines
+
+
+class RollingWindow:
+    """
+    RTT summary over the last `span` seconds.
+
+    Values are collected in slices of `slice_seconds`; expired slices are
+    dropped and the remaining ones merged on demand, so adding values costs
+    O(new values) and reading costs O(number of slices).
+    """
+
+    def __init__(self, span, slice_seconds=None, relative_accuracy=0.001):
+        self.span = span
+        self.slice_seconds = slice_seconds or max(span / 60.0, 1.0)
+        self.relative_accuracy = relative_accuracy
+        self.slices = deque()
+
+    def add_array(self, values, now):
+        start = now - now % self.slice_seconds
+        if not self.slices or self.slices[-1][0] != start:
+            self.slices.append((start, RttSummary(relative_accuracy=self.relative_accuracy)))
+        self.slices[-1][1].add_array(values)
+        self._expire(now)
+
+    def _expire(self, now):
+        while self.slices and self.slices[0][0] + self.slice_seconds <= now - self.span:
+            self.slices.popleft()
+
+    def summary(self, now):
+        self._expire(now)
+        merged = RttSummary(relative_accuracy=self.relative_accuracy)
+        for _, part in self.slices:
+            merged.merge(part)
+        return merged
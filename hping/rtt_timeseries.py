@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Time-bucketed RTT percentiles and loss from an hping log.
+
+Every reply line gives (seq, rtt). The send time of a packet is derived
+from its sequence number (start time + seq * send interval), loss from
+the sequence numbers that never got a reply. All buckets are computed
+in one vectorized pass and written to a compact columnar .npz file, so
+spikes can be correlated with the time of day without rescanning the log.
+With --plot the per-packet RTTs are drawn as well, reduced to min/max per
+pixel column (Tests-Throughput/throughput_tools/decimate.py) so a 24 h run
+stays a small PDF.
+
+Usage: python3 rtt_timeseries.py <hping_log> [--bucket 60] [--start "2025-01-26 10:00:00"] [--plot rtt.pdf]
+"""
+
+import os
+import re
+import sys
+import argparse
+import datetime
+
+import numpy as np
+
+from rtt_extract import extract_replies
+
+# The decimation is shared with the throughput plots
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Tests-Throughput'))
+from throughput_tools.decimate import plot_series, DEFAULT_POINTS
+
+PERCENTILES = [50, 90, 95, 99]
+
+# hping prints 16 bit sequence numbers
+SEQ_MODULO = 65536
+
+
+def unwrap_seq(seq):
+    """
+    Turns wrapping 16 bit sequence numbers into a monotonic counter.
+    Small reorderings are tolerated, only jumps of more than half the
+    range backwards count as a wrap.
+    """
+    if len(seq) == 0:
+        return seq
+    step = np.diff(seq)
+    wraps = np.cumsum(step < -SEQ_MODULO // 2) - np.cumsum(step > SEQ_MODULO // 2)
+    return seq + SEQ_MODULO * np.concatenate(([0], wraps))
+
+
+def packets_transmitted(path):
+    """
+    "86400 packets transmitted" from the statistic footer, or None.
+    """
+    with open(path, 'rb') as f:
+        f.seek(max(os.path.getsize(path) - 4096, 0))
+        match = re.search(rb'(\d+) packets transmitted', f.read())
+    return int(match.group(1)) if match else None
+
+
+def bucket_series(seq, rtt, bucket_seconds=60.0, send_interval=1.0, sent=None,
+                  percentiles=PERCENTILES):
+    """
+    Aggregates replies into buckets of `bucket_seconds`.
+
+    `seq` must be unwrapped and start at the first packet sent (0 for
+    hping). `sent` is the number of packets transmitted if known (footer),
+    otherwise everything up to the highest sequence number counts as sent.
+    Returns a dict of equally long column arrays.
+    """
+    # Duplicate replies (DUP!) only count once
+    seq, first = np.unique(seq, return_index=True)
+    rtt = rtt[first]
+
+    if sent is None:
+        sent = int(seq[-1]) + 1 if len(seq) else 0
+    per_bucket = bucket_seconds / send_interval
+    nbuckets = int(np.ceil(sent / per_bucket)) if sent else 0
+    nbuckets = max(nbuckets, int(seq[-1] // per_bucket) + 1 if len(seq) else 0)
+
+    bucket = (seq // per_bucket).astype(np.int64)
+    sent_per_bucket = np.bincount((np.arange(sent) // per_bucket).astype(np.int64),
+                                  minlength=nbuckets)
+    received = np.bincount(bucket, minlength=nbuckets)
+
+    # Sort by (bucket, rtt) once, then pick nearest-rank indices per bucket
+    order = np.lexsort((rtt, bucket))
+    sorted_rtt = rtt[order] if len(rtt) else np.full(1, np.nan)
+    starts = np.concatenate(([0], np.cumsum(received)[:-1])).astype(np.int64)
+    has_data = received > 0
+
+    def pick(idx):
+        return np.where(has_data, sorted_rtt[np.clip(idx, 0, len(sorted_rtt) - 1)], np.nan)
+
+    sums = np.bincount(bucket, weights=rtt, minlength=nbuckets)
+    columns = {
+        "bucket_offset": np.arange(nbuckets) * bucket_seconds,
+        "sent": sent_per_bucket,
+        "received": received,
+        "loss_pct": np.where(sent_per_bucket > 0,
+                             100.0 * (1 - received / np.maximum(sent_per_bucket, 1)), 0.0),
+        "rtt_min": pick(starts),
+        "rtt_mean": np.where(has_data, sums / np.maximum(received, 1), np.nan),
+        "rtt_max": pick(starts + received - 1),
+    }
+    for p in percentiles:
+        columns[f"rtt_p{p}"] = pick(starts + np.round((p / 100.0) * (received - 1)).astype(np.int64))
+    return columns
+
+
+def build_timeseries(path, bucket_seconds=60.0, send_interval=1.0, start=None, replies=None):
+    """
+    Bucketed series of an hping log. `start` is the send time of the first
+    packet (datetime); by default it is derived from the file's mtime,
+    i.e. the time the last packet was logged. `replies` are the (seq, rtt)
+    of extract_replies if already read.
+    """
+    seq, rtt = extract_replies(path) if replies is None else replies
+    seq = unwrap_seq(seq)
+    sent = packets_transmitted(path)
+    columns = bucket_series(seq, rtt, bucket_seconds, send_interval, sent)
+
+    if start is None:
+        last_seq = max(sent - 1 if sent else 0, int(seq.max()) if len(seq) else 0)
+        start_ts = os.path.getmtime(path) - last_seq * send_interval
+    else:
+        start_ts = start.timestamp()
+    columns["bucket_start"] = start_ts + columns.pop("bucket_offset")
+    columns["bucket_seconds"] = np.array(bucket_seconds)
+    return columns
+
+
+def save_timeseries(path, columns):
+    np.savez_compressed(path, **columns)
+
+
+def load_timeseries(path):
+    """
+    Columns written by save_timeseries as a dict of arrays.
+    """
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def plot_timeseries(output, columns, seq, rtt, send_interval=1.0, title=None, max_points=None,
+                    rasterize=False):
+    """
+    RTT of every reply (decimated) with the bucket median and p99 on
+    top, loss per bucket below; x axis in hours since the first packet.
+    `max_points` 0 draws all points.
+    """
+    from matplotlib import pyplot as plt
+
+    if max_points is None:
+        max_points = DEFAULT_POINTS
+    hours = unwrap_seq(seq) * (send_interval / 3600.0)
+    bucket_hours = (columns["bucket_start"] - columns["bucket_start"][0] + columns["bucket_seconds"] / 2) / 3600.0 \
+        if len(columns["bucket_start"]) else columns["bucket_start"]
+
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 9), sharex=True, gridspec_kw={"height_ratios": [3, 1]})
+    plot_series(ax1, hours, rtt, color="lightgrey", linewidth=0.5, label="RTT per packet (min/max per pixel)",
+                max_points=max_points, rasterize=rasterize)
+    ax1.plot(bucket_hours, columns["rtt_p50"], color="blue", label=f"median per {float(columns['bucket_seconds']):g} s")
+    ax1.plot(bucket_hours, columns["rtt_p99"], color="red", label=f"p99 per {float(columns['bucket_seconds']):g} s")
+    ax1.set_ylabel("RTT (ms)")
+    ax1.legend(loc="upper right")
+    ax1.grid(True)
+    ax2.plot(bucket_hours, columns["loss_pct"], color="black")
+    ax2.set_xlabel("time since first packet (h)")
+    ax2.set_ylabel("loss (%)")
+    ax2.grid(True)
+    if title:
+        fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(output, dpi=200)
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-bucket RTT percentiles and loss of an hping log.")
+    parser.add_argument("log_file")
+    parser.add_argument("-o", "--output", help="output .npz (default: <log_file>.rtt_<bucket>s.npz)")
+    parser.add_argument("--bucket", type=float, default=60.0, help="bucket length in seconds (default: 60)")
+    parser.add_argument("--send-interval", type=float, default=1.0,
+                        help="seconds between two hping packets (default: 1, i.e. -i u1000000)")
+    parser.add_argument("--start", help='send time of the first packet, e.g. "2025-01-26 10:00:00" '
+                                        '(default: file mtime minus the run length)')
+    parser.add_argument("--csv", help="also write the series as CSV to this file")
+    parser.add_argument("--top", type=int, default=10, help="print the N buckets with the highest max RTT")
+    parser.add_argument("--plot", help="also plot RTT and loss over time to this file (PDF/PNG)")
+    parser.add_argument("--max-points", type=int, default=None,
+                        help="points of the per-packet RTT line in the plot (default: 4000, 0 = all)")
+    parser.add_argument("--rasterize", action="store_true",
+                        help="embed the dense per-packet layer as bitmap in vector plots")
+    args = parser.parse_args()
+
+    start = datetime.datetime.fromisoformat(args.start) if args.start else None
+    replies = extract_replies(args.log_file)
+    columns = build_timeseries(args.log_file, args.bucket, args.send_interval, start, replies)
+    output = args.output or f"{args.log_file}.rtt_{args.bucket:g}s.npz"
+    save_timeseries(output, columns)
+
+    names = ["bucket_start", "sent", "received", "loss_pct", "rtt_min", "rtt_mean", "rtt_max"] + \
+            [f"rtt_p{p}" for p in PERCENTILES]
+    if args.csv:
+        table = np.column_stack([columns[name] for name in names])
+        np.savetxt(args.csv, table, delimiter=",", header=",".join(names), comments="",
+                   fmt=["%.0f", "%d", "%d"] + ["%.3f"] * (len(names) - 3))
+
+    sent = int(columns["sent"].sum())
+    received = int(columns["received"].sum())
+    print(f"Buckets: {len(columns['sent'])} x {args.bucket:g} s, "
+          f"{sent} sent, {received} received, {100.0 * (1 - received / max(sent, 1)):.2f}% loss")
+    print(f"Series saved to {output}")
+    if args.plot:
+        plot_timeseries(args.plot, columns, *replies, args.send_interval, os.path.basename(args.log_file),
+                        args.max_points, args.rasterize)
+        print(f"Plot saved to {args.plot}")
+
+    worst = np.argsort(-np.nan_to_num(columns["rtt_max"], nan=-1))[:args.top]
+    if len(worst):
+        print("Buckets with the highest max RTT:")
+    for i in worst:
+        if np.isnan(columns["rtt_max"][i]):
+            continue
+        stamp = datetime.datetime.fromtimestamp(columns["bucket_start"][i]).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"  {stamp}  max {columns['rtt_max'][i]:.1f} ms  p99 {columns['rtt_p99'][i]:.1f} ms  "
+              f"loss {columns['loss_pct'][i]:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,181 @@
 #!/usr/bin/env python3
 
+import os
 import sys
-import re
-
-# Check if the user provided at least one argument (the input file)
-if len(sys.argv) < 2:
-    print(f"Usage: {sys.argv[0]} <input_file> [<output_file>]")
-    sys.exit(1)
-
-# The first argument is our input file
-INPUT_FILE = sys.argv[1]
-
-# If the user provided a second argument, use that as output file,
-# otherwise default to "sorted_rtt.txt"
-if len(sys.argv) > 2:
-    OUTPUT_FILE = sys.argv[2]
-else:
-    OUTPUT_FILE = "sorted_rtt.txt"
-
-# Compile a regex to find RTT lines like "rtt=194.6 ms"
-pattern = re.compile(r'rtt=([\d\.]+)\s*ms')
-
-# We'll collect tuples of (float_rtt, original_line)
-lines_with_rtt = []
-
-# Read from the input file
-with open(INPUT_FILE, 'r') as f:
-    for line in f:
-        match = pattern.search(line)
-        if match:
-            try:
-                rtt_value = float(match.group(1))
-                # Store (rtt_value, line) so we can sort by rtt_value
-                lines_with_rtt.append((rtt_value, line.rstrip('\n')))
-            except ValueError:
-                # In case float parsing fails, just skip
-                pass
-
-# Sort by the RTT value (ascending)
-lines_with_rtt.sort(key=lambda x: x[0], reverse=True)
-
-# Write only the original lines to the output, in sorted order
-with open(OUTPUT_FILE, 'w') as out:
-    for rtt, original_line in lines_with_rtt:
-        out.write(original_line + "\n")
-
-print(f"Sorted {len(lines_with_rtt)} lines by RTT. Output in '{OUTPUT_FILE}'.")
+import heapq
+import argparse
+import tempfile
+
+import numpy as np
+
+from rtt_extract import open_mmap, iter_blocks, scan_rtt_lines
+
+# Rough RAM per matching line while a run is collected:
+# rtt/start/end arrays (24 bytes) plus sort index and temporaries
+BYTES_PER_LINE = 64
+
+
+def parse_size(text):
+    """
+    Converts sizes like "512M", "2G" or "100000" to bytes.
+    """
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3}
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def scan_input(data, block_size=None):
+    """
+    Yields (rtts, line_starts, line_ends) per block of the input, offsets
+    relative to the start of the file.
+    """
+    kwargs = {"block_size": block_size} if block_size else {}
+    block = None
+    for offset, block in iter_blocks(data, **kwargs):
+        values, starts, ends = scan_rtt_lines(block)
+        yield values, starts + offset, ends + offset
+    del block
+
+
+def write_lines(out, data, order, starts, ends):
+    out.writelines(data[starts[i]:ends[i]].rstrip(b'\r') + b"\n" for i in order.tolist())
+
+
+def sort_in_memory(data, output_file):
+    # We'll collect the RTT of every matching line plus where the line lives
+    # in the memory-mapped input, instead of keeping the line strings around
+    parts = list(scan_input(data))
+    if not parts:
+        open(output_file, 'wb').close()
+        return 0
+    rtts, starts, ends = (np.concatenate(p) for p in zip(*parts))
+
+    # Sort by the RTT value (descending, stable like list.sort(reverse=True))
+    order = np.argsort(-rtts, kind='stable')
+
+    # Write only the original lines to the output, in sorted order
+    with open(output_file, 'wb') as out:
+        write_lines(out, data, order, starts, ends)
+    return len(rtts)
+
+
+def sort_external(data, output_file, max_memory):
+    """
+    External merge sort: sorted runs of at most max_memory / BYTES_PER_LINE
+    lines go to temp files, which are then k-way merged into output_file.
+    Each run line is "<rtt>\\t<original line>".
+    """
+    run_lines = max(max_memory // BYTES_PER_LINE, 1)
+    block_size = max(min(max_memory // 4, 64 * 1024 * 1024), 64 * 1024)
+    tmpdir = tempfile.mkdtemp(prefix="sort_rtt_", dir=os.path.dirname(os.path.abspath(output_file)))
+    runs = []
+    total = 0
+
+    def flush(parts):
+        rtts, starts, ends = (np.concatenate(p) for p in zip(*parts))
+        order = np.argsort(-rtts, kind='stable')
+        path = os.path.join(tmpdir, f"run_{len(runs):05d}.txt")
+        with open(path, 'wb') as out:
+            out.writelines(repr(float(rtts[i])).encode() + b"\t"
+                           + data[starts[i]:ends[i]].rstrip(b'\r') + b"\n"
+                           for i in order.tolist())
+        runs.append(path)
+
+    try:
+        pending, pending_lines = [], 0
+        for values, starts, ends in scan_input(data, block_size):
+            pending.append((values, starts, ends))
+            pending_lines += len(values)
+            total += len(values)
+            if pending_lines >= run_lines:
+                flush(pending)
+                pending, pending_lines = [], 0
+        if pending_lines:
+            flush(pending)
+
+        # Read buffers of all runs together stay within max_memory
+        buffering = max(max_memory // (2 * max(len(runs), 1)), 4096)
+        files = [open(path, 'rb', buffering=buffering) for path in runs]
+        try:
+            merged = heapq.merge(*files, key=lambda rec: float(rec.split(b"\t", 1)[0]), reverse=True)
+            with open(output_file, 'wb') as out:
+                out.writelines(rec.split(b"\t", 1)[1] for rec in merged)
+        finally:
+            for f in files:
+                f.close()
+    finally:
+        for path in runs:
+            os.remove(path)
+        os.rmdir(tmpdir)
+    return total
+
+
+def top_n(data, output_file, n):
+    """
+    The n lines with the largest RTT via a bounded min-heap of
+    (rtt, -line_index, start, end); ties keep file order like a stable sort.
+    """
+    heap = []
+    index = 0
+    if n <= 0:
+        open(output_file, 'wb').close()
+        return 0
+    for values, starts, ends in scan_input(data):
+        # Only lines that can still enter the heap are looked at in Python
+        mask = np.ones(len(values), dtype=bool)
+        if len(values) > n:
+            mask &= values >= np.partition(values, len(values) - n)[len(values) - n]
+        if len(heap) == n:
+            mask &= values > heap[0][0]
+        for i in np.flatnonzero(mask).tolist():
+            item = (float(values[i]), -(index + i), int(starts[i]), int(ends[i]))
+            if len(heap) < n:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        index += len(values)
+
+    best = sorted(heap, reverse=True)
+    with open(output_file, 'wb') as out:
+        out.writelines(data[start:end].rstrip(b'\r') + b"\n" for _, _, start, end in best)
+    return len(best)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sort hping output lines by RTT (largest first).")
+    parser.add_argument("input_file")
+    # If the user provided a second argument, use that as output file,
+    # otherwise default to "sorted_rtt.txt"
+    parser.add_argument("output_file", nargs="?", default="sorted_rtt.txt")
+    parser.add_argument("--max-memory", type=parse_size, default=None, metavar="SIZE",
+                        help="external merge sort with at most SIZE of RAM for runs, e.g. 512M")
+    parser.add_argument("--top", type=int, default=None, metavar="N",
+                        help="only write the N lines with the largest RTT (no full sort)")
+    args = parser.parse_args()
+
+    with open(args.input_file, 'rb') as f:
+        mm = open_mmap(f)
+        data = mm if mm is not None else f.read()
+        try:
+            if args.top is not None:
+                count = top_n(data, args.output_file, args.top)
+                print(f"Wrote the {count} lines with the largest RTT. Output in '{args.output_file}'.")
+                return
+            if args.max_memory is not None:
+                count = sort_external(data, args.output_file, args.max_memory)
+            else:
+                count = sort_in_memory(data, args.output_file)
+        finally:
+            if mm is not None:
+                mm.close()
+
+    print(f"Sorted {count} lines by RTT. Output in '{args.output_file}'.")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <input_file> [<output_file>] [--max-memory SIZE] [--top N]")
+        sys.exit(1)
+    main()